@@ -0,0 +1,186 @@
+"""Run many queries from a JSONL file over one shared `BreweryAPI` client."""
+
+import json
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from time import perf_counter
+from typing import Any
+
+from httpx import HTTPError
+
+from .brewery import BreweryAPI
+from .models import Brewery, Coordinate, SearchQuery
+
+QUERY_KINDS = ("search", "by_id", "random")
+SEARCH_FIELDS = {f.name for f in fields(SearchQuery)}
+
+
+@dataclass
+class BatchQuery:
+    """
+    A single query read from a batch file.
+
+    Each JSONL line is an object with a "kind" of "search" (the default),
+    "by_id" or "random". Search lines take the `SearchQuery` field names
+    ("city", "state", "type", "coord", "ids", ...), with "coord" given as
+    "lat,lon"; by-id lines take "brewery_id"; random lines take "number".
+
+    Example:
+        {"kind": "search", "city": "Denver", "type": "micro", "per_page": 10}
+        {"kind": "by_id", "brewery_id": "b54b16e1-ac3b-4bff-a11f-f7ae9ddc27e0"}
+        {"kind": "random", "number": 3}
+    """
+
+    kind: str
+    query: SearchQuery | None = None
+    brewery_id: str | None = None
+    number: int = 1
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BatchQuery":
+        """
+        Creates a `BatchQuery` from one decoded batch line.
+
+        Raises:
+            ValueError: If the kind, fields or values are invalid.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Each line must be a JSON object.")
+        spec = dict(data)
+        kind = spec.pop("kind", "search")
+
+        if kind == "by_id":
+            brewery_id = spec.pop("brewery_id", None)
+            if not isinstance(brewery_id, str) or not brewery_id:
+                raise ValueError("by_id queries require a 'brewery_id' string.")
+            _reject_unknown(spec)
+            return cls(kind=kind, brewery_id=brewery_id)
+
+        if kind == "random":
+            number = spec.pop("number", 1)
+            if not isinstance(number, int) or number < 1:
+                raise ValueError("random queries require an integer 'number' >= 1.")
+            _reject_unknown(spec)
+            return cls(kind=kind, number=number)
+
+        if kind == "search":
+            _reject_unknown(spec, allowed=SEARCH_FIELDS)
+            coord = spec.get("coord")
+            if isinstance(coord, str):
+                spec["coord"] = Coordinate.from_str(coord)
+            elif isinstance(coord, list | tuple):
+                spec["coord"] = Coordinate(*coord)
+            return cls(kind=kind, query=SearchQuery(**spec))
+
+        raise ValueError(
+            f"Invalid kind {kind!r}. Must be one of {', '.join(QUERY_KINDS)}."
+        )
+
+    def execute(self, client: BreweryAPI) -> list[Brewery]:
+        """Runs the query against `client` and parses the results."""
+        if self.kind == "by_id":
+            assert self.brewery_id is not None
+            return [Brewery.from_dict(client.get_brewery_by_id(self.brewery_id))]
+        if self.kind == "random":
+            # Fanned out and deduplicated like the `random` command, since a
+            # single request is capped.
+            data = [
+                brewery
+                for batch in client.iter_random_breweries(self.number)
+                for brewery in batch
+            ]
+        else:
+            assert self.query is not None
+            data = client.get_brewery_filters(self.query)
+        return [Brewery.from_dict(brewery) for brewery in data]
+
+
+@dataclass
+class BatchResult:
+    """
+    The outcome of one batch line.
+
+    Attributes:
+        line (int): 1-based line number in the batch file.
+        spec (Any): The decoded line, or the raw text if it was not valid JSON.
+        status (str): "ok" or "error".
+        elapsed_ms (float): Wall time spent on this query.
+        results (list[dict]): Flattened breweries on success.
+        error (str | None): The error message on failure.
+    """
+
+    line: int
+    spec: Any
+    status: str
+    elapsed_ms: float
+    results: list[dict] = field(default_factory=list)
+    error: str | None = None
+
+    def to_dict(self) -> dict:
+        """Returns the JSONL output record for this result."""
+        record = {
+            "line": self.line,
+            "query": self.spec,
+            "status": self.status,
+            "elapsed_ms": round(self.elapsed_ms, 3),
+            "count": len(self.results),
+            "results": self.results,
+        }
+        if self.error is not None:
+            record["error"] = self.error
+        return record
+
+
+def _reject_unknown(spec: dict, allowed: Iterable[str] = ()) -> None:
+    """Raises `ValueError` if `spec` has keys outside `allowed`."""
+    unknown = set(spec) - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+
+
+def run_query(client: BreweryAPI, line: int, text: str) -> BatchResult:
+    """Parses and executes one batch line, capturing any error in the result."""
+    start = perf_counter()
+    spec: Any = text
+    try:
+        spec = json.loads(text)
+        breweries = BatchQuery.from_dict(spec).execute(client)
+    except (HTTPError, ValueError, KeyError, TypeError) as exc:
+        return BatchResult(
+            line=line,
+            spec=spec,
+            status="error",
+            elapsed_ms=(perf_counter() - start) * 1000,
+            error=f"{type(exc).__name__}: {exc}",
+        )
+    return BatchResult(
+        line=line,
+        spec=spec,
+        status="ok",
+        elapsed_ms=(perf_counter() - start) * 1000,
+        results=[brewery.to_flat_dict() for brewery in breweries],
+    )
+
+
+def run_batch(
+    client: BreweryAPI, lines: Iterable[str], concurrency: int = 8
+) -> Iterator[BatchResult]:
+    """
+    Executes every non-blank line of a batch file with bounded concurrency.
+
+    All queries share `client` and therefore its connection pool. Results
+    are yielded in input order.
+
+    Args:
+        client (BreweryAPI): An open client, shared by all worker threads.
+        lines (Iterable[str]): JSONL query specs.
+        concurrency (int): Maximum number of queries in flight at once.
+    """
+    numbered = [
+        (number, text.strip())
+        for number, text in enumerate(lines, start=1)
+        if text.strip()
+    ]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        yield from pool.map(lambda item: run_query(client, *item), numbered)
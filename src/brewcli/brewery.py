@@ -1,15 +1,53 @@
 """This module contains functions for calling Open Brewery DB API"""
 
+import logging
+import threading
+from collections.abc import Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from contextlib import AbstractContextManager
+from dataclasses import replace
+from time import perf_counter
 from typing import Any
+from urllib.parse import urlencode
 
 import httpx
 
+from brewcli.cache import Cache, CachePolicy, CacheStats
+from brewcli.compress import accept_encoding
+from brewcli.memprofile import MemoryProfile
+from brewcli.metrics import Metrics
 from brewcli.models import SearchQuery
+from brewcli.resilience import CircuitBreaker, CircuitOpenError, Hedging, is_failure
+from brewcli.singleflight import SingleFlight
+from brewcli.timings import Timings, phase
+
+logger = logging.getLogger(__name__)
 
 BASE_URL = "https://api.openbrewerydb.org/v1/breweries"
 HEADERS = {
     "Accept": "application/json",
+    # Responses are JSON and compress well; ask for every coding httpx can
+    # decode here rather than relying on its default.
+    "Accept-Encoding": accept_encoding(),
 }
+# The most breweries a single /random request will return.
+RANDOM_MAX_SIZE = 50
+# Consecutive top-up rounds without a new brewery before we assume the
+# dataset has fewer matches than requested.
+RANDOM_MAX_STALE_ROUNDS = 5
+# The most IDs sent in one by_ids request; matches the maximum page size so
+# every match comes back on the first page.
+BY_IDS_MAX = 200
+# The largest page size the search endpoint accepts.
+MAX_PER_PAGE = 200
+# Threads sending hedged requests and their duplicates.
+HEDGE_WORKERS = 16
 
 
 class BreweryAPI:
@@ -20,29 +58,105 @@ class BreweryAPI:
     random breweries and getting details for a specific brewery by ID.
     """
 
-    def __init__(self, base_url: str = BASE_URL):
+    def __init__(  # noqa: PLR0913
+        self,
+        base_url: str = BASE_URL,
+        *,
+        timings: Timings | None = None,
+        metrics: Metrics | None = None,
+        memprofile: MemoryProfile | None = None,
+        limits: httpx.Limits | None = None,
+        coalesce: bool = True,
+        cache: Cache | None = None,
+        cache_policy: CachePolicy | None = None,
+        cache_stats: CacheStats | None = None,
+        hedging: Hedging | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
         """
         Initializes the BreweryAPI object with the base URL.
 
         Args:
             base_url (str): The base URL for the API. Defaults to Open Brewery DB URL.
+            timings (Timings | None): Optional collector that receives per-phase
+                network and decode timings for every request.
+            metrics (Metrics | None): Optional request counters and latency
+                histograms. When `None`, no metrics are recorded.
+            memprofile (MemoryProfile | None): Optional tracker that records peak
+                memory of the HTTP body download and JSON decode phases.
+            limits (httpx.Limits | None): Connection pool limits for the shared
+                client. Defaults to httpx's own limits.
+            coalesce (bool): Share one in-flight request between concurrent
+                identical by-id and search calls. Defaults to True.
+            cache (Cache | None): Optional store for decoded by-id and search
+                responses, e.g. `MemoryCache` or `DiskCache`.
+            cache_policy (CachePolicy | None): How long cached responses are
+                fresh, and how stale they may be while served and refreshed
+                in the background. Defaults to `CachePolicy()`.
+            cache_stats (CacheStats | None): Where to count response cache
+                hits and misses, to share the counts between clients.
+                Defaults to a new `CacheStats`.
+            hedging (Hedging | None): Optionally send a duplicate of a request
+                that is slower than usual and use whichever answers first.
+                Hedged duplicates are counted as retries in `metrics`.
+            breaker (CircuitBreaker | None): Optionally refuse requests with
+                `CircuitOpenError` after repeated failures, answering from
+                the cache, however stale, where it has the response.
         """
         self.base_url: str = base_url
         self.client: httpx.Client
         self.headers = HEADERS
+        self.timings = timings
+        self.metrics = metrics
+        self.memprofile = memprofile
+        self.limits = limits
+        self.inflight: SingleFlight | None = SingleFlight() if coalesce else None
+        self.cache = cache
+        self.cache_policy = cache_policy or CachePolicy()
+        self.cache_stats = cache_stats or CacheStats()
+        self._refreshing: dict[str, threading.Thread] = {}
+        self._refresh_lock = threading.Lock()
+        self.hedging = hedging
+        self.breaker = breaker
+        self._hedge_pool: ThreadPoolExecutor | None = None
 
     def __enter__(self) -> "BreweryAPI":
         """Initializes the HTTP client when entering the context."""
-        self.client = httpx.Client(headers=self.headers)
+        options: dict[str, Any] = {}
+        if self.timings:
+            options["event_hooks"] = self.timings.event_hooks()
+        if self.limits:
+            options["limits"] = self.limits
+        self.client = httpx.Client(headers=self.headers, **options)
+        if self.hedging:
+            self._hedge_pool = ThreadPoolExecutor(
+                HEDGE_WORKERS, thread_name_prefix="brewcli-hedge"
+            )
         return self
 
     def __exit__(self, exc_type, exc_value, traceback) -> None:
         """Ensures the HTTP client is closed when exiting the context."""
+        # Let background refreshes finish so the next run sees fresh data.
+        with self._refresh_lock:
+            pending = list(self._refreshing.values())
+        for thread in pending:
+            thread.join()
+        if self._hedge_pool:
+            # Duplicates that lost the race are not waited for.
+            self._hedge_pool.shutdown(wait=False, cancel_futures=True)
         if self.client:
             self.client.close()
 
+    def _phase(self, name: str) -> AbstractContextManager:
+        """Measures a block as phase `name` when profiling is enabled."""
+        return phase(name, self.memprofile, self.timings)
+
     def _handle_request(
-        self, endpoint: str | None = None, params: dict | None = None
+        self,
+        endpoint: str | None = None,
+        params: dict | None = None,
+        label: str = "search",
+        cache_key: str | None = None,
     ) -> Any:
         """
         Internal method to handle GET requests to the API.
@@ -50,9 +164,16 @@ class BreweryAPI:
         Args:
             endpoint (str): The API endpoint to call.
             params (dict): Any query parameters to include in the request.
+            label (str): Endpoint name used for metrics ("random", "by_id" or
+                "search").
+            cache_key (str | None): Identifies the response in the cache and
+                among in-flight requests, after the URL; defaults to the
+                sorted params.
 
         Returns:
-            Any: The JSON response from the API.
+            Any: The JSON response from the API. When coalescing is enabled the
+                same object may be returned to several concurrent callers, so it
+                must not be mutated.
 
         Raises:
             httpx.HTTPError: If the request fails.
@@ -61,17 +182,233 @@ class BreweryAPI:
 
         url = f"{self.base_url}/{endpoint}" if endpoint else self.base_url
 
+        # Random requests are expected to return different breweries each time,
+        # so they are never cached or coalesced.
+        if label == "random":
+            return self._fetch(url, params, label)
+
+        key = (
+            self._request_key(url, params)
+            if cache_key is None
+            else f"{url}?{cache_key}"
+        )
+        entry = None
+        if self.cache is not None:
+            entry = self.cache.get(key)
+            if entry is not None and entry.age <= self.cache_policy.max_stale:
+                if self.metrics:
+                    self.metrics.record_cache_hit(label)
+                if entry.age > self.cache_policy.ttl:
+                    self.cache_stats.record("stale_hit")
+                    self._revalidate(key, url, params, label)
+                else:
+                    self.cache_stats.record("hit")
+                return entry.value
+            self.cache_stats.record("miss")
+
+        try:
+            return self._load(key, url, params, label)
+        except CircuitOpenError:
+            if entry is None:
+                raise
+            logger.warning(
+                "Serving a %.0fs old cached response for %s: the API is failing.",
+                entry.age,
+                url,
+            )
+            return entry.value
+
+    @staticmethod
+    def _request_key(url: str, params: dict | None) -> str:
+        """A stable key for a request: the URL with sorted, stringified params."""
+        items = sorted((k, str(v)) for k, v in (params or {}).items())
+        return f"{url}?{urlencode(items)}" if items else url
+
+    def _load(self, key: str, url: str, params: dict | None, label: str) -> Any:
+        """Fetches a response, sharing identical in-flight calls, and caches it."""
+
+        def fetch() -> Any:
+            result = self._fetch(url, params, label)
+            if self.cache is not None:
+                self.cache.set(key, result)
+            return result
+
+        if self.inflight is None:
+            return fetch()
+        result, shared = self.inflight.do(key, fetch)
+        if shared and self.metrics:
+            self.metrics.record_coalesced(label)
+        return result
+
+    def _revalidate(self, key: str, url: str, params: dict | None, label: str) -> None:
+        """Refreshes a stale cache entry in a background thread, once per key."""
+
+        def refresh() -> None:
+            try:
+                self._load(key, url, params, label)
+            except (httpx.HTTPError, ValueError) as exc:
+                logger.warning("Background refresh of %s failed: %s", url, exc)
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.pop(key, None)
+
+        with self._refresh_lock:
+            if key in self._refreshing:
+                return
+            thread = threading.Thread(target=refresh, daemon=True)
+            self._refreshing[key] = thread
+            thread.start()
+
+    def _fetch(self, url: str, params: dict | None, label: str) -> Any:
+        """Sends one GET request and decodes its JSON body."""
+        return self._decode(self._send(url, params, label), url, label)
+
+    def _send(
+        self,
+        url: str,
+        params: dict | None,
+        label: str,
+        headers: dict[str, str] | None = None,
+    ) -> httpx.Response:
+        """
+        Sends one GET request, recording metrics and timings.
+
+        A 304 Not Modified answer to a conditional request is returned rather
+        than raised.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker refuses the request.
+            httpx.HTTPError: If the request fails.
+        """
+        self._admit(url, label)
+        start = perf_counter()
         try:
-            response = self.client.get(url, params=params)
-            response.raise_for_status()
+            with self._phase("network"):
+                response, sent_for = self._get(url, params, label, headers)
+            if response.status_code != httpx.codes.NOT_MODIFIED:
+                response.raise_for_status()
         except httpx.HTTPError as exc:
+            if self.breaker:
+                if is_failure(exc):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+            if self.metrics:
+                self._record_failure(label, perf_counter() - start, exc)
             raise httpx.HTTPError(f"Error while requesting {url}.") from exc
+        except BaseException:
+            # Neither an answer nor an API failure, e.g. an interrupt: free
+            # the half-open trial so the next request can be one.
+            if self.breaker:
+                self.breaker.release()
+            raise
+
+        seconds = perf_counter() - start
+        if self.breaker:
+            self.breaker.record_success()
+        if self.hedging:
+            # The winning copy's own latency, without time queued for a
+            # worker or spent waiting before the duplicate was sent.
+            self.hedging.observe(label, sent_for)
+        if self.metrics:
+            self.metrics.observe_request(label, seconds)
+
+        if self.timings:
+            self.timings.record_response(response)
+        return response
+
+    def _admit(self, url: str, label: str) -> None:
+        """
+        Asks the circuit breaker, if any, to let a request to `url` through.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker refuses the request.
+        """
+        if self.breaker and not self.breaker.allow():
+            if self.metrics:
+                self.metrics.record_error(label, "circuit_open")
+            raise CircuitOpenError(
+                f"Not requesting {url}: the API failed repeatedly, retrying in "
+                f"up to {self.breaker.reset_timeout:.0f}s."
+            )
+
+    def _get(
+        self,
+        url: str,
+        params: dict | None,
+        label: str,
+        headers: dict[str, str] | None,
+    ) -> tuple[httpx.Response, float]:
+        """
+        Sends a GET, and a duplicate if it is slower than `hedging` allows.
+
+        The first response to arrive wins. A copy that fails while the other
+        is still in flight is ignored, and an error is raised only if both
+        fail. The losing copy is left to finish in the background.
+
+        The hedging delay is counted from when a worker actually sends the
+        request, so time queued behind other hedged requests is not mistaken
+        for a slow answer.
+
+        Returns:
+            tuple[httpx.Response, float]: The winning response, and the
+                seconds since that copy was sent.
+        """
+
+        def get(sent: threading.Event | None = None) -> tuple[httpx.Response, float]:
+            start = perf_counter()
+            if sent is not None:
+                sent.set()
+            response = self.client.get(url, params=params, headers=headers)
+            return response, perf_counter() - start
+
+        if self.hedging is None or self._hedge_pool is None:
+            return get()
+
+        sent = threading.Event()
+        first = self._hedge_pool.submit(get, sent)
+        # Wait for a worker to pick the request up before starting the timer;
+        # a request cancelled at shutdown is never sent.
+        while not sent.wait(0.05) and not first.done():
+            pass
+        done, _ = wait([first], timeout=self.hedging.delay(label))
+        if done:
+            return first.result()
+
+        if self.metrics:
+            self.metrics.record_retry(label)
+        pending: set[Future] = {first, self._hedge_pool.submit(get)}
+        error: BaseException | None = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is None:
+                    return future.result()
+        assert error is not None
+        raise error
 
+    def _decode(self, response: httpx.Response, url: str, label: str) -> Any:
+        """Decodes a JSON response body."""
         try:
-            return response.json()
+            with self._phase("decode"):
+                return response.json()
         except ValueError as exc:
+            if self.metrics:
+                self.metrics.record_error(label, "decode")
             raise ValueError(f"Failed to return json response from {url}") from exc
 
+    def _record_failure(self, label: str, seconds: float, exc: httpx.HTTPError) -> None:
+        """Counts a failed request by HTTP status, or "transport" if it had none."""
+        assert self.metrics is not None
+        self.metrics.observe_request(label, seconds)
+        status = (
+            exc.response.status_code
+            if isinstance(exc, httpx.HTTPStatusError)
+            else "transport"
+        )
+        self.metrics.record_error(label, status)
+
     def get_random_breweries(self, number: int = 1) -> Any:
         """
         Fetches a specified number of random breweries from the Open Brewery DB API.
@@ -82,7 +419,60 @@ class BreweryAPI:
         Returns:
             list[dict]: A list of brewery details as dictionaries.
         """
-        return self._handle_request(endpoint="random", params={"size": number})
+        return self._handle_request(
+            endpoint="random", params={"size": number}, label="random"
+        )
+
+    def iter_random_breweries(
+        self, number: int, concurrency: int = 4
+    ) -> Iterator[list[dict]]:
+        """
+        Yields batches of unique random breweries until `number` are collected.
+
+        The upstream caps how many breweries one /random call returns, so large
+        requests are split into concurrent requests of at most
+        `RANDOM_MAX_SIZE`. Results are deduplicated by brewery ID and further
+        rounds are sent until exactly `number` unique breweries have been
+        yielded, or until `RANDOM_MAX_STALE_ROUNDS` rounds in a row add nothing
+        new.
+
+        Args:
+            number (int): The number of unique breweries to return.
+            concurrency (int): Maximum number of requests in flight at once.
+
+        Yields:
+            list[dict]: Newly seen breweries, as soon as each response arrives.
+        """
+        seen: set[str] = set()
+        collected = 0
+        stale_rounds = 0
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while collected < number and stale_rounds < RANDOM_MAX_STALE_ROUNDS:
+                missing = number - collected
+                # Size the first round exactly; top-up rounds ask for full pages
+                # since duplicates make small requests unlikely to finish the job.
+                sizes = [RANDOM_MAX_SIZE] * (missing // RANDOM_MAX_SIZE)
+                if missing % RANDOM_MAX_SIZE:
+                    sizes.append(RANDOM_MAX_SIZE if seen else missing % RANDOM_MAX_SIZE)
+                futures = [
+                    pool.submit(self.get_random_breweries, number=size)
+                    for size in sizes
+                ]
+
+                before = collected
+                for future in as_completed(futures):
+                    batch = []
+                    for brewery in future.result():
+                        brewery_id = brewery.get("id")
+                        if collected == number or brewery_id in seen:
+                            continue
+                        if brewery_id is not None:
+                            seen.add(brewery_id)
+                        batch.append(brewery)
+                        collected += 1
+                    if batch:
+                        yield batch
+                stale_rounds = stale_rounds + 1 if collected == before else 0
 
     def get_brewery_by_id(self, brewery_id: str) -> Any:
         """
@@ -94,7 +484,42 @@ class BreweryAPI:
         Returns:
             dict: The brewery details.
         """
-        return self._handle_request(brewery_id)
+        return self._handle_request(brewery_id, label="by_id")
+
+    def get_breweries_by_ids(
+        self, brewery_ids: list[str], concurrency: int = 4
+    ) -> dict[str, dict]:
+        """
+        Fetches many breweries by ID using chunked `by_ids` search requests.
+
+        IDs are deduplicated and split into chunks of at most `BY_IDS_MAX`,
+        which are fetched concurrently.
+
+        Args:
+            brewery_ids (list[str]): The IDs to look up.
+            concurrency (int): Maximum number of requests in flight at once.
+
+        Returns:
+            dict[str, dict]: Brewery details keyed by ID. IDs that were not
+                found are absent.
+
+        Raises:
+            httpx.HTTPError: If any request fails.
+            ValueError: If a response cannot be parsed as JSON.
+        """
+        unique = list(dict.fromkeys(brewery_ids))
+        chunks = [unique[i : i + BY_IDS_MAX] for i in range(0, len(unique), BY_IDS_MAX)]
+        found: dict[str, dict] = {}
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for results in pool.map(
+                lambda chunk: self.get_brewery_filters(
+                    SearchQuery(ids=chunk, per_page=len(chunk))
+                ),
+                chunks,
+            ):
+                for brewery in results:
+                    found[brewery["id"]] = brewery
+        return found
 
     def get_brewery_filters(self, search_query: SearchQuery) -> Any:
         """
@@ -117,4 +542,68 @@ class BreweryAPI:
             ValueError: If the response cannot be parsed as JSON.
         """
         params = search_query.to_params()
-        return self._handle_request(params=params)
+        # Keyed by the canonical query, so equivalent searches share the
+        # cached response and any in-flight request.
+        return self._handle_request(params=params, cache_key=search_query.cache_key())
+
+    def get_brewery_page_if_changed(
+        self, search_query: SearchQuery, etag: str | None = None
+    ) -> tuple[list[dict] | None, str | None]:
+        """
+        Fetches one page of search results unless it still matches `etag`.
+
+        The request is conditional (`If-None-Match`) when an ETag from an
+        earlier call is given, so an unchanged page costs the server a 304
+        and no body. It always goes to the network: the cache would hide
+        changes, and in-flight sharing would mix up validators.
+
+        Args:
+            search_query (SearchQuery): The page to fetch.
+            etag (str | None): The ETag returned for this page last time.
+
+        Returns:
+            tuple[list[dict] | None, str | None]: The page, or `None` when it is
+                unchanged, and the ETag to send next time (`None` if the server
+                sends none).
+
+        Raises:
+            httpx.HTTPError: If the request fails.
+            ValueError: If the response cannot be parsed as JSON.
+        """
+        headers = {"If-None-Match": etag} if etag else None
+        response = self._send(
+            self.base_url, search_query.to_params(), "search", headers
+        )
+        if response.status_code == httpx.codes.NOT_MODIFIED:
+            return None, response.headers.get("ETag", etag)
+        page = self._decode(response, self.base_url, "search")
+        return page, response.headers.get("ETag")
+
+    def iter_brewery_pages(
+        self, search_query: SearchQuery | None = None
+    ) -> Iterator[list[dict]]:
+        """
+        Yields every page of results for a search, starting at its `page`.
+
+        Pages are requested one at a time until a short or empty page signals
+        the end of the results, so callers can stop early by breaking out.
+
+        Args:
+            search_query (SearchQuery | None): The filters to page through.
+                Defaults to all breweries, `MAX_PER_PAGE` at a time.
+
+        Yields:
+            list[dict]: One page of raw brewery data.
+        """
+        query = search_query or SearchQuery(per_page=MAX_PER_PAGE)
+        page = query.page or 1
+        per_page = query.per_page or MAX_PER_PAGE
+        while True:
+            results = self.get_brewery_filters(
+                replace(query, page=page, per_page=per_page)
+            )
+            if results:
+                yield results
+            if len(results) < per_page:
+                return
+            page += 1
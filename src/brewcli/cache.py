@@ -0,0 +1,309 @@
+"""Response caches and the stale-while-revalidate policy used by `BreweryAPI`."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from lzma import LZMAError
+from pathlib import Path
+from typing import Any, Protocol
+
+from .compress import NONE, Codec, decompress
+from .models import Brewery
+from .paths import default_cache_dir
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    When cached responses may be served.
+
+    Attributes:
+        ttl (float): Seconds an entry is fresh and served as-is.
+        max_stale (float): Age in seconds up to which a stale entry is still
+            served immediately while a background refresh fetches a new one.
+            Older entries block on a fresh request. Must be >= `ttl`; set it
+            equal to `ttl` to disable stale-while-revalidate.
+    """
+
+    ttl: float = 300.0
+    max_stale: float = 3600.0
+
+    def __post_init__(self):
+        if self.ttl < 0 or self.max_stale < self.ttl:
+            raise ValueError(
+                f"Invalid cache policy ttl={self.ttl}, max_stale={self.max_stale}. "
+                "Both must be >= 0 and max_stale must be >= ttl."
+            )
+
+
+@dataclass
+class CacheEntry:
+    """A cached, decoded response and the wall-clock time it was stored."""
+
+    value: Any
+    stored_at: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the entry was stored."""
+        return time.time() - self.stored_at
+
+
+@dataclass
+class CacheStats:
+    """
+    Lookup counts for one cache layer. Thread-safe.
+
+    Attributes:
+        hits (int): Lookups answered with a fresh entry.
+        stale_hits (int): Lookups answered with a stale entry that was then
+            refreshed in the background.
+        misses (int): Lookups that had to fetch.
+    """
+
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    @property
+    def lookups(self) -> int:
+        """Number of lookups counted."""
+        return self.hits + self.stale_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered from the cache, fresh or stale."""
+        return (self.hits + self.stale_hits) / self.lookups if self.lookups else 0.0
+
+    def record(self, outcome: str) -> None:
+        """Counts one lookup: "hit", "stale_hit" or "miss"."""
+        with self._lock:
+            if outcome == "hit":
+                self.hits += 1
+            elif outcome == "stale_hit":
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+
+    def take(self) -> "CacheStats":
+        """The counts so far, which are reset to zero."""
+        with self._lock:
+            counts = CacheStats(self.hits, self.stale_hits, self.misses)
+            self.hits = self.stale_hits = self.misses = 0
+        return counts
+
+    def to_dict(self) -> dict[str, int]:
+        """The counts as a JSON-serialisable dict."""
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses}
+
+
+def default_stats_path() -> Path:
+    """`stats.json` in the cache directory."""
+    return default_cache_dir() / "stats.json"
+
+
+def load_stats(path: Path | str | None = None) -> dict[str, CacheStats]:
+    """
+    The lookup counts saved by `save_stats`, by cache layer; empty if there
+    are none yet or the file is unreadable.
+    """
+    try:
+        saved = json.loads(Path(path or default_stats_path()).read_text())
+        return {layer: CacheStats(**counts) for layer, counts in saved.items()}
+    except (OSError, ValueError, TypeError, AttributeError):
+        return {}
+
+
+def save_stats(
+    counts: dict[str, CacheStats], path: Path | str | None = None
+) -> dict[str, CacheStats]:
+    """
+    Adds `counts` to the saved lookup counts.
+
+    Concurrent runs may race on the read-modify-write; the file is replaced
+    atomically, so at worst some counts are lost, never the file.
+
+    Returns:
+        dict[str, CacheStats]: The new totals, by cache layer.
+    """
+    path = Path(path or default_stats_path())
+    totals = load_stats(path)
+    for layer, stats in counts.items():
+        total = totals.setdefault(layer, CacheStats())
+        total.hits += stats.hits
+        total.stale_hits += stats.stale_hits
+        total.misses += stats.misses
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps({k: v.to_dict() for k, v in totals.items()}))
+    os.replace(tmp, path)
+    return totals
+
+
+class Cache(Protocol):
+    """Storage for decoded responses keyed by a request key string."""
+
+    def get(self, key: str) -> CacheEntry | None: ...
+
+    def set(self, key: str, value: Any) -> None: ...
+
+
+class MemoryCache:
+    """
+    A thread-safe in-process cache, e.g. for the `brewcli serve` daemon.
+
+    Bounded for a long-lived process: the least recently used entries are
+    evicted past `max_entries`, and entries older than `max_age` seconds,
+    which a policy with that `max_stale` can never serve again, are dropped
+    when looked up.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_age: float | None = None):
+        """
+        Args:
+            max_entries (int): Most responses kept.
+            max_age (float | None): Seconds after which an entry is dropped,
+                usually the cache policy's `max_stale`; `None` keeps entries
+                until they are evicted.
+        """
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.max_age is not None and entry.age > self.max_age:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = CacheEntry(value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache:
+    """
+    A cache of JSON files, one per request, that persists between runs.
+
+    Entries are written with `codec` and read back with whichever codec
+    wrote them, detected from their leading bytes, so changing the codec
+    never invalidates existing entries.
+
+    Args:
+        root (Path | str | None): The cache root. Defaults to
+            `default_cache_dir()`.
+        codec (Codec): Compression for new entries. Defaults to none.
+
+    Attributes:
+        directory (Path): Where entries are stored, `<root>/responses`.
+    """
+
+    def __init__(self, root: Path | str | None = None, codec: Codec = NONE):
+        self.directory = Path(root or default_cache_dir()) / "responses"
+        self.codec = codec
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def get(self, key: str) -> CacheEntry | None:
+        try:
+            data = json.loads(decompress(self._path(key).read_bytes()))
+            return CacheEntry(data["value"], data["stored_at"])
+        except (
+            OSError,
+            EOFError,
+            ValueError,
+            KeyError,
+            TypeError,
+            LZMAError,
+            zlib.error,
+        ):
+            return None
+
+    def usage(self) -> tuple[int, int]:
+        """The number of entries and their total size in bytes."""
+        sizes = [path.stat().st_size for path in self.directory.glob("*.json")]
+        return len(sizes), sum(sizes)
+
+    def set(self, key: str, value: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        # Write then rename so concurrent readers never see a partial file.
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        encoded = json.dumps({"key": key, "stored_at": time.time(), "value": value})
+        tmp.write_bytes(self.codec.compress(encoded.encode()))
+        os.replace(tmp, path)
+
+
+class ResultCache:
+    """
+    Parsed search results, keyed by `SearchQuery.cache_key()`.
+
+    Sits in front of the response cache: a hit skips the request, the JSON
+    decode and `Brewery.from_dict` alike. Equivalent queries ("Ohio" and
+    " ohio") share an entry because the key is canonical. Entries live in
+    memory, so results are shared within a process, such as the `brewcli
+    serve` daemon; the least recently used are evicted past `max_entries`.
+    Thread-safe.
+
+    Attributes:
+        stats (CacheStats): Hits and misses of `get`.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        """
+        Args:
+            max_entries (int): Most result lists kept.
+        """
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[list[Brewery], float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, max_age: float | None = None) -> list[Brewery] | None:
+        """
+        The cached results for `key`, or `None` if there are none at most
+        `max_age` seconds old. Counts a hit or a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                max_age is None or time.time() - entry[1] <= max_age
+            ):
+                self._entries.move_to_end(key)
+                self.stats.record("hit")
+                return list(entry[0])
+        self.stats.record("miss")
+        return None
+
+    def set(self, key: str, breweries: list[Brewery]) -> None:
+        """Stores the results for `key`, evicting the oldest entry if full."""
+        with self._lock:
+            self._entries[key] = (list(breweries), time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
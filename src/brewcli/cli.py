@@ -1,19 +1,247 @@
+import csv
+import heapq
+import json
+import struct
+import sys
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import replace
+from datetime import datetime
+from itertools import chain
+from time import perf_counter, sleep
+from typing import Any, BinaryIO, TextIO
+
 import click
-from httpx import HTTPError
+from click.shell_completion import CompletionItem
+from httpx import HTTPError, Limits
 
-from .brewery import BreweryAPI
+from .batch import run_batch
+from .brewery import MAX_PER_PAGE, BreweryAPI
+from .cache import (
+    CachePolicy,
+    CacheStats,
+    DiskCache,
+    ResultCache,
+    default_stats_path,
+    load_stats,
+    save_stats,
+)
+from .completion import suggestions
+from .compress import (
+    CODEC_NAMES,
+    SUFFIXES,
+    Codec,
+    codec_for_path,
+    compare_codecs,
+    get_codec,
+    open_text,
+    sniff,
+)
+from .daemon import default_socket_path
+from .daemon import serve as serve_daemon
+from .dedupe import DedupeStats, find_duplicates
+from .geo import UNITS, BoundingBox, parse_distance, within_radius
+from .importer import CHUNK_SIZE, ImportReport, import_dump
+from .memprofile import MemoryProfile
+from .mirror import Mirror
 from .models import BREWERY_TYPES, Brewery, Coordinate, SearchQuery
-from .render import render_breweries, render_brewery
+from .nearest import FORMATS, OUTPUT_FIELDS, assign_nearest, read_points
+from .planner import MAX_QUERIES, MULTI_VALUE_FIELDS, QueryPlan, plan_search, run_plan
+from .ranking import SORT_FIELDS, Ordering, distance_km
+from .render import (
+    render_breweries,
+    render_brewery,
+    render_brewery_stream,
+    render_cache_stats,
+    render_codecs,
+    render_duplicates,
+    render_memprofile,
+    render_stats,
+    render_timings,
+)
+from .resilience import CircuitBreaker, Hedging
+from .snapshot import Snapshot, default_snapshot_path, write_snapshot
+from .stats import BreweryStats
+from .timings import Timings, phase
+from .watch import WatchDelta, Watcher
+
+
+def _state(key: str) -> Any:
+    """Looks up a per-invocation object set up by the `cli` group, if any."""
+    ctx = click.get_current_context(silent=True)
+    if ctx is None or not ctx.obj:
+        return None
+    return ctx.obj.get(key)
+
+
+def _client_options() -> dict[str, Any]:
+    """`BreweryAPI` keyword arguments selected by the global options."""
+    return {
+        "timings": _state("timings"),
+        "memprofile": _state("memprofile"),
+        "cache": _state("cache"),
+        "cache_policy": _state("cache_policy"),
+        "cache_stats": _state("cache_stats"),
+        "hedging": _state("hedging"),
+        "breaker": _state("breaker"),
+    }
+
+
+def _api() -> AbstractContextManager[BreweryAPI]:
+    """
+    A client for this invocation.
+
+    Inside `brewcli serve` the daemon's warm client is reused (and left open)
+    when the global options ask for the client it already is; a profiler, a
+    different cache or cache policy, hedging or breaker gets its own client.
+    """
+    shared = _state("client")
+    if shared is not None and _is_configured_as(shared):
+        return nullcontext(shared)
+    return BreweryAPI(**_client_options())
+
+
+def _is_configured_as(client: BreweryAPI) -> bool:
+    """Whether `client` matches the client the global options select."""
+    options = _client_options()
+    return (
+        not (options["timings"] or options["memprofile"])
+        and options["cache"] is None
+        and options["cache_policy"] == client.cache_policy
+        and options["hedging"] is None
+        and client.hedging is None
+        and options["breaker"] is client.breaker
+    )
+
+
+def _phase(name: str) -> AbstractContextManager:
+    """Measures a block as phase `name` when `--timings`/`--memprofile` is on."""
+    return phase(name, _state("memprofile"), _state("timings"))
+
+
+def _count_records(count: int) -> None:
+    """Adds `count` parsed breweries to the `--timings` record total."""
+    timings = _state("timings")
+    if timings:
+        timings.records += count
+
+
+def _parse_batches(batches: Iterable[list[dict]]) -> Iterator[list[Brewery]]:
+    """Parses each batch of raw brewery data as it is consumed."""
+    for batch in batches:
+        with _phase("parse"):
+            breweries = [Brewery.from_dict(data) for data in batch]
+        _count_records(len(breweries))
+        yield breweries
 
 
 @click.group()
-def cli() -> None:
+@click.option(
+    "--timings",
+    "show_timings",
+    is_flag=True,
+    help="Print a per-phase latency breakdown to stderr on exit.",
+)
+@click.option(
+    "--memprofile",
+    "show_memprofile",
+    is_flag=True,
+    help="Print peak memory and top allocation sites per phase to stderr on exit.",
+)
+@click.option(
+    "--cache",
+    "use_cache",
+    is_flag=True,
+    help="Serve by-id and search results from the on-disk response cache.",
+)
+@click.option(
+    "--cache-ttl",
+    type=click.FloatRange(min=0),
+    default=300.0,
+    show_default=True,
+    help="Seconds a cached response is served without refreshing.",
+)
+@click.option(
+    "--max-stale",
+    type=click.FloatRange(min=0),
+    default=3600.0,
+    show_default=True,
+    help="Seconds a stale cached response is still served while it is "
+    "refreshed in the background; older entries wait for a fresh request.",
+)
+@click.option(
+    "--cache-codec",
+    type=click.Choice(CODEC_NAMES),
+    default="none",
+    show_default=True,
+    help="Compression for new cache entries; existing ones are read whatever "
+    "codec wrote them.",
+)
+@click.option(
+    "--hedge",
+    is_flag=True,
+    help="Repeat a request that is slower than the recent 95th percentile "
+    "latency and use whichever copy answers first.",
+)
+@click.option(
+    "--fail-after",
+    type=click.IntRange(min=0),
+    default=5,
+    show_default=True,
+    help="Consecutive API failures after which requests fail fast for 30s; "
+    "0 disables. Failed searches fall back to a synced mirror, in the daemon "
+    "only once the circuit is open.",
+)
+@click.pass_context
+def cli(ctx: click.Context, **options: Any) -> None:
     """
     A simple CLI that retrieves random breweries and displays their name, location,
     and a link to their website.
 
     Provide a number specifying how many breweries you would like!
     """
+    ctx.ensure_object(dict)
+    ttl = options["cache_ttl"]
+    ctx.obj["cache_policy"] = CachePolicy(
+        ttl=ttl, max_stale=max(options["max_stale"], ttl)
+    )
+    if options["use_cache"]:
+        ctx.obj["cache"] = DiskCache(
+            codec=_codec(options["cache_codec"], "--cache-codec")
+        )
+        ctx.obj["cache_stats"] = CacheStats()
+    if options["hedge"]:
+        ctx.obj["hedging"] = Hedging()
+    breaker = ctx.obj.get("breaker")
+    if not options["fail_after"]:
+        ctx.obj.pop("breaker", None)
+    elif breaker is None or breaker.failure_threshold != options["fail_after"]:
+        # Inside `brewcli serve` the daemon's breaker keeps its state.
+        ctx.obj["breaker"] = CircuitBreaker(options["fail_after"])
+    if ctx.obj.get("cache_stats") is not None:
+        ctx.call_on_close(lambda: _save_cache_stats(ctx.obj))
+    if options["show_timings"]:
+        timings = Timings()
+        ctx.obj["timings"] = timings
+        ctx.call_on_close(lambda: render_timings(timings))
+    if options["show_memprofile"]:
+        memprofile = MemoryProfile()
+        memprofile.start()
+        ctx.obj["memprofile"] = memprofile
+        ctx.call_on_close(memprofile.stop)
+        ctx.call_on_close(lambda: render_memprofile(memprofile))
+
+
+def _save_cache_stats(state: dict) -> None:
+    """Adds this invocation's cache lookups to the totals of `cache stats`."""
+    counts = {"responses": state["cache_stats"].take()}
+    if state.get("results") is not None:
+        counts["results"] = state["results"].stats.take()
+    if any(stats.lookups for stats in counts.values()):
+        try:
+            save_stats(counts)
+        except OSError as exc:
+            click.echo(f"Could not save cache statistics: {exc}", err=True)
 
 
 @cli.command()
@@ -22,15 +250,17 @@ def random(number: int) -> None:
     """
     Retrieve a random set of breweries.
 
+    Large counts are fetched as concurrent capped requests, deduplicated by
+    brewery ID, and rendered as they arrive.
+
     Args:
         number (int): The number of random breweries to retrieve.
     """
-    with BreweryAPI() as client:
+    with _api() as client:
         try:
-            breweries: list[Brewery] = [
-                Brewery.from_dict(brewery)
-                for brewery in client.get_random_breweries(number=number)
-            ]
+            count = render_brewery_stream(
+                _parse_batches(client.iter_random_breweries(number)), measure=_phase
+            )
         except HTTPError as exc:
             click.echo(f"HTTP error: {exc}", err=True)
             return
@@ -41,17 +271,50 @@ def random(number: int) -> None:
             )
             return
 
-    render_breweries(breweries)
+    if count < number:
+        click.echo(f"Only {count} unique breweries available.", err=True)
 
 
 @cli.command()
-@click.argument("brewery_id", type=click.STRING)
-def by_id(brewery_id: str) -> None:
-    """Retrieve a brewery by ID"""
-    with BreweryAPI() as client:
+@click.argument("brewery_ids", nargs=-1, type=click.STRING)
+@click.option(
+    "-f",
+    "--file",
+    "id_file",
+    type=click.File("r"),
+    help="Read additional IDs from a file, one per line ('-' for stdin).",
+)
+@click.option(
+    "--offline",
+    is_flag=True,
+    help="Look the IDs up in the local snapshot instead of the API.",
+)
+def by_id(brewery_ids: tuple[str, ...], id_file: TextIO | None, offline: bool) -> None:
+    """
+    Retrieve one or more breweries by ID.
+
+    A single ID is shown as a detail panel. Many IDs are resolved with a
+    handful of chunked requests and shown as a table in input order; IDs that
+    were not found are reported on stderr. With --offline they are read from
+    the snapshot written by `mirror snapshot`.
+    """
+    ids = list(brewery_ids)
+    if id_file is not None:
+        ids.extend(line.strip() for line in id_file if line.strip())
+    if not ids:
+        raise click.UsageError("Provide at least one brewery ID or --file.")
+    if offline:
+        _offline_by_id(ids)
+        return
+    if len(ids) > 1:
+        _by_ids(ids)
+        return
+
+    with _api() as client:
         try:
-            data: dict = client.get_brewery_by_id(brewery_id=brewery_id)
-            brewery: Brewery = Brewery.from_dict(data)
+            data: dict = client.get_brewery_by_id(brewery_id=ids[0])
+            with _phase("parse"):
+                brewery: Brewery = Brewery.from_dict(data)
         except (KeyError, TypeError) as exc:
             click.echo(f"Error occurred creating Brewery from response data: {exc}")
             return
@@ -59,61 +322,1105 @@ def by_id(brewery_id: str) -> None:
             click.echo(f"HTTP error: {exc}", err=True)
             return
 
-    render_brewery(brewery)
+    _count_records(1)
+    with _phase("render"):
+        render_brewery(brewery)
 
 
-@cli.command()
-@click.option("--by-city", type=click.STRING)
-@click.option("--by-country", type=click.STRING)
-@click.option("--by-dist", type=click.STRING, help="Coordinates as 'lat,lon'")
-@click.option("--by-name", type=click.STRING)
-@click.option("--by-postal", type=click.STRING)
-@click.option("--by-state", type=click.STRING)
-@click.option("--by-type", type=click.Choice(BREWERY_TYPES, case_sensitive=False))
-def search(**filters: str | None) -> None:
-    """Retrieve a set of breweries using one or more search terms."""
-    by_dist = filters.pop("by_dist")
+def _by_ids(ids: list[str]) -> None:
+    """Resolves many IDs in bulk and renders them in input order."""
+    with _api() as client:
+        try:
+            found = client.get_breweries_by_ids(ids)
+        except HTTPError as exc:
+            click.echo(f"HTTP error: {exc}", err=True)
+            return
+
+    ordered = list(dict.fromkeys(ids))
+    breweries: list[Brewery] = []
+    with _phase("parse"):
+        for brewery_id in ordered:
+            if brewery_id not in found:
+                continue
+            try:
+                breweries.append(Brewery.from_dict(found[brewery_id]))
+            except (KeyError, TypeError) as exc:
+                click.echo(f"Error parsing brewery {brewery_id}: {exc}", err=True)
+
+    _count_records(len(breweries))
+    if breweries:
+        with _phase("render"):
+            render_breweries(breweries)
+
+    _report_missing([brewery_id for brewery_id in ordered if brewery_id not in found])
+
+
+def _report_missing(missing: list[str]) -> None:
+    if missing:
+        click.echo(f"Not found ({len(missing)}): {', '.join(missing)}", err=True)
+
+
+def _offline_by_id(ids: list[str]) -> None:
+    """Resolves IDs from the memory-mapped snapshot."""
+    ordered = list(dict.fromkeys(ids))
+    try:
+        with Snapshot() as snapshot, _phase("parse"):
+            found = {brewery_id: snapshot.get(brewery_id) for brewery_id in ordered}
+    except FileNotFoundError as exc:
+        raise click.ClickException(
+            "No snapshot found; run 'brewcli mirror snapshot' first."
+        ) from exc
+    except (ValueError, struct.error) as exc:
+        raise click.ClickException(
+            f"The snapshot is unreadable ({exc}); "
+            "run 'brewcli mirror snapshot' to write it again."
+        ) from exc
+    breweries = [brewery for brewery in found.values() if brewery is not None]
+
+    _count_records(len(breweries))
+    with _phase("render"):
+        if len(ids) == 1 and breweries:
+            render_brewery(breweries[0])
+        elif breweries:
+            render_breweries(breweries)
+    _report_missing([brewery_id for brewery_id, b in found.items() if b is None])
+
+
+def _complete(field: str) -> Callable[..., list[CompletionItem]]:
+    """
+    Shell completion for a `--by-*` option from the mirror's prefix index.
+
+    The `brewcli` entry point answers these before importing this module;
+    this is the fallback when the CLI is invoked directly.
+    """
+
+    def complete(
+        ctx: click.Context, param: click.Parameter, incomplete: str
+    ) -> list[CompletionItem]:
+        return [
+            CompletionItem(value, help=help_text)
+            for value, help_text in suggestions(field, incomplete)
+        ]
+
+    return complete
+
+
+def _search_filters(command: Callable) -> Callable:
+    """
+    Adds the `--by-*` search filter options to a command. Every filter but
+    --by-dist may be repeated to match any of several values.
+    """
+    repeat = "Repeat to match any of several values."
+    options = [
+        click.option(
+            "--by-city", multiple=True, help=repeat, shell_complete=_complete("city")
+        ),
+        click.option(
+            "--by-country",
+            multiple=True,
+            help=repeat,
+            shell_complete=_complete("country"),
+        ),
+        click.option("--by-dist", type=click.STRING, help="Coordinates as 'lat,lon'"),
+        click.option("--by-name", multiple=True, help=repeat),
+        click.option("--by-postal", multiple=True, help=repeat),
+        click.option(
+            "--by-state", multiple=True, help=repeat, shell_complete=_complete("state")
+        ),
+        click.option(
+            "--by-type",
+            type=click.Choice(BREWERY_TYPES, case_sensitive=False),
+            multiple=True,
+            help=repeat,
+            shell_complete=_complete("type"),
+        ),
+        click.option(
+            "--max-queries",
+            type=click.IntRange(min=1),
+            default=MAX_QUERIES,
+            show_default=True,
+            help="Most API queries repeated filters may expand into; filters "
+            "beyond that are applied to the results instead.",
+        ),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+def _search_plan(filters: dict[str, Any], **fields: Any) -> QueryPlan | None:
+    """
+    Plans the queries for the `--by-*` options, plus any extra `fields`.
+
+    Returns `None` after reporting an invalid --by-dist value.
+    """
     coord = None
-    if by_dist:
+    if filters["by_dist"]:
         try:
-            coord = Coordinate.from_str(by_dist)
+            coord = Coordinate.from_str(filters["by_dist"])
         except ValueError as exc:
             click.echo(f"Invalid --by-dist value: {exc}", err=True)
-            return
+            return None
 
-    query = SearchQuery(
-        coord=coord,
-        city=filters["by_city"],
-        country=filters["by_country"],
-        name=filters["by_name"],
-        postal=filters["by_postal"],
-        state=filters["by_state"],
-        type=filters["by_type"],
-    )
+    values = {name: filters[f"by_{name}"] for name in MULTI_VALUE_FIELDS}
+    return plan_search(values, filters["max_queries"], coord=coord, **fields)
 
-    with BreweryAPI() as client:
+
+@cli.command()
+@_search_filters
+@click.option(
+    "--radius",
+    help="Only breweries within this distance of --by-dist, nearest first, "
+    "e.g. '25km', '10mi' or '500m'.",
+)
+@click.option(
+    "--sort-by",
+    type=click.Choice(SORT_FIELDS, case_sensitive=False),
+    help="Order the results; 'distance' is from --by-dist.",
+)
+@click.option("--descending", is_flag=True, help="Reverse the --sort-by order.")
+@click.option(
+    "--limit",
+    type=click.IntRange(min=1),
+    help="Show only the first K results, selected from every matching page.",
+)
+@click.option("--local", is_flag=True, help="Search the local mirror instead.")
+@click.option(
+    "--near-postal",
+    metavar="CODE",
+    help="Search around the centroid of a postal code's breweries in the "
+    "mirror, like --by-dist.",
+)
+def search(  # noqa: PLR0913
+    *,
+    near_postal: str | None,
+    radius: str | None,
+    sort_by: str | None,
+    descending: bool,
+    limit: int | None,
+    local: bool,
+    **filters: Any,
+) -> None:
+    """
+    Retrieve a set of breweries using one or more search terms.
+
+    Shows one page of results, as the API pages them. Repeated filters
+    match any of their values: their combinations are run as concurrent
+    queries and their pages merged without duplicates, the same as running
+    one search per value.
+
+    With --limit or --radius, every matching page is fetched instead. With
+    --limit, every matching page is streamed through and the first K
+    breweries in --sort-by order are kept. Paging stops early when the API
+    order already settles the answer: without --sort-by, or when sorting by
+    ascending distance from --by-dist.
+
+    --near-postal looks the center up in the mirror's postal code centroids
+    instead, so no geocoding service is needed; pass --by-country to pick
+    the country when a code exists in several.
+    """
+    if near_postal is not None:
+        if filters["by_dist"]:
+            raise click.UsageError("--near-postal and --by-dist cannot be combined.")
+        filters["by_dist"] = _postal_center(near_postal, filters["by_country"]).to_str()
+
+    radius_km, unit = None, "km"
+    if radius is not None:
+        try:
+            radius_km, unit = parse_distance(radius)
+        except ValueError as exc:
+            raise click.BadParameter(str(exc), param_hint="--radius") from exc
+        if not filters["by_dist"]:
+            raise click.UsageError("--radius requires --by-dist or --near-postal.")
+    if sort_by == "distance" and not filters["by_dist"]:
+        raise click.UsageError(
+            "--sort-by distance requires --by-dist or --near-postal."
+        )
+
+    plan = _search_plan(filters)
+    if plan is None:
+        return
+    center = plan.queries[0].coord
+    order = Ordering.of(sort_by, center, descending, limit)
+
+    if radius_km is not None or limit is not None:
+        per_page = MAX_PER_PAGE
+        if limit is not None and order.server_order and radius_km is None:
+            per_page = min(limit, MAX_PER_PAGE)
+        plan = replace(
+            plan, queries=[replace(q, per_page=per_page) for q in plan.queries]
+        )
+
+    breweries = _find_breweries(plan, order, radius_km, local)
+    if breweries is None:
+        return
+    if not breweries:
+        click.echo("No breweries found.")
+        return
+
+    distances = None
+    if center is not None and (radius_km is not None or sort_by == "distance"):
+        distances = [
+            None if (km := distance_km(b, center)) is None else km / UNITS[unit]
+            for b in breweries
+        ]
+
+    _count_records(len(breweries))
+    with _phase("render"):
+        render_breweries(breweries, distances=distances, unit=unit)
+
+
+def _synced_mirror() -> Mirror:
+    """
+    The mirror, for commands that read it.
+
+    Raises:
+        click.ClickException: If it was never synced; opening it would create
+            an empty one and every read would silently find nothing.
+    """
+    mirror = Mirror()
+    if not mirror.path.exists():
+        raise click.ClickException(
+            f"There is no mirror at {mirror.path}; run 'brewcli mirror sync' first."
+        )
+    return mirror
+
+
+def _postal_center(postal_code: str, countries: tuple[str, ...]) -> Coordinate:
+    """
+    The mirror's centroid for a postal code, in the one --by-country given.
+
+    Raises:
+        click.ClickException: If there is no mirror yet, or it has no located
+            brewery with the postal code.
+    """
+    country = countries[0] if len(countries) == 1 else None
+    mirror = Mirror()
+    # Opening the mirror would create an empty one.
+    if not mirror.path.exists():
+        raise click.ClickException(
+            "There is no mirror to look up postal codes in; "
+            "run 'brewcli mirror sync' first, or use --by-dist."
+        )
+    with mirror as store:
+        center = store.postal_centroid(postal_code, country)
+    if center is None:
+        raise click.ClickException(
+            f"Postal code {postal_code!r} is not in the mirror; "
+            "run 'brewcli mirror sync' first, or use --by-dist."
+        )
+    return center
+
+
+def _find_breweries(
+    plan: QueryPlan, order: Ordering, radius_km: float | None, local: bool
+) -> list[Brewery] | None:
+    """
+    The results of `plan` in `order`, from the API or the mirror, or `None`
+    after an HTTP error.
+    """
+    if radius_km is not None:
+        search_radius = _local_radius_search if local else _radius_search
+        found = search_radius(plan, radius_km)
+        if found is None:
+            return _mirror_fallback(plan, order, radius_km)
+        # Radius results are nearest first, like the API's by_dist order.
+        return order.apply(
+            [brewery for _, brewery in found], presorted=order.server_order
+        )
+    if local:
+        with _synced_mirror() as store, _phase("parse"):
+            return order.apply(
+                plan.merge_breweries(store.iter_breweries(q) for q in plan.queries)
+            )
+    if order.limit is not None:
+        breweries = _top_search(plan, order)
+    else:
+        breweries = (
+            _remote_search(plan.queries[0]) if plan.is_simple else _planned_search(plan)
+        )
+        breweries = None if breweries is None else order.apply(breweries)
+    if breweries is None:
+        return _mirror_fallback(plan, order, radius_km)
+    return breweries
+
+
+def _mirror_fallback(
+    plan: QueryPlan, order: Ordering, radius_km: float | None
+) -> list[Brewery] | None:
+    """
+    The mirror's results after an API search failed, if a mirror with
+    breweries was synced; otherwise `None`.
+
+    A single run sends too few requests to open its circuit breaker, so it
+    falls back on any failure. The daemon, whose breaker outlives each
+    command, falls back only once the failures have opened the circuit.
+    Disabled with the breaker, by `--fail-after 0`.
+    """
+    breaker = _state("breaker")
+    if breaker is None or (_state("client") is not None and not breaker.is_open):
+        return None
+    mirror = Mirror()
+    if not mirror.path.exists():
+        return None
+    with mirror as store:
+        if not len(store):
+            return None
+    click.echo("The API is failing; searching the local mirror instead.", err=True)
+    return _find_breweries(plan, order, radius_km, local=True)
+
+
+def _top_search(plan: QueryPlan, order: Ordering) -> list[Brewery] | None:
+    """
+    The first `order.limit` results of `plan`, or `None` after an HTTP error.
+
+    When the API order already matches, the queries are paged lazily and
+    merged in order, so only the pages needed for the answer are fetched;
+    otherwise every page is parsed as the planner's workers deliver it and
+    streamed through a heap bounded to `order.limit`.
+    """
+    with _api() as client:
+        try:
+            if not order.server_order:
+                return order.apply(_parse_pages(run_plan(client, plan)))
+            streams = [_parse_pages(client.iter_brewery_pages(q)) for q in plan.queries]
+            merged = (
+                heapq.merge(*streams, key=order.key) if order.key else chain(*streams)
+            )
+            return order.apply(plan.merge_breweries([merged]), presorted=True)
+        except HTTPError as exc:
+            click.echo(f"HTTP Exception: {exc}", err=True)
+            return None
+
+
+def _planned_search(plan: QueryPlan) -> list[Brewery] | None:
+    """
+    The merged first pages of a multi-query plan, like one `_remote_search`
+    per query, or `None` after an HTTP error.
+    """
+    with _api() as client:
+        try:
+            return list(_parse_pages(run_plan(client, plan, first_page_only=True)))
+        except HTTPError as exc:
+            click.echo(f"HTTP Exception: {exc}", err=True)
+            return None
+
+
+def _remote_search(query: SearchQuery) -> list[Brewery] | None:
+    """
+    One page of API search results, or `None` after an HTTP error.
+
+    In the daemon, parsed results are kept by canonical query, so an
+    equivalent search within the cache TTL is neither fetched nor parsed
+    again.
+    """
+    result_cache: ResultCache | None = _state("results")
+    key = query.cache_key()
+    if result_cache is not None:
+        policy = _state("cache_policy")
+        cached = result_cache.get(key, policy.ttl if policy else None)
+        if cached is not None:
+            return cached
+
+    with _api() as client:
         try:
             results = client.get_brewery_filters(query)
         except HTTPError as exc:
             click.echo(f"HTTP Exception: {exc}", err=True)
-            return
+            return None
 
-    if not results:
-        click.echo("No breweries found.")
+    breweries: list[Brewery] = []
+    with _phase("parse"):
+        for data in results:
+            try:
+                breweries.append(Brewery.from_dict(data))
+            except (KeyError, TypeError) as exc:
+                click.echo(f"Error parsing brewery: {exc}", err=True)
+                continue
+    if result_cache is not None:
+        result_cache.set(key, breweries)
+    return breweries
+
+
+def _radius_search(
+    plan: QueryPlan, radius_km: float
+) -> list[tuple[float, Brewery]] | None:
+    """
+    Pages through the API results of every query of `plan` within `radius_km`
+    of their shared coordinate.
+
+    The API orders `by_dist` results nearest first, so paging stops after the
+    first page that reaches past the radius.
+    """
+    found: dict[str, tuple[float, Brewery]] = {}
+    with _api() as client:
+        try:
+            for query in plan.queries:
+                assert query.coord is not None
+                for page in client.iter_brewery_pages(query):
+                    breweries = list(plan.merge_breweries([_parse_pages([page])]))
+                    nearby = within_radius(breweries, query.coord, radius_km)
+                    found.update((b.id, (d, b)) for d, b in nearby)
+                    located = sum(b.address.coordinate is not None for b in breweries)
+                    if len(nearby) < located:
+                        break
+        except HTTPError as exc:
+            click.echo(f"HTTP Exception: {exc}", err=True)
+            return None
+    return sorted(found.values(), key=lambda pair: pair[0])
+
+
+def _local_radius_search(
+    plan: QueryPlan, radius_km: float
+) -> list[tuple[float, Brewery]]:
+    """Mirror breweries within `radius_km` of `plan`, prefiltered in SQL."""
+    center = plan.queries[0].coord
+    assert center is not None
+    bbox = BoundingBox.around(center, radius_km)
+    with _synced_mirror() as store, _phase("parse"):
+        candidates = plan.merge_breweries(
+            store.iter_breweries(query, bbox=bbox) for query in plan.queries
+        )
+        return within_radius(candidates, center, radius_km)
+
+
+def _parse_pages(pages: Iterable[Iterable[dict]]) -> Iterator[Brewery]:
+    """Parses breweries page by page, reporting and skipping invalid ones."""
+    for page in pages:
+        with _phase("parse"):
+            breweries: list[Brewery] = []
+            for data in page:
+                try:
+                    breweries.append(Brewery.from_dict(data))
+                except (KeyError, TypeError) as exc:
+                    click.echo(f"Error parsing brewery: {exc}", err=True)
+        yield from breweries
+
+
+@cli.command()
+@_search_filters
+@click.option(
+    "--local",
+    is_flag=True,
+    help="Aggregate over the local mirror instead of the API.",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print the statistics as JSON.")
+@click.option(
+    "--top",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="Rows shown per group in the table.",
+)
+def stats(local: bool, as_json: bool, top: int, **filters: Any) -> None:
+    """
+    Count matching breweries by state, type and country.
+
+    Takes the same filters as `search` and streams through every matching
+    page (or the local mirror with --local) once, also reporting coordinate
+    coverage and how often each field is missing.
+    """
+    plan = _search_plan(filters, per_page=MAX_PER_PAGE)
+    if plan is None:
         return
 
-    breweries: list[Brewery] = []
-    for data in results:
+    result = BreweryStats()
+    if local:
+        with _synced_mirror() as store:
+            if not len(store):
+                click.echo("The mirror is empty; run 'brewcli mirror sync'.", err=True)
+            result.update(
+                plan.merge_breweries(store.iter_breweries(q) for q in plan.queries)
+            )
+    else:
+        with _api() as client:
+            try:
+                pages = (
+                    client.iter_brewery_pages(plan.queries[0])
+                    if plan.is_simple
+                    else run_plan(client, plan)
+                )
+                result.update(_parse_pages(pages))
+            except HTTPError as exc:
+                click.echo(f"HTTP error: {exc}", err=True)
+                return
+
+    _count_records(result.total)
+    with _phase("render"):
+        if as_json:
+            click.echo(result.to_json(indent=2))
+        else:
+            render_stats(result, top)
+
+
+@cli.command()
+@click.option(
+    "--threshold",
+    type=click.FloatRange(0, 1),
+    default=0.75,
+    show_default=True,
+    help="Minimum similarity score for two breweries to count as duplicates.",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print clusters as JSONL.")
+def dedupe(threshold: float, as_json: bool) -> None:
+    """
+    Find breweries listed more than once in the local mirror.
+
+    Breweries are grouped by postal code, map cell and name words, only
+    pairs within a group are compared, and linked pairs are merged into
+    clusters of likely duplicates.
+    """
+    dedupe_stats = DedupeStats()
+    start = perf_counter()
+    with _synced_mirror() as store, _phase("parse"):
+        breweries = list(store.iter_breweries())
+    if not breweries:
+        raise click.ClickException(
+            "No breweries in the mirror; run 'brewcli mirror sync' first."
+        )
+    _count_records(len(breweries))
+
+    with _phase("dedupe"):
+        clusters = find_duplicates(breweries, threshold, stats=dedupe_stats)
+
+    with _phase("render"):
+        if as_json:
+            for cluster in clusters:
+                click.echo(json.dumps(cluster.to_dict()))
+        elif clusters:
+            render_duplicates(clusters)
+    click.echo(
+        f"{len(clusters)} duplicate clusters among {dedupe_stats.breweries} "
+        f"breweries ({dedupe_stats.comparisons:,} comparisons in "
+        f"{dedupe_stats.blocks:,} blocks, {perf_counter() - start:.1f}s).",
+        err=True,
+    )
+
+
+def _file_format(name: str, fmt: str | None) -> str:
+    """
+    The explicit `fmt`, else "csv" for a .csv file name (optionally with a
+    compression suffix), else "jsonl".
+    """
+    if fmt is not None:
+        return fmt
+    name = name.lower()
+    for suffix in SUFFIXES:
+        name = name.removesuffix(suffix)
+    return "csv" if name.endswith(".csv") else "jsonl"
+
+
+def _codec(name: str, param_hint: str) -> Codec:
+    """The codec called `name`, reporting a missing optional dependency."""
+    try:
+        return get_codec(name)
+    except ValueError as exc:
+        raise click.BadParameter(str(exc), param_hint=param_hint) from exc
+
+
+def _compress_option(command: Callable) -> Callable:
+    """Adds a `--compress` option for a command's output file."""
+    return click.option(
+        "--compress",
+        type=click.Choice(CODEC_NAMES),
+        help="Compress the output. Defaults to the codec of the output file's "
+        "suffix (.gz, .xz or .zst), else none.",
+    )(command)
+
+
+def _text_output(
+    output: BinaryIO, compress: str | None
+) -> AbstractContextManager[TextIO]:
+    """`output` as text, compressed with `compress` or as its suffix says."""
+    if compress:
+        codec = _codec(compress, "--compress")
+    else:
+        codec = codec_for_path(getattr(output, "name", ""))
+    return open_text(output, codec)
+
+
+def _text_input(file: BinaryIO) -> AbstractContextManager[TextIO]:
+    """`file` as text, decompressed with whichever codec wrote it."""
+    try:
+        codec, buffered = sniff(file)
+    except ValueError as exc:
+        raise click.ClickException(str(exc)) from exc
+    return open_text(buffered, codec, "r")
+
+
+def _record_writer(output: TextIO, fmt: str) -> Callable[[dict], Any]:
+    """A function writing one record to `output` as a CSV row or JSONL line."""
+    if fmt == "csv":
+        writer = csv.DictWriter(output, fieldnames=OUTPUT_FIELDS)
+        writer.writeheader()
+        return writer.writerow
+    return lambda record: output.write(json.dumps(record) + "\n")
+
+
+@cli.command()
+@click.argument("points", type=click.File("rb"))
+@click.option(
+    "-k",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="Number of nearest breweries per point.",
+)
+@click.option(
+    "-o",
+    "--output",
+    type=click.File("wb"),
+    default="-",
+    help="File to write assignments to. Defaults to stdout.",
+)
+@click.option(
+    "--input-format",
+    type=click.Choice(FORMATS),
+    help="Format of POINTS. Defaults to csv for *.csv files, else jsonl.",
+)
+@click.option(
+    "--output-format",
+    type=click.Choice(FORMATS),
+    help="Format of the output. Defaults to csv for *.csv files, else jsonl.",
+)
+@_compress_option
+@click.option(
+    "--by-type",
+    type=click.Choice(BREWERY_TYPES, case_sensitive=False),
+    shell_complete=_complete("type"),
+)
+def nearest(points: BinaryIO, k: int, output: BinaryIO, **options: Any) -> None:
+    """
+    Find the K nearest breweries to every point in a file.
+
+    POINTS is CSV with a header row or JSONL. Each point has a "coord" as
+    'lat,lon' (or "latitude" and "longitude") and an optional "id". The
+    breweries come from the local mirror and are indexed once in a k-d tree,
+    so thousands of points are answered in a single pass. Each assignment is
+    written as a row with its rank and distance in km.
+
+    Compressed POINTS files are read transparently, and the output is
+    compressed per --compress or its file name suffix.
+    """
+    with _synced_mirror() as store, _phase("parse"):
+        breweries = list(store.iter_breweries(SearchQuery(type=options["by_type"])))
+    if not breweries:
+        raise click.ClickException(
+            "No breweries in the mirror; run 'brewcli mirror sync' first."
+        )
+    _count_records(len(breweries))
+
+    input_format = _file_format(getattr(points, "name", ""), options["input_format"])
+    output_format = _file_format(getattr(output, "name", ""), options["output_format"])
+
+    def report(line: int, exc: Exception) -> None:
+        click.echo(f"Skipping point on line {line}: {exc}", err=True)
+
+    count = 0
+    with (
+        _text_input(points) as lines,
+        _text_output(output, options["compress"]) as out,
+        _phase("nearest"),
+    ):
+        write = _record_writer(out, output_format)
+        for record in assign_nearest(
+            read_points(lines, input_format, on_error=report), breweries, k
+        ):
+            write(record)
+            count += record["rank"] == 1
+    click.echo(f"{count} points assigned.", err=True)
+
+
+@cli.command()
+@_search_filters
+@click.option(
+    "--interval",
+    type=click.FloatRange(min=0),
+    default=300,
+    show_default=True,
+    help="Seconds between polls.",
+)
+@click.option(
+    "--count",
+    type=click.IntRange(min=1),
+    help="Stop after this many polls, including the first. Default: never.",
+)
+@click.option("--json", "as_json", is_flag=True, help="Print changes as JSONL.")
+def watch(interval: float, count: int | None, as_json: bool, **filters: Any) -> None:
+    """
+    Poll a search and print what changed since the last poll.
+
+    Reports added and removed breweries and changed fields, calling out
+    breweries that became closed. Pages are requested with the ETag they
+    were last served with and unchanged pages are not parsed again, so
+    polling while nothing changes is cheap. Stop with Ctrl+C.
+    """
+    plan = _search_plan(filters)
+    if plan is None:
+        return
+    if not plan.is_simple:
+        raise click.UsageError("watch takes a single value per filter.")
+
+    polls = 0
+    with _api() as client:
+        watcher = Watcher(client, plan.queries[0])
         try:
-            breweries.append(Brewery.from_dict(data))
-        except (KeyError, TypeError) as exc:
-            click.echo(f"Error parsing brewery: {exc}", err=True)
-            continue
+            while True:
+                try:
+                    delta = watcher.poll()
+                except (HTTPError, ValueError) as exc:
+                    click.echo(f"HTTP error: {exc}", err=True)
+                else:
+                    if polls == 0:
+                        click.echo(
+                            f"Watching {delta.total} breweries "
+                            f"({delta.requests} requests per poll).",
+                            err=True,
+                        )
+                    _print_watch_delta(delta, as_json)
+                polls += 1
+                if count is not None and polls >= count:
+                    break
+                sleep(interval)
+        except KeyboardInterrupt:
+            click.echo("Stopped.", err=True)
 
-    if breweries:
-        render_breweries(breweries)
+
+def _print_watch_delta(delta: WatchDelta, as_json: bool) -> None:
+    """Prints the changes of one poll, as JSONL or one line per change."""
+    if as_json:
+        for event in delta.events():
+            click.echo(json.dumps(event))
+        return
+
+    stamp = datetime.now().strftime("%H:%M:%S")
+    for sign, records in (("+", delta.added), ("-", delta.removed)):
+        for record in records:
+            place = ", ".join(filter(None, (record["city"], record["state"])))
+            click.echo(f"[{stamp}] {sign} {record['name']} ({place}) [{record['id']}]")
+    for change in delta.changed:
+        if change.closed:
+            click.echo(f"[{stamp}] ! {change.name} is now closed [{change.id}]")
+        for name, (old, new) in change.fields.items():
+            click.echo(f"[{stamp}] ~ {change.name}: {name} {old!r} -> {new!r}")
+
+
+@cli.command()
+@click.argument("sample", type=click.File("rb"), required=False)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=3,
+    show_default=True,
+    help="Timing runs per codec; the best is reported.",
+)
+def codecs(sample: BinaryIO | None, repeat: int) -> None:
+    """
+    Compare compression codecs on a sample.
+
+    Reports each codec's compressed size, ratio, and compress and decode
+    times, to help choose --cache-codec and --compress. SAMPLE (read
+    decompressed) defaults to the mirror as JSONL.
+    """
+    if sample is not None:
+        with _text_input(sample) as text:
+            payload = text.read().encode()
+    else:
+        with _synced_mirror() as store:
+            payload = "".join(
+                json.dumps(brewery.to_flat_dict()) + "\n"
+                for brewery in store.iter_breweries()
+            ).encode()
+    if not payload:
+        raise click.ClickException(
+            "The sample is empty; pass a file or run 'brewcli mirror sync' first."
+        )
+
+    reports = compare_codecs(payload, repeat=repeat)
+    render_codecs(reports)
+    if "zstd" not in {report.codec for report in reports}:
+        click.echo("zstd is not installed: pip install 'brewcli[zstd]'.", err=True)
+
+
+@cli.command()
+@click.argument("queries", type=click.File("rb"))
+@click.option(
+    "-o",
+    "--output",
+    type=click.File("wb"),
+    default="-",
+    help="JSONL file to write one result per query to. Defaults to stdout.",
+)
+@_compress_option
+@click.option(
+    "-c",
+    "--concurrency",
+    type=click.IntRange(min=1, max=64),
+    default=8,
+    show_default=True,
+    help="Maximum number of queries in flight at once.",
+)
+def batch(
+    queries: BinaryIO, output: BinaryIO, compress: str | None, concurrency: int
+) -> None:
+    """
+    Run many queries from a JSONL file concurrently.
+
+    Each line of QUERIES is a JSON object with a "kind" of "search" (fields
+    named like SearchQuery: city, state, type, coord, ids, ...), "by_id"
+    (with "brewery_id") or "random" (with "number"). Results are written as
+    JSONL in input order with per-query status and timing, compressed per
+    --compress or the output file name suffix. Compressed QUERIES files are
+    read transparently.
+    """
+    limits = Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    ok = failed = 0
+    with (
+        BreweryAPI(**_client_options(), limits=limits) as client,
+        _text_input(queries) as lines,
+        _text_output(output, compress) as out,
+    ):
+        for result in run_batch(client, lines, concurrency=concurrency):
+            out.write(json.dumps(result.to_dict()) + "\n")
+            if result.status == "ok":
+                ok += 1
+                _count_records(len(result.results))
+            else:
+                failed += 1
+
+    click.echo(f"{ok + failed} queries: {ok} ok, {failed} failed", err=True)
+
+
+@cli.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    type=click.Path(dir_okay=False),
+    default=default_socket_path,
+    show_default="$BREWCLI_SOCKET or a per-user runtime path",
+    help="Unix socket to listen on.",
+)
+def serve(socket_path: str) -> None:
+    """
+    Run a warm daemon that other brewcli invocations forward to.
+
+    The daemon keeps one connection pool open. While it is running, regular
+    brewcli commands are sent to it over a Unix socket instead of starting a
+    fresh client; when it is not, they run in-process as usual. Set
+    BREWCLI_NO_DAEMON to always run in-process.
+    """
+    click.echo(f"Listening on {socket_path} (Ctrl+C to stop)", err=True)
+    try:
+        serve_daemon(socket_path)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc)) from exc
+    except KeyboardInterrupt:
+        click.echo("Stopped.", err=True)
+
+
+@cli.group("cache")
+def cache_group() -> None:
+    """Inspect the response and result caches used with --cache."""
+
+
+@cache_group.command("stats")
+@click.option("--json", "as_json", is_flag=True, help="Print the statistics as JSON.")
+@click.option("--reset", is_flag=True, help="Zero the counts after showing them.")
+def cache_stats(as_json: bool, reset: bool) -> None:
+    """
+    Show cache hit rates and the size of the on-disk cache.
+
+    Lookups are counted for every run with --cache, and in the daemon, per
+    layer: "responses" are decoded API responses, keyed by URL or, for
+    searches, by canonical query; "results" are parsed search results, kept
+    in memory by the daemon only.
+    """
+    stats = load_stats()
+    entries, size = DiskCache().usage()
+    if as_json:
+        layers = {
+            layer: {**counts.to_dict(), "hit_rate": counts.hit_rate}
+            for layer, counts in stats.items()
+        }
+        click.echo(json.dumps({"layers": layers, "entries": entries, "bytes": size}))
+    else:
+        render_cache_stats(stats, entries, size)
+    if reset:
+        default_stats_path().unlink(missing_ok=True)
+
+
+@cli.group()
+def mirror() -> None:
+    """
+    Manage the local SQLite mirror of the full dataset.
+
+    The mirror lives at $BREWCLI_MIRROR, defaulting to mirror.sqlite3 in the
+    cache directory.
+    """
+
+
+@mirror.command("sync")
+def mirror_sync() -> None:
+    """
+    Download the full dataset and write only what changed.
+
+    Each brewery's flattened record is hashed and compared with the stored
+    hash; inserted, updated and deleted rows are applied in one transaction.
+    If any brewery cannot be parsed, nothing is deleted, since the mirror's
+    copy of it would be.
+    """
+    skipped = 0
+
+    def parsed(pages: Iterable[list[dict]]) -> Iterator[Brewery]:
+        nonlocal skipped
+        for page in pages:
+            for data in page:
+                try:
+                    yield Brewery.from_dict(data)
+                except (KeyError, TypeError) as exc:
+                    skipped += 1
+                    click.echo(f"Error parsing brewery: {exc}", err=True)
+
+    with _api() as client, Mirror() as store:
+        try:
+            delta = store.sync(
+                parsed(client.iter_brewery_pages()), complete=lambda: not skipped
+            )
+        except HTTPError as exc:
+            click.echo(f"HTTP error: {exc}", err=True)
+            return
+        total = len(store)
+
+    _count_records(total)
+    click.echo(f"Mirror synced: {delta.summary()}; {total} breweries.")
+    if skipped:
+        click.echo(
+            f"Skipped {skipped} unparseable breweries; "
+            "kept breweries missing from the download.",
+            err=True,
+        )
+
+
+@mirror.command("import")
+@click.argument("dump", type=click.File("rb"))
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    help="Parser processes. Defaults to the number of CPUs.",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=CHUNK_SIZE,
+    show_default=True,
+    help="Records handed to a worker at a time.",
+)
+@click.option(
+    "--prune",
+    is_flag=True,
+    help="The dump is the whole dataset: delete breweries missing from it, "
+    "unless some records were invalid.",
+)
+def mirror_import(
+    dump: BinaryIO, workers: int | None, chunk_size: int, prune: bool
+) -> None:
+    """
+    Load a JSON or JSONL dump of breweries into the mirror.
+
+    The dump is split into chunks that are parsed and validated on a
+    process pool; only changed rows are written, in large transactions.
+    Invalid records are reported and skipped. Use - to read standard input;
+    gzip, xz and zstd compressed dumps are read transparently.
+    """
+    interactive = sys.stderr.isatty()
+
+    def progress(report: ImportReport) -> None:
+        if interactive:
+            click.echo(
+                f"\r{report.records:,} records, {report.rate:,.0f}/s",
+                nl=False,
+                err=True,
+            )
+
+    with Mirror() as store, _text_input(dump) as text:
+        report = import_dump(
+            text,
+            store,
+            workers=workers,
+            chunk_size=chunk_size,
+            complete=prune,
+            on_progress=progress,
+        )
+        total = len(store)
+    if interactive:
+        click.echo(err=True)
+
+    for error in report.errors[:10]:
+        click.echo(error, err=True)
+    if len(report.errors) > 10:
+        click.echo(f"... and {len(report.errors) - 10} more errors.", err=True)
+    if prune and report.errors:
+        click.echo("Not pruning: the dump had invalid records.", err=True)
+    _count_records(report.records - len(report.errors))
+    click.echo(
+        f"Imported {report.records:,} records ({len(report.errors)} invalid) in "
+        f"{report.seconds:.1f}s, {report.rate:,.0f} records/s: "
+        f"{report.delta.summary()}; {total} breweries."
+    )
+
+
+@mirror.command("info")
+def mirror_info() -> None:
+    """Show where the mirror is, its size and when it was last synced."""
+    mirror = Mirror()
+    if not mirror.path.exists():
+        click.echo(f"Path:        {mirror.path}")
+        click.echo("Breweries:   0")
+        click.echo("Last synced: never")
+        return
+    with mirror as store:
+        synced = store.last_synced
+        click.echo(f"Path:        {store.path}")
+        click.echo(f"Breweries:   {len(store)}")
+        click.echo(
+            "Last synced: "
+            + (
+                datetime.fromtimestamp(synced).isoformat(timespec="seconds")
+                if synced
+                else "never"
+            )
+        )
+
+
+@mirror.command("snapshot")
+@click.option(
+    "-o",
+    "--output",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Snapshot file; defaults to snapshot.bin next to the mirror.",
+)
+def mirror_snapshot(output: str | None) -> None:
+    """
+    Write the mirror to a compact memory-mapped snapshot.
+
+    The snapshot is opened without parsing, so `by-id --offline` lookups start
+    instantly whatever the dataset size.
+    """
+    path = output or default_snapshot_path()
+    with _synced_mirror() as store:
+        count = write_snapshot(store.iter_breweries(), path)
+    click.echo(f"Wrote {count} breweries to {path}.")
 
 
 cli.add_command(random)
 cli.add_command(by_id)
 cli.add_command(search)
+cli.add_command(stats)
+cli.add_command(nearest)
+cli.add_command(dedupe)
+cli.add_command(watch)
+cli.add_command(codecs)
+cli.add_command(cache_group)
+cli.add_command(batch)
+cli.add_command(serve)
+cli.add_command(mirror)
@@ -0,0 +1,320 @@
+"""
+A persisted prefix index over the mirror's cities, states, countries and
+types, answering shell completion without touching the API.
+
+The index is a prefix trie flattened into one sorted array per field: the
+values below a trie node are a contiguous run of the array, found with two
+binary searches. Flat arrays load from JSON in a few milliseconds, where a
+pointer-based trie would have to be rebuilt node by node on every
+completion, and completion runs in a fresh process each time.
+
+`complete_from_env` answers click's completion protocol for those options
+directly, so the entry point can reply without importing the CLI and its
+dependencies.
+"""
+
+import heapq
+import json
+import os
+import shlex
+import sqlite3
+import threading
+from bisect import bisect_left
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .paths import default_mirror_path
+
+if TYPE_CHECKING:
+    from .mirror import Mirror
+
+# Completable fields and the mirror column each is read from.
+FIELDS = {
+    "city": "city",
+    "state": "state",
+    "country": "country",
+    "type": "brewery_type",
+}
+# Options whose values are completed from the index, and their field.
+OPTIONS = {
+    "--by-city": "city",
+    "--by-country": "country",
+    "--by-state": "state",
+    "--by-type": "type",
+}
+# Environment variable click sets to request shell completion.
+COMPLETE_ENV = "_BREWCLI_COMPLETE"
+# Most suggestions returned for one prefix.
+MAX_SUGGESTIONS = 50
+VERSION = 1
+
+
+def default_index_path() -> Path:
+    """`completions.json` next to the mirror database."""
+    return default_mirror_path().with_name("completions.json")
+
+
+class PrefixIndex:
+    """
+    Completion candidates for each of `FIELDS`, ranked by brewery count.
+
+    Matching is a case-insensitive prefix match. Values that differ only in
+    case are merged under their most common spelling.
+
+    Example:
+        >>> index = PrefixIndex({"city": {"Denver": 72, "Dayton": 14}})
+        >>> index.complete("city", "d")
+        [('Denver', 72), ('Dayton', 14)]
+    """
+
+    def __init__(self, counts: dict[str, dict[str, int]], source_mtime_ns: int = 0):
+        """
+        Args:
+            counts (dict[str, dict[str, int]]): Brewery count per value, by
+                field.
+            source_mtime_ns (int): Modification time of the mirror the counts
+                were read from, used to tell when the index is stale.
+        """
+        self.source_mtime_ns = source_mtime_ns
+        self._keys: dict[str, list[str]] = {}
+        self._entries: dict[str, list[tuple[str, int]]] = {}
+        for field, values in counts.items():
+            merged: dict[str, tuple[str, int]] = {}
+            for value, count in sorted(values.items(), key=lambda item: -item[1]):
+                if "\n" in value:
+                    continue
+                key = value.casefold()
+                spelling, total = merged.get(key, (value, 0))
+                merged[key] = (spelling, total + count)
+            keys = sorted(merged)
+            self._keys[field] = keys
+            self._entries[field] = [merged[key] for key in keys]
+
+    @classmethod
+    def from_mirror(cls, mirror: "Mirror", source_mtime_ns: int = 0) -> "PrefixIndex":
+        """
+        Builds the index from the values in an open mirror. Every brewery
+        type is included, with a count of 0 if no brewery has it.
+        """
+        from .models import BREWERY_TYPES  # noqa: PLC0415
+
+        counts = {
+            field: mirror.value_counts(column) for field, column in FIELDS.items()
+        }
+        counts["type"] = {t: counts["type"].get(t, 0) for t in BREWERY_TYPES}
+        return cls(counts, source_mtime_ns)
+
+    def complete(
+        self, field: str, prefix: str, limit: int = MAX_SUGGESTIONS
+    ) -> list[tuple[str, int]]:
+        """
+        The values of `field` starting with `prefix`, most breweries first.
+
+        Args:
+            field (str): One of `FIELDS`.
+            prefix (str): What has been typed so far, in any case.
+            limit (int): Most values to return.
+
+        Returns:
+            list[tuple[str, int]]: Each value and its brewery count; ties are
+                in alphabetical order.
+        """
+        keys = self._keys.get(field, [])
+        key = prefix.casefold()
+        start = bisect_left(keys, key)
+        # Every key with the prefix sorts before the prefix followed by the
+        # highest code point.
+        end = bisect_left(keys, key + "\U0010ffff", lo=start)
+        run = range(start, end)
+        entries = self._entries[field] if run else []
+        if len(run) <= limit:
+            ranked = sorted(run, key=lambda i: -entries[i][1])
+        else:
+            ranked = heapq.nsmallest(limit, run, key=lambda i: (-entries[i][1], i))
+        return [entries[i] for i in ranked]
+
+    def save(self, path: Path | str) -> None:
+        """Writes the index to `path`, replacing it atomically."""
+        document = {
+            "version": VERSION,
+            "source_mtime_ns": self.source_mtime_ns,
+            # One newline-joined string per field decodes far faster than a
+            # list of strings.
+            "fields": {
+                field: {
+                    "values": "\n".join(value for value, _ in entries),
+                    "counts": [count for _, count in entries],
+                }
+                for field, entries in self._entries.items()
+            },
+        }
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(document, separators=(",", ":")))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path | str) -> "PrefixIndex":
+        """
+        Reads an index written by `save`.
+
+        Raises:
+            OSError: If the file cannot be read.
+            ValueError: If it is not an index of this version.
+        """
+        document = json.loads(Path(path).read_text())
+        if not isinstance(document, dict) or document.get("version") != VERSION:
+            raise ValueError(f"{path} is not a brewcli completion index.")
+        index = cls({}, document["source_mtime_ns"])
+        for field, saved in document["fields"].items():
+            # Saved values are already merged and in key order.
+            joined, counts = saved["values"], saved["counts"]
+            values = joined.split("\n") if counts else []
+            if len(values) != len(counts):
+                raise ValueError(f"{path} is not a brewcli completion index.")
+            index._entries[field] = list(zip(values, counts, strict=True))
+            index._keys[field] = joined.casefold().split("\n") if counts else []
+        return index
+
+
+def build_index(
+    mirror_path: Path | str | None = None, path: Path | str | None = None
+) -> PrefixIndex:
+    """
+    Builds the index from the mirror and saves it.
+
+    Args:
+        mirror_path (Path | str | None): Defaults to `default_mirror_path()`.
+        path (Path | str | None): Defaults to `default_index_path()`.
+
+    Raises:
+        OSError, sqlite3.Error: If the mirror cannot be read or the index
+            cannot be written.
+    """
+    # Imported here so that loading a saved index stays cheap.
+    from .mirror import Mirror  # noqa: PLC0415
+
+    mirror_path = Path(mirror_path) if mirror_path else default_mirror_path()
+    with Mirror(mirror_path) as mirror:
+        # Taken before reading, so a write during the build leaves it stale.
+        mtime_ns = mirror_path.stat().st_mtime_ns
+        index = PrefixIndex.from_mirror(mirror, mtime_ns)
+    index.save(path or default_index_path())
+    return index
+
+
+def load_index(
+    mirror_path: Path | str | None = None, path: Path | str | None = None
+) -> PrefixIndex | None:
+    """
+    The saved index, rebuilt first if the mirror changed since it was saved.
+
+    Meant for shell completion, so it never raises: without a mirror, or if
+    the mirror cannot be read, there is nothing to complete from.
+
+    Args:
+        mirror_path (Path | str | None): Defaults to `default_mirror_path()`.
+        path (Path | str | None): Defaults to `default_index_path()`.
+
+    Returns:
+        PrefixIndex | None: The index, or `None` without a readable mirror.
+    """
+    mirror_path = Path(mirror_path) if mirror_path else default_mirror_path()
+    try:
+        mtime_ns = mirror_path.stat().st_mtime_ns
+    except OSError:
+        return None
+    try:
+        index = PrefixIndex.load(path or default_index_path())
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    else:
+        if index.source_mtime_ns == mtime_ns:
+            return index
+    try:
+        return build_index(mirror_path, path)
+    except (OSError, sqlite3.Error):
+        return None
+
+
+def suggestions(field: str, incomplete: str) -> list[tuple[str, str]]:
+    """
+    Completion values for `field` starting with `incomplete`, with their
+    help text; none without a mirror.
+    """
+    index = load_index()
+    if index is None:
+        return []
+    return [
+        (value, f"{count} breweries")
+        for value, count in index.complete(field, incomplete)
+    ]
+
+
+def _split_words(string: str) -> list[str]:
+    """Splits a command line like click does, keeping an unclosed last word."""
+    lexer = shlex.shlex(string, posix=True)
+    lexer.whitespace_split = True
+    lexer.commenters = ""
+    words: list[str] = []
+    try:
+        words.extend(lexer)
+    except ValueError:
+        # An unclosed quote: keep what was typed of the last word.
+        words.append(lexer.token)
+    return words
+
+
+def _completion_args(shell: str) -> tuple[list[str], str]:
+    """The complete words and the incomplete one, as click reads them."""
+    words = _split_words(os.environ.get("COMP_WORDS", ""))
+    if shell == "fish":
+        incomplete = os.environ.get("COMP_CWORD", "")
+        incomplete = _split_words(incomplete)[0] if incomplete else ""
+        args = words[1:]
+        if incomplete and args and args[-1] == incomplete:
+            args.pop()
+        return args, incomplete
+    cword = int(os.environ.get("COMP_CWORD", ""))
+    args = words[1:cword]
+    return args, words[cword] if cword < len(words) else ""
+
+
+def _format(shell: str, value: str, help_text: str) -> str:
+    """One completion in the format of click's completion script for `shell`."""
+    if shell == "zsh":
+        return "plain\n{}\n{}".format(value.replace(":", r"\:"), help_text)
+    if shell == "fish":
+        return f"plain,{value}\t{help_text}"
+    return f"plain,{value}"
+
+
+def complete_from_env() -> str | None:
+    """
+    Answers a shell completion request for a value of one of `OPTIONS`,
+    as click would.
+
+    Returns:
+        str | None: The reply to print, or `None` if the request is for
+            anything else, or is malformed, and the CLI must answer it.
+    """
+    shell, _, action = os.environ.get(COMPLETE_ENV, "").partition("_")
+    if action != "complete" or shell not in ("bash", "zsh", "fish"):
+        return None
+    try:
+        args, incomplete = _completion_args(shell)
+    except ValueError:
+        return None
+    if incomplete.startswith("--") and "=" in incomplete:
+        option, _, incomplete = incomplete.partition("=")
+        args.append(option)
+    if not args or "--" in args or incomplete.startswith("-"):
+        return None
+    field = OPTIONS.get(args[-1])
+    if field is None:
+        return None
+    return "\n".join(
+        _format(shell, value, help_text)
+        for value, help_text in suggestions(field, incomplete)
+    )
@@ -0,0 +1,263 @@
+"""Compression codecs for cached responses and exports, and their trade-offs."""
+
+import gzip
+import io
+import lzma
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from importlib import import_module
+from importlib.util import find_spec
+from time import perf_counter
+from typing import IO, Any, TextIO
+
+
+@dataclass(frozen=True)
+class Codec:
+    """
+    A compression format.
+
+    Attributes:
+        name (str): The name used on the command line.
+        suffix (str): File name suffix, e.g. ".gz"; empty for "none".
+        magic (bytes): The bytes every compressed stream starts with.
+        compress (Callable[[bytes], bytes]): One-shot compression.
+        decompress (Callable[[bytes], bytes]): One-shot decompression.
+        open (Callable): Wraps a binary file for streaming reads ("rb") or
+            writes ("wb").
+    """
+
+    name: str
+    suffix: str
+    magic: bytes
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+    open: Callable[[IO[bytes], str], io.BufferedIOBase | IO[bytes]]
+
+
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# Codec names by file name suffix.
+SUFFIXES = {".gz": "gzip", ".xz": "lzma", ".zst": "zstd"}
+
+
+def _identity(data: bytes) -> bytes:
+    return data
+
+
+def _zstd() -> Codec:
+    """The zstd codec, from the `zstandard` package (installed with the zstd extra)."""
+    try:
+        zstandard: Any = import_module("zstandard")
+    except ImportError as exc:
+        raise ValueError(
+            "The zstd codec needs the zstandard package: pip install 'brewcli[zstd]'."
+        ) from exc
+
+    def open_zstd(file: IO[bytes], mode: str) -> io.BufferedIOBase:
+        if mode == "rb":
+            return zstandard.ZstdDecompressor().stream_reader(file, closefd=False)
+        return zstandard.ZstdCompressor().stream_writer(file, closefd=False)
+
+    return Codec(
+        "zstd",
+        ".zst",
+        ZSTD_MAGIC,
+        zstandard.ZstdCompressor().compress,
+        # decompressobj handles frames written without a content size.
+        lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+        open_zstd,
+    )
+
+
+NONE = Codec("none", "", b"", _identity, _identity, lambda file, _: file)
+GZIP = Codec(
+    "gzip",
+    ".gz",
+    b"\x1f\x8b",
+    # mtime=0 keeps the output reproducible.
+    lambda data: gzip.compress(data, mtime=0),
+    gzip.decompress,
+    lambda file, mode: gzip.GzipFile(fileobj=file, mode=mode, mtime=0),
+)
+LZMA = Codec(
+    "lzma",
+    ".xz",
+    b"\xfd7zXZ\x00",
+    lzma.compress,
+    lzma.decompress,
+    lambda file, mode: lzma.LZMAFile(file, mode=mode),  # noqa: SIM115
+)
+_BUILTIN = {codec.name: codec for codec in (NONE, GZIP, LZMA)}
+
+# Every codec name, whether or not its optional dependency is installed.
+CODEC_NAMES = (*_BUILTIN, "zstd")
+
+
+def get_codec(name: str) -> Codec:
+    """
+    Looks up a codec by name.
+
+    Raises:
+        ValueError: If the name is unknown, or its package is not installed.
+    """
+    if name == "zstd":
+        return _zstd()
+    if name not in _BUILTIN:
+        raise ValueError(
+            f"Unknown codec {name!r}. Must be one of {', '.join(CODEC_NAMES)}."
+        )
+    return _BUILTIN[name]
+
+
+def available_codecs() -> list[Codec]:
+    """The codecs usable in this environment."""
+    codecs = list(_BUILTIN.values())
+    if find_spec("zstandard") is not None:
+        codecs.append(_zstd())
+    return codecs
+
+
+def detect(data: bytes) -> Codec:
+    """
+    The codec `data` was compressed with, from its leading magic bytes;
+    `NONE` for anything else.
+
+    Raises:
+        ValueError: For zstd data when zstandard is not installed.
+    """
+    for codec in (GZIP, LZMA):
+        if data.startswith(codec.magic):
+            return codec
+    if data.startswith(ZSTD_MAGIC):
+        return _zstd()
+    return NONE
+
+
+def decompress(data: bytes) -> bytes:
+    """`data` decompressed with whichever codec wrote it, or as is."""
+    return detect(data).decompress(data)
+
+
+def codec_for_path(path: str) -> Codec:
+    """The codec matching a file name's suffix, `NONE` if there is none."""
+    for suffix, name in SUFFIXES.items():
+        if path.endswith(suffix):
+            return get_codec(name)
+    return NONE
+
+
+@contextmanager
+def open_text(file: IO[bytes], codec: Codec, mode: str = "w") -> Iterator[TextIO]:
+    """
+    A UTF-8 text stream over a binary file, compressed with `codec`.
+
+    On exit the compressed stream is finished, but `file` is left open.
+
+    Args:
+        file (IO[bytes]): The underlying binary file.
+        codec (Codec): The compression to apply, or to undo when reading.
+        mode (str): "r" or "w".
+    """
+    binary: Any = codec.open(file, mode + "b")
+    text = io.TextIOWrapper(
+        binary, encoding="utf-8", newline="" if mode == "w" else None
+    )
+    try:
+        yield text
+    finally:
+        if mode == "w":
+            text.flush()
+        text.detach()
+        if binary is not file:
+            binary.close()
+
+
+def sniff(file: IO[bytes]) -> tuple[Codec, IO[bytes]]:
+    """
+    The codec of a binary stream, detected from its first bytes, and the
+    stream to read from, which still starts with those bytes.
+    """
+    buffered: Any = file if hasattr(file, "peek") else io.BufferedReader(file)  # type: ignore[arg-type]
+    size = len(LZMA.magic)
+    return detect(buffered.peek(size)[:size]), buffered
+
+
+@dataclass
+class CodecReport:
+    """
+    How one codec fares on a sample payload.
+
+    Attributes:
+        codec (str): The codec name.
+        size (int): Uncompressed bytes.
+        compressed (int): Compressed bytes.
+        compress_seconds (float): Best time to compress the payload once.
+        decompress_seconds (float): Best time to decompress it once.
+    """
+
+    codec: str
+    size: int
+    compressed: int
+    compress_seconds: float
+    decompress_seconds: float
+
+    @property
+    def ratio(self) -> float:
+        """Uncompressed size over compressed size."""
+        return self.size / self.compressed if self.compressed else 0.0
+
+    @property
+    def decode_mb_per_second(self) -> float:
+        """Decompression throughput in uncompressed MB/s."""
+        if not self.decompress_seconds:
+            return 0.0
+        return self.size / 1e6 / self.decompress_seconds
+
+
+def compare_codecs(
+    payload: bytes, codecs: Iterable[Codec] | None = None, repeat: int = 3
+) -> list[CodecReport]:
+    """
+    Measures the ratio and the compress and decode cost of each codec on
+    `payload`, taking the best of `repeat` runs.
+
+    Args:
+        payload (bytes): Representative data, e.g. a JSONL export.
+        codecs (Iterable[Codec] | None): Defaults to `available_codecs()`.
+        repeat (int): Timing runs per codec.
+    """
+    reports = []
+    for codec in codecs if codecs is not None else available_codecs():
+        compress_times, decompress_times = [], []
+        compressed = b""
+        for _ in range(repeat):
+            start = perf_counter()
+            compressed = codec.compress(payload)
+            compress_times.append(perf_counter() - start)
+            start = perf_counter()
+            codec.decompress(compressed)
+            decompress_times.append(perf_counter() - start)
+        reports.append(
+            CodecReport(
+                codec.name,
+                len(payload),
+                len(compressed),
+                min(compress_times),
+                min(decompress_times),
+            )
+        )
+    return reports
+
+
+def accept_encoding() -> str:
+    """
+    The Accept-Encoding header value for the content codings httpx can
+    decode here: gzip and deflate always, plus br and zstd when their
+    optional packages are installed.
+    """
+    encodings = ["gzip", "deflate"]
+    if find_spec("brotli") is not None or find_spec("brotlicffi") is not None:
+        encodings.append("br")
+    if find_spec("zstandard") is not None:
+        encodings.append("zstd")
+    return ", ".join(encodings)
@@ -0,0 +1,387 @@
+"""
+Warm `brewcli serve` daemon and the thin client that forwards to it.
+
+Only the standard library is imported at module level so that forwarding a
+command to a running daemon skips importing click, httpx and rich.
+"""
+
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import threading
+from typing import Any
+
+SOCKET_ENV = "BREWCLI_SOCKET"
+# Set to any value to always run commands in-process.
+NO_DAEMON_ENV = "BREWCLI_NO_DAEMON"
+# Commands that must never be forwarded to the daemon: the daemon itself,
+# commands that run long or indefinitely, such as full-dataset scans (they
+# would hold the daemon's run lock and block every other client) and
+# commands writing binary output.
+LOCAL_COMMANDS = {
+    "serve",
+    "watch",
+    "batch",
+    "nearest",
+    "mirror",
+    "stats",
+    "dedupe",
+    "codecs",
+}
+# `random` counts above this need several requests and also run locally.
+LOCAL_RANDOM_ABOVE = 50
+# Options of the `brewcli` group that take a value, so the subcommand can be
+# found without importing click; kept in line with `cli.cli` by a test.
+GLOBAL_VALUE_OPTIONS = {"--cache-ttl", "--max-stale", "--cache-codec", "--fail-after"}
+# Seconds to wait for the daemon to accept a connection, and for its reply.
+CONNECT_TIMEOUT = 1.0
+REPLY_TIMEOUT = 120.0
+# Seconds a forwarded command waits for the daemon's run lock before the
+# daemon turns it away, to run in-process instead.
+LOCK_TIMEOUT = 2.0
+
+
+def command_args(argv: list[str]) -> list[str]:
+    """
+    The subcommand name and its arguments, found the way click does: after
+    the group's options and their values. Empty if there is no subcommand.
+    """
+    for index, arg in enumerate(argv):
+        if arg == "--":
+            return argv[index + 1 :]
+        if not arg.startswith("-"):
+            # A value of the previous option, not the subcommand.
+            if index and argv[index - 1] in GLOBAL_VALUE_OPTIONS:
+                continue
+            return argv[index:]
+    return []
+
+
+def runs_locally(argv: list[str]) -> bool:
+    """Whether the command line must run in-process rather than in the daemon."""
+    args = command_args(argv)
+    if not args:
+        return False
+    if args[0] in LOCAL_COMMANDS:
+        return True
+    if args[0] == "random":
+        count = next((arg for arg in args[1:] if not arg.startswith("-")), "")
+        return count.isdigit() and int(count) > LOCAL_RANDOM_ABOVE
+    return False
+
+
+def default_socket_path() -> str:
+    """
+    The daemon socket path: $BREWCLI_SOCKET, else a per-user runtime path.
+
+    Without $XDG_RUNTIME_DIR the socket goes in a private `brewcli-<uid>`
+    directory of the temporary directory rather than in it directly, which
+    any user can write to.
+    """
+    if path := os.environ.get(SOCKET_ENV):
+        return path
+    if runtime_dir := os.environ.get("XDG_RUNTIME_DIR"):
+        return os.path.join(runtime_dir, f"brewcli-{os.getuid()}.sock")
+    return os.path.join(_private_dir(), "daemon.sock")
+
+
+def _private_dir() -> str:
+    """The per-user directory for the socket when there is no runtime dir."""
+    return os.path.join(tempfile.gettempdir(), f"brewcli-{os.getuid()}")
+
+
+def _ensure_private_dir(directory: str) -> None:
+    """
+    Creates `directory` accessible only to the current user, or checks that
+    an existing one is.
+
+    Raises:
+        RuntimeError: If it is not a directory, belongs to another user or
+            is accessible to others.
+    """
+    with contextlib.suppress(FileExistsError):
+        os.mkdir(directory, 0o700)
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or info.st_mode & 0o077
+    ):
+        raise RuntimeError(
+            f"{directory} must be a directory only the current user can access."
+        )
+
+
+def _is_own_socket(path: str) -> bool:
+    """Whether `path` is a socket owned by the current user."""
+    try:
+        info = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(info.st_mode) and info.st_uid == os.getuid()
+
+
+def _is_listening(path: str) -> bool:
+    """Whether a daemon accepts connections on `path`, busy or not."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def forward(
+    argv: list[str],
+    path: str | None = None,
+    stdin: str | None = None,
+    timeout: float = REPLY_TIMEOUT,
+) -> dict[str, Any] | None:
+    """
+    Sends a command line to the daemon and returns its reply.
+
+    Args:
+        argv (list[str]): Arguments after the program name.
+        path (str | None): Socket path. Defaults to `default_socket_path()`.
+        stdin (str | None): Standard input for commands reading from "-".
+        timeout (float): Seconds to wait for the reply.
+
+    Returns:
+        dict | None: The daemon's "stdout", "stderr" and "exit_code", or `None`
+            so the command can run in-process instead: if no daemon is
+            listening, the socket belongs to another user, the daemon is too
+            busy to run it or does not answer within `timeout`. Forwarded
+            commands only read, so running one again is safe. If the daemon
+            hangs up without answering, an error reply is returned instead.
+    """
+    request = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "stdin": stdin,
+        "width": _terminal_width(),
+    }
+    path = path or default_socket_path()
+    if not _is_own_socket(path):
+        return None
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path)
+        except (FileNotFoundError, ConnectionRefusedError, TimeoutError):
+            return None
+        sock.settimeout(timeout)
+        try:
+            with sock.makefile("rwb") as stream:
+                stream.write(json.dumps(request).encode() + b"\n")
+                stream.flush()
+                reply = json.loads(stream.readline())
+            return None if reply.get("busy") else reply
+        except TimeoutError:
+            return None
+        except (OSError, ValueError, AttributeError):
+            return {
+                "stdout": "",
+                "stderr": "The brewcli daemon failed to answer; the command "
+                "may have partly run.\n",
+                "exit_code": 1,
+            }
+
+
+def _terminal_width() -> int | None:
+    try:
+        return os.get_terminal_size(sys.stdout.fileno()).columns
+    except (OSError, ValueError):
+        return None
+
+
+def main() -> None:
+    """
+    The `brewcli` entry point.
+
+    Forwards the command to a running daemon when there is one and falls back
+    to running it in-process otherwise. Completion of `--by-*` values is
+    answered from the prefix index before the CLI is imported.
+    """
+    if "_BREWCLI_COMPLETE" in os.environ:
+        from .completion import complete_from_env  # noqa: PLC0415
+
+        completions = complete_from_env()
+        if completions is not None:
+            sys.stdout.write(completions + "\n")
+            return
+
+    argv = sys.argv[1:]
+    forwardable = (
+        NO_DAEMON_ENV not in os.environ
+        # Shell completion must run in-process.
+        and "_BREWCLI_COMPLETE" not in os.environ
+        and not runs_locally(argv)
+    )
+    if forwardable:
+        stdin = sys.stdin.read() if "-" in argv else None
+        reply = forward(argv, stdin=stdin)
+        if reply is not None:
+            sys.stdout.write(reply["stdout"])
+            sys.stderr.write(reply["stderr"])
+            sys.exit(reply["exit_code"])
+        if stdin is not None:
+            sys.stdin = io.StringIO(stdin)
+
+    from .cli import cli  # noqa: PLC0415
+
+    cli(prog_name="brewcli")
+
+
+class DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Runs forwarded command lines against resident, warm state.
+
+    Commands redirect the process-wide stdout/stderr and working directory,
+    so they are executed one at a time; connections are accepted concurrently.
+    A command that cannot start within `LOCK_TIMEOUT` is turned away with a
+    "busy" reply, and the client runs it in-process instead.
+
+    Attributes:
+        state (dict): Passed to the click group as `ctx.obj`; holds the shared
+            `BreweryAPI` under "client".
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str, state: dict):
+        self.state = state
+        self.run_lock = threading.Lock()
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o600)
+
+    def run(self, request: dict) -> dict[str, Any]:
+        """
+        Executes one forwarded command and captures its output, or replies
+        "busy" if another command holds the run lock for too long.
+        """
+        from .cli import cli  # noqa: PLC0415
+        from .render import console, err_console  # noqa: PLC0415
+
+        argv = list(request.get("argv") or [])
+        if runs_locally(argv):
+            return {
+                "stdout": "",
+                "stderr": "This command cannot run in the daemon.\n",
+                "exit_code": 2,
+            }
+
+        # Text streams over bytes, so commands reading or writing binary
+        # streams find the `.buffer` they expect.
+        stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8", write_through=True)
+        stderr = io.StringIO()
+        if not self.run_lock.acquire(timeout=LOCK_TIMEOUT):
+            return {"busy": True}
+        cwd = os.getcwd()
+        stdin = sys.stdin
+        exit_code: Any = 0
+        try:
+            os.chdir(request.get("cwd") or cwd)
+            sys.stdin = io.TextIOWrapper(
+                io.BytesIO((request.get("stdin") or "").encode()),
+                encoding="utf-8",
+            )
+            console.width = err_console.width = request.get("width") or 80
+            with (
+                contextlib.redirect_stdout(stdout),
+                contextlib.redirect_stderr(stderr),
+            ):
+                cli.main(args=argv, prog_name="brewcli", obj=dict(self.state))
+        except SystemExit as exc:
+            exit_code = exc.code
+        except Exception as exc:  # reported to the client, like a crash
+            stderr.write(f"Error: {type(exc).__name__}: {exc}\n")
+            exit_code = 1
+        finally:
+            os.chdir(cwd)
+            sys.stdin = stdin
+            self.run_lock.release()
+
+        if not isinstance(exit_code, int):
+            if exit_code is not None:
+                stderr.write(f"{exit_code}\n")
+            exit_code = 0 if exit_code is None else 1
+        assert isinstance(stdout.buffer, io.BytesIO)
+        return {
+            "stdout": stdout.buffer.getvalue().decode("utf-8", "replace"),
+            "stderr": stderr.getvalue(),
+            "exit_code": exit_code,
+        }
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: DaemonServer
+
+    def handle(self) -> None:
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            reply = self.server.run(json.loads(line))
+        except Exception as exc:  # the client must get a reply, never silence
+            reply = {"stdout": "", "stderr": f"Error: {exc}\n", "exit_code": 1}
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+def serve(path: str | None = None) -> None:
+    """
+    Runs the daemon until interrupted, keeping one `BreweryAPI` warm.
+
+    The shared client answers repeated by-id and search requests from an
+    in-memory cache, serving stale entries while refreshing them, and its
+    circuit breaker stays open across requests while the API is failing.
+
+    Args:
+        path (str | None): Socket path. Defaults to `default_socket_path()`.
+
+    Raises:
+        RuntimeError: If another daemon is already listening on `path`, or
+            the socket or its private directory belongs to another user.
+    """
+    from .brewery import BreweryAPI  # noqa: PLC0415
+    from .cache import CachePolicy, MemoryCache, ResultCache  # noqa: PLC0415
+    from .resilience import CircuitBreaker  # noqa: PLC0415
+
+    path = path or default_socket_path()
+    if os.path.dirname(path) == _private_dir():
+        _ensure_private_dir(os.path.dirname(path))
+    if os.path.lexists(path):
+        if not _is_own_socket(path):
+            raise RuntimeError(f"{path} exists and is not a socket of this user.")
+        if _is_listening(path):
+            raise RuntimeError(f"A brewcli daemon is already listening on {path}.")
+        os.unlink(path)  # stale socket from a daemon that did not exit cleanly
+
+    policy = CachePolicy()
+    try:
+        with (
+            BreweryAPI(
+                cache=MemoryCache(max_age=policy.max_stale),
+                cache_policy=policy,
+                breaker=CircuitBreaker(),
+            ) as client,
+            DaemonServer(
+                path,
+                {
+                    "client": client,
+                    "cache_stats": client.cache_stats,
+                    "results": ResultCache(),
+                    "breaker": client.breaker,
+                },
+            ) as server,
+        ):
+            server.serve_forever()
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
@@ -0,0 +1,246 @@
+"""Near-duplicate brewery detection with blocking keys and union-find."""
+
+import re
+import unicodedata
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from itertools import combinations
+from urllib.parse import urlsplit
+
+from .geo import geohash, haversine_km
+from .models import Brewery
+
+# Words so common in brewery names that they say nothing about identity.
+NAME_STOPWORDS = frozenset(
+    {
+        "ale",
+        "ales",
+        "and",
+        "beer",
+        "beers",
+        "brew",
+        "brewery",
+        "breweries",
+        "brewing",
+        "co",
+        "company",
+        "inc",
+        "llc",
+        "of",
+        "pub",
+        "the",
+    }
+)
+# Blocks bigger than this are skipped: a key shared by that many breweries is
+# not selective, and comparing within it would be quadratic again.
+MAX_BLOCK_SIZE = 50
+# Geohash cells of about 1.2 km x 0.6 km.
+GEOHASH_PRECISION = 6
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize(text: str | None) -> str:
+    """Lowercases `text`, strips accents and punctuation and collapses spaces."""
+    if not text:
+        return ""
+    ascii_text = (
+        unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    )
+    return " ".join(_WORD.findall(ascii_text))
+
+
+def name_tokens(name: str) -> list[str]:
+    """The informative words of a brewery name, in order."""
+    return [word for word in normalize(name).split() if word not in NAME_STOPWORDS]
+
+
+@dataclass
+class _Profile:
+    """The normalized fields of one brewery that blocking and scoring use."""
+
+    brewery: Brewery
+    name: str
+    street: str
+    postal: str
+    phone: str
+    host: str
+    keys: list[str]
+
+    @classmethod
+    def of(cls, brewery: Brewery) -> "_Profile":
+        address = brewery.address
+        tokens = name_tokens(brewery.name)
+        postal = (address.postal_code or "").split("-")[0].strip()
+        host = urlsplit(brewery.website_url or "").hostname or ""
+        keys = [f"name:{token}" for token in set(tokens)]
+        if postal:
+            keys.append(f"postal:{normalize(address.country)}:{postal}")
+        if address.coordinate is not None:
+            cell = geohash(
+                address.coordinate.latitude,
+                address.coordinate.longitude,
+                GEOHASH_PRECISION,
+            )
+            keys.append(f"geo:{cell}")
+        return cls(
+            brewery=brewery,
+            name=" ".join(tokens) or normalize(brewery.name),
+            street=normalize(address.street or address.address_one),
+            postal=postal,
+            phone="".join(ch for ch in brewery.phone or "" if ch.isdigit()),
+            host=host.removeprefix("www."),
+            keys=keys,
+        )
+
+
+def similarity(a: Brewery, b: Brewery) -> float:
+    """
+    How likely two breweries are the same listing, from 0 to 1.
+
+    Half of the score is name similarity; the rest comes from location (same
+    street and postal code, or within 150 m) and contact details (same phone
+    or website host). Two branches of a chain with the same name and website
+    but different addresses stay below the default threshold.
+    """
+    return _score(_Profile.of(a), _Profile.of(b))
+
+
+def _score(a: _Profile, b: _Profile) -> float:
+    name = SequenceMatcher(None, a.name, b.name).ratio()
+
+    location = 0.0
+    first, second = a.brewery.address.coordinate, b.brewery.address.coordinate
+    distance = (
+        haversine_km(first.latitude, first.longitude, second.latitude, second.longitude)
+        if first is not None and second is not None
+        else None
+    )
+    if (a.street and a.street == b.street and a.postal == b.postal) or (
+        distance is not None and distance <= 0.15
+    ):
+        location = 1.0
+    elif (a.postal and a.postal == b.postal) or (
+        distance is not None and distance <= 1.0
+    ):
+        location = 0.5
+
+    contact = float(
+        bool(a.phone and a.phone == b.phone) or bool(a.host and a.host == b.host)
+    )
+    return 0.5 * name + 0.3 * location + 0.2 * contact
+
+
+@dataclass
+class DuplicateCluster:
+    """
+    Breweries that are likely the same listing.
+
+    Attributes:
+        breweries (list[Brewery]): The members, ordered by ID.
+        pairs (list[tuple[str, str, float]]): The scored pairs (two IDs and
+            a score) that linked the cluster together.
+    """
+
+    breweries: list[Brewery]
+    pairs: list[tuple[str, str, float]] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        """The cluster as JSON-serialisable data."""
+        return {
+            "ids": [brewery.id for brewery in self.breweries],
+            "names": [brewery.name for brewery in self.breweries],
+            "pairs": [
+                {"a": a, "b": b, "score": round(score, 3)} for a, b, score in self.pairs
+            ],
+        }
+
+
+@dataclass
+class DedupeStats:
+    """Work done by `find_duplicates`, for reporting."""
+
+    breweries: int = 0
+    blocks: int = 0
+    skipped_blocks: int = 0
+    comparisons: int = 0
+
+
+def find_duplicates(
+    breweries: Iterable[Brewery],
+    threshold: float = 0.75,
+    max_block_size: int = MAX_BLOCK_SIZE,
+    stats: DedupeStats | None = None,
+) -> list[DuplicateCluster]:
+    """
+    Groups likely duplicate breweries into clusters.
+
+    Each brewery gets blocking keys (its postal code, geohash cell and each
+    informative name word). Only pairs sharing a key are scored, each pair
+    at most once, and pairs scoring at least `threshold` are merged with
+    union-find, so the work grows with block sizes instead of quadratically
+    with the dataset.
+
+    Args:
+        breweries (Iterable[Brewery]): The dataset.
+        threshold (float): Minimum `similarity` for two breweries to be linked.
+        max_block_size (int): Blocks larger than this are skipped.
+        stats (DedupeStats | None): Filled in with the work done, if given.
+
+    Returns:
+        list[DuplicateCluster]: Clusters of two or more breweries, largest
+            first.
+    """
+    stats = stats if stats is not None else DedupeStats()
+    profiles = [_Profile.of(brewery) for brewery in breweries]
+    stats.breweries = len(profiles)
+
+    blocks: dict[str, list[int]] = defaultdict(list)
+    for index, profile in enumerate(profiles):
+        for key in profile.keys:
+            blocks[key].append(index)
+
+    parent = list(range(len(profiles)))
+
+    def find(index: int) -> int:
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    seen: set[tuple[int, int]] = set()
+    links: list[tuple[int, int, float]] = []
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) > max_block_size:
+            stats.skipped_blocks += 1
+            continue
+        stats.blocks += 1
+        for pair in combinations(members, 2):
+            if pair in seen:
+                continue
+            seen.add(pair)
+            stats.comparisons += 1
+            score = _score(profiles[pair[0]], profiles[pair[1]])
+            if score >= threshold:
+                links.append((*pair, score))
+                parent[find(pair[0])] = find(pair[1])
+
+    clusters: dict[int, DuplicateCluster] = {}
+    for first, second, score in links:
+        cluster = clusters.setdefault(find(first), DuplicateCluster([]))
+        cluster.pairs.append(
+            (profiles[first].brewery.id, profiles[second].brewery.id, score)
+        )
+    for index, profile in enumerate(profiles):
+        if (root := find(index)) in clusters:
+            clusters[root].breweries.append(profile.brewery)
+
+    result = list(clusters.values())
+    for cluster in result:
+        cluster.breweries.sort(key=lambda brewery: brewery.id)
+    result.sort(key=lambda cluster: (-len(cluster.breweries), cluster.breweries[0].id))
+    return result
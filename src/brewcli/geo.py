@@ -0,0 +1,187 @@
+"""Great-circle distances, distance units, bounding boxes and geohashes."""
+
+import math
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from .models import Brewery, Coordinate
+
+# Mean Earth radius (IUGG).
+EARTH_RADIUS_KM = 6371.0088
+
+# Kilometres per unit.
+UNITS = {"km": 1.0, "m": 0.001, "mi": 1.609344}
+
+_DISTANCE = re.compile(r"^\s*(\d+(?:\.\d+)?|\.\d+)\s*([a-z]+)\s*$", re.IGNORECASE)
+
+
+def parse_distance(text: str) -> tuple[float, str]:
+    """
+    Parses a distance with an explicit unit, e.g. "25km", "10 mi" or "500m".
+
+    Returns:
+        tuple[float, str]: The distance in kilometres and the unit it was
+            given in.
+
+    Raises:
+        ValueError: If the text is not a non-negative number followed by one of
+            the units in `UNITS`.
+    """
+    match = _DISTANCE.match(text)
+    unit = match.group(2).lower() if match else None
+    if match is None or unit not in UNITS:
+        raise ValueError(
+            f"Invalid distance {text!r}. Use a number followed by one of: "
+            f"{', '.join(UNITS)} (e.g. '25km')."
+        )
+    return float(match.group(1)) * UNITS[unit], unit
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in kilometres between two points in degrees."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+@dataclass(frozen=True)
+class BoundingBox:
+    """
+    A latitude/longitude rectangle, used as a cheap prefilter before exact
+    distances are computed.
+
+    `min_lon` is greater than `max_lon` when the box crosses the antimeridian.
+    """
+
+    min_lat: float
+    max_lat: float
+    min_lon: float
+    max_lon: float
+
+    @classmethod
+    def around(cls, center: Coordinate, radius_km: float) -> "BoundingBox":
+        """The smallest box containing every point within `radius_km` of `center`."""
+        d_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+        min_lat, max_lat = center.latitude - d_lat, center.latitude + d_lat
+        if min_lat <= -90 or max_lat >= 90:
+            # The circle contains a pole: every longitude is in range.
+            return cls(max(min_lat, -90.0), min(max_lat, 90.0), -180.0, 180.0)
+
+        # Widest longitude span of the circle, reached off its centre latitude.
+        ratio = math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(
+            math.radians(center.latitude)
+        )
+        if ratio >= 1:
+            return cls(min_lat, max_lat, -180.0, 180.0)
+        d_lon = math.degrees(math.asin(ratio))
+        min_lon = _wrap(center.longitude - d_lon)
+        max_lon = _wrap(center.longitude + d_lon)
+        return cls(min_lat, max_lat, min_lon, max_lon)
+
+    @property
+    def crosses_antimeridian(self) -> bool:
+        """Whether the box wraps from +180 to -180 degrees longitude."""
+        return self.min_lon > self.max_lon
+
+    def contains(self, latitude: float, longitude: float) -> bool:
+        """Whether a point lies inside the box."""
+        if not self.min_lat <= latitude <= self.max_lat:
+            return False
+        if self.crosses_antimeridian:
+            return longitude >= self.min_lon or longitude <= self.max_lon
+        return self.min_lon <= longitude <= self.max_lon
+
+
+def centroid(points: Iterable[tuple[float, float]]) -> tuple[float, float]:
+    """
+    The mean position of (latitude, longitude) points, averaged as unit
+    vectors so points either side of the antimeridian average correctly.
+
+    Raises:
+        ValueError: If there are no points.
+    """
+    x = y = z = 0.0
+    count = 0
+    for latitude, longitude in points:
+        phi, lam = math.radians(latitude), math.radians(longitude)
+        x += math.cos(phi) * math.cos(lam)
+        y += math.cos(phi) * math.sin(lam)
+        z += math.sin(phi)
+        count += 1
+    if not count:
+        raise ValueError("Cannot take the centroid of no points.")
+    return (
+        math.degrees(math.atan2(z, math.hypot(x, y))),
+        math.degrees(math.atan2(y, x)),
+    )
+
+
+def _wrap(longitude: float) -> float:
+    return (longitude + 180.0) % 360.0 - 180.0
+
+
+_GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(latitude: float, longitude: float, precision: int = 6) -> str:
+    """
+    Encodes a point as a geohash: nearby points share a prefix.
+
+    At the default precision a cell is roughly 1.2 km by 0.6 km.
+    """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars: list[str] = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        bounds, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            bounds[0] = middle
+        else:
+            bounds[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_GEOHASH_ALPHABET[value])
+            bits = value = 0
+    return "".join(chars)
+
+
+def within_radius(
+    breweries: Iterable[Brewery], center: Coordinate, radius_km: float
+) -> list[tuple[float, Brewery]]:
+    """
+    The breweries within `radius_km` of `center`, nearest first.
+
+    Breweries outside the bounding box of the circle are rejected before the
+    haversine distance is computed; breweries without a coordinate are
+    skipped.
+
+    Returns:
+        list[tuple[float, Brewery]]: (distance in km, brewery) pairs.
+    """
+    box = BoundingBox.around(center, radius_km)
+    found = []
+    for brewery in breweries:
+        coordinate = brewery.address.coordinate
+        if coordinate is None or not box.contains(
+            coordinate.latitude, coordinate.longitude
+        ):
+            continue
+        distance = haversine_km(
+            center.latitude, center.longitude, coordinate.latitude, coordinate.longitude
+        )
+        if distance <= radius_km:
+            found.append((distance, brewery))
+    found.sort(key=lambda pair: pair[0])
+    return found
@@ -0,0 +1,185 @@
+"""Parallel import of full dataset dumps into the local mirror."""
+
+import json
+import os
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, TextIO
+
+from .mirror import Mirror, SyncDelta, to_row
+from .models import Brewery
+
+# Records per chunk handed to a worker: big enough that pickling and
+# scheduling overhead is small next to the parsing.
+CHUNK_SIZE = 2000
+# Changed rows written per transaction.
+BATCH_SIZE = 50_000
+
+
+@dataclass
+class ImportReport:
+    """
+    The outcome of `import_dump`.
+
+    Attributes:
+        records (int): Records read from the dump.
+        errors (list[str]): One message per invalid record, which was skipped.
+        delta (SyncDelta): What changed in the mirror.
+        seconds (float): Wall time of the import.
+    """
+
+    records: int = 0
+    errors: list[str] = field(default_factory=list)
+    delta: SyncDelta = field(default_factory=SyncDelta)
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Records read per second."""
+        return self.records / self.seconds if self.seconds else 0.0
+
+
+def read_chunks(
+    dump: TextIO, chunk_size: int = CHUNK_SIZE
+) -> Iterator[tuple[int, list[Any]]]:
+    """
+    Splits a dump into chunks of records, numbered from 1.
+
+    A dump is either a JSON array of breweries or JSONL with one brewery per
+    line. JSONL lines are passed on undecoded so workers decode them in
+    parallel; an array is decoded here, in one call to the C decoder.
+
+    Yields:
+        tuple[int, list[Any]]: The number of the chunk's first record, and
+            its records as dicts or JSONL lines.
+    """
+    head = dump.read(1)
+    while head.isspace():
+        head = dump.read(1)
+    if head == "[":
+        records: Iterator[Any] = iter(json.loads(head + dump.read()))
+    else:
+        records = (line for line in _prepend(head, dump) if line.strip())
+
+    start = 1
+    while chunk := list(islice(records, chunk_size)):
+        yield start, chunk
+        start += len(chunk)
+
+
+def _prepend(head: str, dump: TextIO) -> Iterator[str]:
+    """The lines of `dump`, with `head` already read from the first one."""
+    first = dump.readline()
+    yield head + first
+    yield from dump
+
+
+def parse_chunk(start: int, chunk: list[Any]) -> tuple[list[tuple], list[str]]:
+    """
+    Parses and validates one chunk into mirror rows.
+
+    Runs in a worker process, so it takes and returns only picklable data.
+
+    Args:
+        start (int): Number of the chunk's first record, for error messages.
+        chunk (list[Any]): Brewery dicts, or JSONL lines.
+
+    Returns:
+        tuple[list[tuple], list[str]]: Rows from `to_row` for the valid
+            records, and an error message for each invalid one.
+    """
+    rows: list[tuple] = []
+    errors: list[str] = []
+    for number, item in enumerate(chunk, start=start):
+        try:
+            data = json.loads(item) if isinstance(item, str) else item
+            rows.append(to_row(Brewery.from_dict(data)))
+        except (KeyError, TypeError, ValueError) as exc:
+            errors.append(f"Record {number}: {type(exc).__name__}: {exc}")
+    return rows, errors
+
+
+def _parse_in_order(
+    chunks: Iterable[tuple[int, list[Any]]], workers: int
+) -> Iterator[tuple[int, list[tuple], list[str]]]:
+    """
+    Parses chunks on a process pool and yields the results in input order.
+
+    At most two chunks per worker are in flight, so a dump is never read
+    much ahead of what has been written.
+    """
+    if workers <= 1:
+        for start, chunk in chunks:
+            yield len(chunk), *parse_chunk(start, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        window: deque[tuple[int, Future]] = deque()
+        for start, chunk in chunks:
+            window.append((len(chunk), pool.submit(parse_chunk, start, chunk)))
+            if len(window) >= 2 * workers:
+                size, future = window.popleft()
+                yield size, *future.result()
+        while window:
+            size, future = window.popleft()
+            yield size, *future.result()
+
+
+def import_dump(  # noqa: PLR0913
+    dump: TextIO,
+    mirror: Mirror,
+    *,
+    workers: int | None = None,
+    chunk_size: int = CHUNK_SIZE,
+    complete: bool = False,
+    on_progress: Callable[[ImportReport], None] | None = None,
+) -> ImportReport:
+    """
+    Imports a JSON or JSONL dump into the mirror.
+
+    The dump is split into chunks that a process pool parses and validates
+    with `Brewery.from_dict` and hashes, since that is what limits a single
+    core. The parent only compares hashes and writes the changed rows, in
+    transactions of `BATCH_SIZE` rows.
+
+    Args:
+        dump (TextIO): The dump, as read by `read_chunks`.
+        mirror (Mirror): An open mirror.
+        workers (int | None): Worker processes; defaults to the CPU count,
+            and 1 parses in this process.
+        chunk_size (int): Records per chunk.
+        complete (bool): Whether the dump is the whole dataset, in which case
+            breweries missing from it are deleted from the mirror, unless
+            any record was invalid: its brewery would be deleted with them.
+        on_progress (Callable | None): Called with the report so far after
+            each chunk.
+
+    Returns:
+        ImportReport: Counts, errors, changes and timing.
+    """
+    report = ImportReport()
+    start = time.perf_counter()
+
+    def rows() -> Iterator[tuple]:
+        chunks = read_chunks(dump, chunk_size)
+        for size, parsed, errors in _parse_in_order(
+            chunks, workers or os.cpu_count() or 1
+        ):
+            report.records += size
+            report.errors.extend(errors)
+            yield from parsed
+            if on_progress is not None:
+                report.seconds = time.perf_counter() - start
+                on_progress(report)
+
+    report.delta = mirror.sync_rows(
+        rows(),
+        complete=lambda: complete and not report.errors,
+        batch_size=BATCH_SIZE,
+    )
+    report.seconds = time.perf_counter() - start
+    return report
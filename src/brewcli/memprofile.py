@@ -0,0 +1,123 @@
+"""Per-phase peak memory accounting behind the global `--memprofile` flag."""
+
+import linecache
+import threading
+import tracemalloc
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# Allocations made by the profiler itself are noise in the report.
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+@dataclass
+class PhaseMemory:
+    """
+    Memory usage of one phase, aggregated over every time it was entered.
+
+    Attributes:
+        name (str): The phase name, e.g. "network" or "parse".
+        calls (int): Number of times the phase was entered.
+        peak (int): Largest rise in traced memory above the level at phase
+            start, in bytes.
+        retained (int): Net bytes still allocated when the phase ended, summed
+            over calls.
+        sites (Counter[str]): Net bytes allocated per "file:line" site.
+        skipped (int): Times the phase overlapped another measured phase and
+            was not measured.
+    """
+
+    name: str
+    calls: int = 0
+    skipped: int = 0
+    peak: int = 0
+    retained: int = 0
+    sites: Counter[str] = field(default_factory=Counter)
+
+    def top_sites(self, limit: int) -> list[tuple[str, int]]:
+        """The `limit` allocation sites that retained the most memory."""
+        return [(site, size) for site, size in self.sites.most_common(limit) if size]
+
+
+class MemoryProfile:
+    """
+    Tracks peak memory and top allocation sites per phase with `tracemalloc`.
+
+    tracemalloc has a single process-wide peak, so one phase is measured at
+    a time. A phase entered while another is being measured, whether nested
+    in it or on another thread (e.g. concurrent requests), runs unmeasured
+    and is counted in `PhaseMemory.skipped`; it never waits.
+
+    Attributes:
+        phases (dict[str, PhaseMemory]): Per-phase results in first-seen order.
+        top (int): Number of allocation sites to report per phase.
+    """
+
+    def __init__(self, top: int = 5):
+        self.phases: dict[str, PhaseMemory] = {}
+        self.top = top
+        # Held by the phase being measured. Other phases only try to take it,
+        # so a phase waiting on another thread's phase cannot deadlock.
+        self._measuring = threading.Lock()
+        self._results_lock = threading.Lock()
+
+    def start(self) -> None:
+        """Starts tracing allocations if tracemalloc is not already running."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self) -> None:
+        """Stops tracing allocations."""
+        tracemalloc.stop()
+
+    @property
+    def peak(self) -> int:
+        """Largest per-phase peak seen so far, in bytes."""
+        return max((p.peak for p in self.phases.values()), default=0)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Measures the enclosed block as one occurrence of phase `name`."""
+        if not tracemalloc.is_tracing():
+            yield
+            return
+
+        if not self._measuring.acquire(blocking=False):
+            try:
+                yield
+            finally:
+                with self._results_lock:
+                    result = self.phases.setdefault(name, PhaseMemory(name))
+                    result.calls += 1
+                    result.skipped += 1
+            return
+
+        try:
+            before = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+        except BaseException:
+            self._measuring.release()
+            raise
+        try:
+            yield
+        finally:
+            current, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+            self._measuring.release()
+            with self._results_lock:
+                result = self.phases.setdefault(name, PhaseMemory(name))
+                result.calls += 1
+                result.peak = max(result.peak, peak - baseline)
+                result.retained += current - baseline
+                for stat in after.compare_to(before, "lineno"):
+                    frame = stat.traceback[0]
+                    site = f"{frame.filename}:{frame.lineno}"
+                    result.sites[site] += stat.size_diff
@@ -0,0 +1,202 @@
+"""Request counters and latency histograms for long-running `BreweryAPI` users."""
+
+import json
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Any
+
+# Upper bounds (seconds) of the latency histogram buckets; +Inf is implicit.
+DEFAULT_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    A fixed-bucket latency histogram with Prometheus semantics.
+
+    Attributes:
+        buckets (tuple[float, ...]): Sorted bucket upper bounds in seconds.
+        counts (list[int]): Non-cumulative observation count per bucket, with a
+            trailing slot for observations above the last bound.
+        sum (float): Sum of all observed values.
+        count (int): Number of observations.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Records a single observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        """Returns `(le, cumulative_count)` pairs ending with `+Inf`."""
+        bounds = [repr(b) for b in self.buckets] + ["+Inf"]
+        pairs: list[tuple[str, int]] = []
+        running = 0
+        for bound, count in zip(bounds, self.counts, strict=True):
+            running += count
+            pairs.append((bound, running))
+        return pairs
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns a JSON-serialisable view of the histogram."""
+        return {
+            "buckets": dict(self.cumulative()),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class Metrics:
+    """
+    Thread-safe counters and per-endpoint latency histograms for `BreweryAPI`.
+
+    Endpoints are labelled "random", "by_id" and "search". Errors are keyed by
+    endpoint and status, where status is the HTTP status code or "transport"
+    / "decode" for failures that never produced a usable response.
+
+    Example:
+        >>> metrics = Metrics()
+        >>> with BreweryAPI(metrics=metrics) as client:
+        ...     client.get_random_breweries(3)
+        >>> print(metrics.to_prometheus())
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.requests: Counter[str] = Counter()
+        self.errors: Counter[tuple[str, str]] = Counter()
+        self.retries: Counter[str] = Counter()
+        self.cache_hits: Counter[str] = Counter()
+        self.coalesced: Counter[str] = Counter()
+        self.latency: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe_request(self, endpoint: str, seconds: float) -> None:
+        """Counts a request to `endpoint` and records its latency."""
+        with self._lock:
+            self.requests[endpoint] += 1
+            histogram = self.latency.get(endpoint)
+            if histogram is None:
+                histogram = self.latency[endpoint] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def record_error(self, endpoint: str, status: int | str) -> None:
+        """Counts a failed request to `endpoint`."""
+        with self._lock:
+            self.errors[endpoint, str(status)] += 1
+
+    def record_retry(self, endpoint: str) -> None:
+        """Counts a retried request to `endpoint`."""
+        with self._lock:
+            self.retries[endpoint] += 1
+
+    def record_cache_hit(self, endpoint: str) -> None:
+        """Counts a request to `endpoint` answered without the network."""
+        with self._lock:
+            self.cache_hits[endpoint] += 1
+
+    def record_coalesced(self, endpoint: str) -> None:
+        """Counts a request to `endpoint` that shared another's in-flight call."""
+        with self._lock:
+            self.coalesced[endpoint] += 1
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns a JSON-serialisable snapshot of all metrics."""
+        with self._lock:
+            return {
+                "requests": dict(self.requests),
+                "errors": {
+                    endpoint: {
+                        status: count
+                        for (ep, status), count in self.errors.items()
+                        if ep == endpoint
+                    }
+                    for endpoint in sorted({ep for ep, _ in self.errors})
+                },
+                "retries": dict(self.retries),
+                "cache_hits": dict(self.cache_hits),
+                "coalesced": dict(self.coalesced),
+                "latency_seconds": {
+                    endpoint: histogram.to_dict()
+                    for endpoint, histogram in self.latency.items()
+                },
+            }
+
+    def to_json(self, **kwargs: Any) -> str:
+        """Returns `to_dict()` encoded as JSON; kwargs go to `json.dumps`."""
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix: str = "brewcli") -> str:
+        """
+        Returns all metrics in the Prometheus text exposition format (0.0.4).
+
+        Args:
+            prefix (str): Prepended to every metric name. Defaults to "brewcli".
+        """
+        lines: list[str] = []
+
+        def counter(name: str, help_text: str, samples: dict) -> None:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, value in sorted(samples.items()):
+                lines.append(f"{prefix}_{name}{{{_labels(labels)}}} {value}")
+
+        with self._lock:
+            counter(
+                "requests_total",
+                "HTTP requests sent, by endpoint.",
+                {(("endpoint", ep),): n for ep, n in self.requests.items()},
+            )
+            counter(
+                "errors_total",
+                "Failed requests, by endpoint and status.",
+                {
+                    (("endpoint", ep), ("status", status)): n
+                    for (ep, status), n in self.errors.items()
+                },
+            )
+            counter(
+                "retries_total",
+                "Retried requests, by endpoint.",
+                {(("endpoint", ep),): n for ep, n in self.retries.items()},
+            )
+            counter(
+                "cache_hits_total",
+                "Requests answered from cache, by endpoint.",
+                {(("endpoint", ep),): n for ep, n in self.cache_hits.items()},
+            )
+            counter(
+                "coalesced_total",
+                "Requests that shared an identical in-flight call, by endpoint.",
+                {(("endpoint", ep),): n for ep, n in self.coalesced.items()},
+            )
+
+            name = f"{prefix}_request_duration_seconds"
+            lines.append(f"# HELP {name} Request latency, by endpoint.")
+            lines.append(f"# TYPE {name} histogram")
+            for endpoint, histogram in sorted(self.latency.items()):
+                for bound, count in histogram.cumulative():
+                    labels = _labels((("endpoint", endpoint), ("le", bound)))
+                    lines.append(f"{name}_bucket{{{labels}}} {count}")
+                labels = _labels((("endpoint", endpoint),))
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """Escapes a label value for the Prometheus text format."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: tuple[tuple[str, str], ...]) -> str:
+    """Formats label pairs as `k="v",...`."""
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in pairs)
@@ -0,0 +1,440 @@
+"""A local SQLite mirror of the Open Brewery DB dataset."""
+
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .geo import BoundingBox, centroid
+from .models import Brewery, Coordinate, SearchQuery
+from .paths import default_mirror_path
+
+# Column order of the breweries table, matching `Brewery.to_flat_dict()`.
+FIELDS = (
+    "id",
+    "name",
+    "brewery_type",
+    "phone",
+    "website_url",
+    "address_one",
+    "address_two",
+    "address_three",
+    "postal_code",
+    "city",
+    "state",
+    "country",
+    "street",
+    "latitude",
+    "longitude",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS breweries (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    brewery_type TEXT,
+    phone TEXT,
+    website_url TEXT,
+    address_one TEXT,
+    address_two TEXT,
+    address_three TEXT,
+    postal_code TEXT,
+    city TEXT,
+    state TEXT,
+    country TEXT,
+    street TEXT,
+    latitude REAL,
+    longitude REAL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS breweries_state ON breweries (state);
+CREATE INDEX IF NOT EXISTS breweries_city ON breweries (city);
+CREATE INDEX IF NOT EXISTS breweries_postal_code ON breweries (postal_code);
+CREATE INDEX IF NOT EXISTS breweries_latitude ON breweries (latitude);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS postal_centroids (
+    postal_code TEXT NOT NULL,
+    country TEXT NOT NULL,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    breweries INTEGER NOT NULL,
+    PRIMARY KEY (postal_code, country)
+);
+"""
+
+
+_ZIP_PLUS_4 = re.compile(r"^(\d{5})-\d{4}$")
+
+
+def normalize_postal(postal_code: str) -> str:
+    """
+    A postal code in the form centroids are keyed by: upper case without
+    spaces, and US ZIP+4 codes cut to their five-digit ZIP.
+
+    Example:
+        >>> normalize_postal("45213-2120"), normalize_postal("sw1a 1aa")
+        ('45213', 'SW1A1AA')
+    """
+    code = "".join(postal_code.split()).upper()
+    match = _ZIP_PLUS_4.match(code)
+    return match.group(1) if match else code
+
+
+def content_hash(record: dict) -> str:
+    """
+    A stable hash of a flattened brewery, independent of key order.
+
+    Args:
+        record (dict): The output of `Brewery.to_flat_dict()`.
+    """
+    encoded = json.dumps(record, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
+def to_row(brewery: Brewery) -> tuple:
+    """
+    A brewery as a breweries table row: its `FIELDS` values, then the
+    content hash.
+    """
+    record = brewery.to_flat_dict()
+    return (*(record[name] for name in FIELDS), content_hash(record))
+
+
+@dataclass
+class SyncDelta:
+    """
+    The changes applied by one `Mirror.sync()`.
+
+    Attributes:
+        inserted (list[str]): IDs of new breweries.
+        updated (list[str]): IDs of breweries whose content changed.
+        deleted (list[str]): IDs no longer present upstream.
+        unchanged (int): Number of breweries left untouched.
+        seconds (float): Wall time of the sync, including downloading.
+    """
+
+    inserted: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    seconds: float = 0.0
+
+    @property
+    def written(self) -> int:
+        """Number of rows written or deleted."""
+        return len(self.inserted) + len(self.updated) + len(self.deleted)
+
+    def summary(self) -> str:
+        """A one-line human-readable summary."""
+        return (
+            f"{len(self.inserted)} inserted, {len(self.updated)} updated, "
+            f"{len(self.deleted)} deleted, {self.unchanged} unchanged "
+            f"in {self.seconds:.1f}s"
+        )
+
+
+class Mirror:
+    """
+    A local copy of the brewery dataset stored in SQLite.
+
+    Each row keeps a content hash of its flattened brewery so re-syncing only
+    writes the rows that actually changed.
+
+    Example:
+        >>> with BreweryAPI() as client, Mirror() as mirror:
+        ...     breweries = (
+        ...         Brewery.from_dict(data)
+        ...         for page in client.iter_brewery_pages()
+        ...         for data in page
+        ...     )
+        ...     print(mirror.sync(breweries).summary())
+    """
+
+    def __init__(self, path: Path | str | None = None):
+        """
+        Args:
+            path (Path | str | None): The database file. Defaults to
+                `default_mirror_path()`.
+        """
+        self.path = Path(path) if path else default_mirror_path()
+        self.connection: sqlite3.Connection
+
+    def __enter__(self) -> "Mirror":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.connection.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM breweries").fetchone()[0]
+
+    @property
+    def last_synced(self) -> float | None:
+        """Unix time of the last successful sync, if any."""
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'last_synced'"
+        ).fetchone()
+        return float(row[0]) if row else None
+
+    def hashes(self) -> dict[str, str]:
+        """The stored content hash of every brewery, keyed by ID."""
+        return dict(self.connection.execute("SELECT id, content_hash FROM breweries"))
+
+    def sync(
+        self, breweries: Iterable[Brewery], complete: bool | Callable[[], bool] = True
+    ) -> SyncDelta:
+        """
+        Brings the mirror in line with `breweries`, writing only the changes.
+
+        Incoming breweries are hashed and compared with the stored hashes as
+        they stream in; only inserted, updated and (for a complete dataset)
+        deleted rows are kept and then applied in a single transaction, so an
+        interrupted download leaves the mirror untouched.
+
+        Args:
+            breweries (Iterable[Brewery]): The upstream dataset.
+            complete (bool | Callable[[], bool]): Whether `breweries` is the
+                whole dataset, in which case stored breweries missing from it
+                are deleted. A callable is asked once `breweries` is exhausted,
+                so a caller that skipped records along the way can withhold
+                the deletions.
+
+        Returns:
+            SyncDelta: What changed.
+        """
+        return self.sync_rows((to_row(b) for b in breweries), complete)
+
+    def sync_rows(
+        self,
+        rows: Iterable[tuple],
+        complete: bool | Callable[[], bool] = True,
+        batch_size: int | None = None,
+    ) -> SyncDelta:
+        """
+        Like `sync`, for rows already flattened and hashed by `to_row`.
+
+        Args:
+            rows (Iterable[tuple]): The upstream dataset, as `to_row` tuples.
+            complete (bool | Callable[[], bool]): Whether `rows` is the whole
+                dataset, or a callable asked once `rows` is exhausted.
+            batch_size (int | None): Write and commit whenever this many
+                changed rows are pending, instead of once at the end. Bounds
+                memory for large imports; an interruption then keeps the
+                batches already committed.
+
+        Returns:
+            SyncDelta: What changed.
+        """
+        start = time.perf_counter()
+        stored = self.hashes()
+        seen: set[str] = set()
+        delta = SyncDelta()
+        pending: list[tuple] = []
+
+        for values in rows:
+            brewery_id, digest = values[0], values[-1]
+            if brewery_id in seen:
+                continue
+            seen.add(brewery_id)
+            previous = stored.get(brewery_id)
+            if previous == digest:
+                delta.unchanged += 1
+                continue
+            (delta.updated if previous else delta.inserted).append(brewery_id)
+            pending.append(values)
+            if batch_size is not None and len(pending) >= batch_size:
+                with self.connection:
+                    self._write(pending)
+                pending = []
+
+        if complete() if callable(complete) else complete:
+            delta.deleted = [
+                brewery_id for brewery_id in stored if brewery_id not in seen
+            ]
+
+        with self.connection:
+            self._write(pending)
+            self.connection.executemany(
+                "DELETE FROM breweries WHERE id = ?",
+                [(brewery_id,) for brewery_id in delta.deleted],
+            )
+            if delta.written:
+                self._update_postal_centroids()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_synced', ?)",
+                (str(time.time()),),
+            )
+
+        delta.seconds = time.perf_counter() - start
+        return delta
+
+    def _write(self, rows: list[tuple]) -> None:
+        """Inserts or replaces `to_row` tuples; the caller manages the transaction."""
+        columns = ", ".join((*FIELDS, "content_hash"))
+        placeholders = ", ".join("?" * (len(FIELDS) + 1))
+        self.connection.executemany(
+            f"INSERT OR REPLACE INTO breweries ({columns}) VALUES ({placeholders})",
+            rows,
+        )
+
+    def _has_postal_centroids(self) -> bool:
+        return (
+            self.connection.execute("SELECT 1 FROM postal_centroids LIMIT 1").fetchone()
+            is not None
+        )
+
+    def _update_postal_centroids(self) -> None:
+        """
+        Recomputes the centroid of every postal code's located breweries, per
+        country, and writes only the centroids that changed. The caller
+        manages the transaction.
+        """
+        points: defaultdict[tuple[str, str], list[tuple[float, float]]] = defaultdict(
+            list
+        )
+        # In ID order, so unchanged codes sum to bit-identical centroids.
+        for postal_code, country, latitude, longitude in self.connection.execute(
+            "SELECT postal_code, country, latitude, longitude FROM breweries "
+            "WHERE postal_code IS NOT NULL AND latitude IS NOT NULL "
+            "AND longitude IS NOT NULL ORDER BY id"
+        ):
+            if code := normalize_postal(postal_code):
+                points[(code, country or "")].append((latitude, longitude))
+        centroids = {
+            key: (*centroid(located), len(located)) for key, located in points.items()
+        }
+        stored = {
+            (row[0], row[1]): tuple(row[2:])
+            for row in self.connection.execute("SELECT * FROM postal_centroids")
+        }
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO postal_centroids VALUES (?, ?, ?, ?, ?)",
+            [
+                (*key, *value)
+                for key, value in centroids.items()
+                if stored.get(key) != value
+            ],
+        )
+        self.connection.executemany(
+            "DELETE FROM postal_centroids WHERE postal_code = ? AND country = ?",
+            [key for key in stored if key not in centroids],
+        )
+
+    def postal_centroid(
+        self, postal_code: str, country: str | None = None
+    ) -> Coordinate | None:
+        """
+        The centroid of the breweries with a postal code, from the table
+        precomputed on every sync, so the lookup is one primary-key read.
+
+        Args:
+            postal_code (str): Any spelling `normalize_postal` accepts.
+            country (str | None): Only consider this country (any case). The
+                same code can exist in several countries; without one, the
+                country with the most breweries under the code wins.
+
+        Returns:
+            Coordinate | None: The centroid, or `None` if no located brewery
+                has the postal code.
+        """
+        if not self._has_postal_centroids() and len(self):
+            # Mirrors synced before centroids existed.
+            with self.connection:
+                self._update_postal_centroids()
+        sql = "SELECT latitude, longitude FROM postal_centroids WHERE postal_code = ?"
+        params = [normalize_postal(postal_code)]
+        if country is not None:
+            sql += " AND country = ? COLLATE NOCASE"
+            params.append(country)
+        row = self.connection.execute(
+            sql + " ORDER BY breweries DESC LIMIT 1", params
+        ).fetchone()
+        return Coordinate(row[0], row[1]) if row else None
+
+    def get(self, brewery_id: str) -> Brewery | None:
+        """Looks up one brewery by ID."""
+        row = self.connection.execute(
+            "SELECT * FROM breweries WHERE id = ?", (brewery_id,)
+        ).fetchone()
+        return Brewery.from_flat_dict(dict(row)) if row else None
+
+    def value_counts(self, column: str) -> dict[str, int]:
+        """
+        The number of breweries with each non-empty value of `column`.
+
+        Raises:
+            ValueError: If `column` is not one of `FIELDS`.
+        """
+        if column not in FIELDS:
+            raise ValueError(f"Unknown column {column!r}.")
+        return dict(
+            self.connection.execute(
+                f"SELECT {column}, COUNT(*) FROM breweries "
+                f"WHERE {column} IS NOT NULL AND {column} != '' GROUP BY {column}"
+            )
+        )
+
+    def iter_breweries(
+        self, query: SearchQuery | None = None, bbox: BoundingBox | None = None
+    ) -> Iterator[Brewery]:
+        """
+        Yields the breweries in the mirror, ordered by ID.
+
+        Args:
+            query (SearchQuery | None): Filters applied locally: city, country,
+                state and type match case-insensitively, name as a substring,
+                postal code as a prefix and ids exactly. Paging and distance
+                ordering are ignored.
+            bbox (BoundingBox | None): Only breweries with a coordinate inside
+                this box.
+        """
+        clauses, params = _where(query) if query else ([], [])
+        if bbox is not None:
+            clauses.append("latitude BETWEEN ? AND ?")
+            params.extend((bbox.min_lat, bbox.max_lat))
+            joiner = "OR" if bbox.crosses_antimeridian else "AND"
+            clauses.append(f"(longitude >= ? {joiner} longitude <= ?)")
+            params.extend((bbox.min_lon, bbox.max_lon))
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        for row in self.connection.execute(
+            f"SELECT * FROM breweries{where} ORDER BY id", params
+        ):
+            yield Brewery.from_flat_dict(dict(row))
+
+
+def _where(query: SearchQuery) -> tuple[list[str], list]:
+    """WHERE conditions and their parameters for the filters set on `query`."""
+    clauses: list[str] = []
+    params: list = []
+    for column, value in (
+        ("city", query.city),
+        ("country", query.country),
+        ("state", query.state),
+        ("brewery_type", query.type),
+    ):
+        if value is not None:
+            clauses.append(f"{column} = ? COLLATE NOCASE")
+            params.append(value)
+    if query.name is not None:
+        clauses.append("name LIKE ? ESCAPE '\\'")
+        params.append(f"%{_escape_like(query.name)}%")
+    if query.postal is not None:
+        clauses.append("postal_code LIKE ? ESCAPE '\\'")
+        params.append(f"{_escape_like(query.postal)}%")
+    if query.ids:
+        clauses.append(f"id IN ({', '.join('?' * len(query.ids))})")
+        params.extend(query.ids)
+    return clauses, params
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
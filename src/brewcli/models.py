@@ -1,8 +1,10 @@
 """Module providing data objects"""
 
 import logging
-from dataclasses import dataclass, fields
-from enum import Enum
+import sys
+from dataclasses import dataclass, fields, replace
+from enum import StrEnum
+from urllib.parse import urlencode
 
 logger = logging.getLogger(__name__)
 
@@ -95,6 +97,50 @@ class Coordinate:
             ) from exc
 
 
+class BreweryType(StrEnum):
+    MICRO = "micro"
+    NANO = "nano"
+    REGIONAL = "regional"
+    BREWPUB = "brewpub"
+    LARGE = "large"
+    PLANNING = "planning"
+    BAR = "bar"
+    CONTRACT = "contract"
+    PROPRIETOR = "proprietor"
+    CLOSED = "closed"
+
+
+BREWERY_TYPES = [t.value for t in BreweryType]
+
+# Decimal places `SearchQuery.canonical()` rounds coordinates to.
+COORD_DECIMALS = 4
+
+
+def _intern[S: (str, None)](value: S) -> S:
+    """
+    Returns the canonical copy of a repeated string such as a city or state.
+
+    Bulk-parsed records then share one string per distinct value instead of
+    holding thousands of equal copies. Missing (`None`) values pass through.
+    """
+    return sys.intern(value) if type(value) is str else value
+
+
+def _fold(value: str | None) -> str | None:
+    """A text filter trimmed, with inner whitespace collapsed, and case folded."""
+    return None if value is None else " ".join(value.split()).casefold()
+
+
+def _brewery_type(value: str) -> BreweryType | str:
+    """
+    Codes a brewery type as a `BreweryType`, keeping unknown types as strings.
+    """
+    try:
+        return BreweryType(value)
+    except ValueError:
+        return _intern(value)
+
+
 @dataclass
 class Address:
     """
@@ -149,10 +195,10 @@ class Address:
             address_two=data.get("address_2"),
             address_three=data.get("address_3"),
             street=data["street"],
-            city=data["city"],
-            state=data["state"],
+            city=_intern(data["city"]),
+            state=_intern(data["state"]),
             postal_code=data["postal_code"],
-            country=data["country"],
+            country=_intern(data["country"]),
             coordinate=coordinate,
         )
 
@@ -168,6 +214,8 @@ class Brewery:
     Attributes:
         id (str): The unique identifier of the brewery.
         name (str): The name of the brewery.
+        brewery_type (BreweryType | str): The type of brewery; types unknown to
+            `BreweryType` are kept as strings.
         address (Address): The address of the brewery, represented as an `Address`
             object.
         phone (str): The phone number of the brewery.
@@ -180,7 +228,7 @@ class Brewery:
 
     id: str
     name: str
-    brewery_type: str
+    brewery_type: BreweryType | str
     address: Address
     phone: str | None
     website_url: str | None
@@ -235,18 +283,47 @@ class Brewery:
         return cls(
             id=data["id"],
             name=data["name"],
-            brewery_type=data["brewery_type"],
+            brewery_type=_brewery_type(data["brewery_type"]),
             address=address,
             phone=data.get("phone"),
             website_url=data.get("website_url"),
         )
 
+    @classmethod
+    def from_flat_dict(cls, data: dict) -> "Brewery":
+        """Creates a `Brewery` from the output of `to_flat_dict`."""
+        coordinate = (
+            Coordinate(latitude=data["latitude"], longitude=data["longitude"])
+            if data.get("latitude") is not None and data.get("longitude") is not None
+            else None
+        )
+        return cls(
+            id=data["id"],
+            name=data["name"],
+            brewery_type=_brewery_type(data["brewery_type"]),
+            address=Address(
+                address_one=data["address_one"],
+                address_two=data.get("address_two"),
+                address_three=data.get("address_three"),
+                street=data["street"],
+                city=_intern(data["city"]),
+                state=_intern(data["state"]),
+                postal_code=data["postal_code"],
+                country=_intern(data["country"]),
+                coordinate=coordinate,
+            ),
+            phone=data.get("phone"),
+            website_url=data.get("website_url"),
+        )
+
     def to_flat_dict(self) -> dict:
         """Returns a flattened dictionary from Brewery instance."""
         return {
             "id": self.id,
             "name": self.name,
-            "brewery_type": self.brewery_type,
+            "brewery_type": None
+            if self.brewery_type is None
+            else str(self.brewery_type),
             "phone": self.phone,
             "website_url": self.website_url,
             "address_one": self.address.address_one,
@@ -266,20 +343,6 @@ class Brewery:
         }
 
 
-class BreweryType(Enum):
-    MICRO = "micro"
-    NANO = "nano"
-    REGIONAL = "regional"
-    BREWPUB = "brewpub"
-    PLANNING = "planning"
-    CONTRACT = "contract"
-    PROPRIETOR = "proprietor"
-    CLOSED = "closed"
-
-
-BREWERY_TYPES = [t.value for t in BreweryType]
-
-
 @dataclass
 class SearchQuery:
     """
@@ -389,3 +452,44 @@ class SearchQuery:
         }
         # Remove keys with `None` values
         return {k: v for k, v in params.items() if v is not None}
+
+    def canonical(self) -> "SearchQuery":
+        """
+        An equivalent query in a normal form, so equivalent searches share
+        cache entries.
+
+        Text filters are trimmed, have inner whitespace collapsed and are case
+        folded (the API matches them case-insensitively), `ids` are trimmed,
+        deduplicated and sorted, and `coord` is rounded to `COORD_DECIMALS`
+        places (about 11 m).
+
+        Example:
+            >>> query = SearchQuery(state=" New  York ", ids=["b", "a", "b"])
+            >>> query.canonical().state, query.canonical().ids
+            ('new york', ['a', 'b'])
+        """
+        ids = sorted({i.strip() for i in self.ids if i.strip()}) if self.ids else None
+        coord = self.coord
+        if coord is not None:
+            coord = Coordinate(
+                round(coord.latitude, COORD_DECIMALS),
+                round(coord.longitude, COORD_DECIMALS),
+            )
+        return replace(
+            self,
+            city=_fold(self.city),
+            country=_fold(self.country),
+            name=_fold(self.name),
+            state=_fold(self.state),
+            postal=_fold(self.postal),
+            type=_fold(self.type),
+            coord=coord,
+            ids=ids or None,
+        )
+
+    def cache_key(self) -> str:
+        """
+        A string identifying the results of this query: the sorted, encoded
+        parameters of its canonical form.
+        """
+        return urlencode(sorted(self.canonical().to_params().items()))
@@ -0,0 +1,259 @@
+"""Bulk k-nearest-brewery queries for many coordinates using a k-d tree."""
+
+import csv
+import heapq
+import json
+import math
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from .geo import EARTH_RADIUS_KM
+from .models import Brewery, Coordinate
+
+FORMATS = ("csv", "jsonl")
+# Columns of each written assignment, in CSV order.
+OUTPUT_FIELDS = (
+    "point",
+    "latitude",
+    "longitude",
+    "rank",
+    "brewery_id",
+    "name",
+    "city",
+    "state",
+    "distance_km",
+)
+
+# Points per leaf; small buckets are scanned linearly, which is cheaper in
+# Python than descending further.
+LEAF_SIZE = 16
+
+
+@dataclass(frozen=True)
+class Point:
+    """A query location read from a points file."""
+
+    id: str
+    coordinate: Coordinate
+
+
+def _unit_vector(latitude: float, longitude: float) -> tuple[float, float, float]:
+    phi, lam = math.radians(latitude), math.radians(longitude)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def _chord_to_km(squared_chord: float) -> float:
+    """Great-circle distance for a squared chord length on the unit sphere."""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(squared_chord) / 2))
+
+
+class KDTree:
+    """
+    A k-d tree over coordinates, stored as 3-D unit vectors.
+
+    Straight-line (chord) distance between unit vectors orders points exactly
+    like great-circle distance, and needs no special cases at the poles or the
+    antimeridian. Building takes O(n log² n); each query visits O(log n) nodes
+    on typical data.
+    """
+
+    def __init__(self, coordinates: Sequence[Coordinate]):
+        """
+        Args:
+            coordinates (Sequence[Coordinate]): The indexed points; query
+                results refer to them by position.
+        """
+        self._xyz = [_unit_vector(c.latitude, c.longitude) for c in coordinates]
+        # Per node: split axis (-1 for a leaf), split value, children, and
+        # the point indexes of a leaf.
+        self._axis: list[int] = []
+        self._split: list[float] = []
+        self._left: list[int] = []
+        self._right: list[int] = []
+        self._bucket: list[list[int]] = []
+        if self._xyz:
+            self._build(list(range(len(self._xyz))))
+
+    def __len__(self) -> int:
+        return len(self._xyz)
+
+    def _build(self, indexes: list[int]) -> int:
+        node = len(self._axis)
+        self._axis.append(-1)
+        self._split.append(0.0)
+        self._left.append(-1)
+        self._right.append(-1)
+        self._bucket.append([])
+        if len(indexes) <= LEAF_SIZE:
+            self._bucket[node] = indexes
+            return node
+
+        # Split on the axis along which the points are most spread out.
+        spans = [
+            max(self._xyz[i][axis] for i in indexes)
+            - min(self._xyz[i][axis] for i in indexes)
+            for axis in range(3)
+        ]
+        axis = spans.index(max(spans))
+        indexes.sort(key=lambda i: self._xyz[i][axis])
+        middle = len(indexes) // 2
+        self._axis[node] = axis
+        self._split[node] = self._xyz[indexes[middle]][axis]
+        self._left[node] = self._build(indexes[:middle])
+        self._right[node] = self._build(indexes[middle:])
+        return node
+
+    def query(self, coordinate: Coordinate, k: int = 1) -> list[tuple[float, int]]:
+        """
+        The `k` indexed points nearest to `coordinate`, nearest first.
+
+        Returns:
+            list[tuple[float, int]]: (great-circle distance in km, index) pairs.
+        """
+        if not self._xyz or k < 1:
+            return []
+        target = _unit_vector(coordinate.latitude, coordinate.longitude)
+        # Max-heap of the best k so far, as (-squared chord, index).
+        best: list[tuple[float, int]] = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            axis = self._axis[node]
+            if axis < 0:
+                for index in self._bucket[node]:
+                    point = self._xyz[index]
+                    squared = (
+                        (point[0] - target[0]) ** 2
+                        + (point[1] - target[1]) ** 2
+                        + (point[2] - target[2]) ** 2
+                    )
+                    if len(best) < k:
+                        heapq.heappush(best, (-squared, index))
+                    elif squared < -best[0][0]:
+                        heapq.heapreplace(best, (-squared, index))
+                continue
+
+            offset = target[axis] - self._split[node]
+            near, far = (
+                (self._left[node], self._right[node])
+                if offset < 0
+                else (self._right[node], self._left[node])
+            )
+            # Visit the far side only if the splitting plane is closer than
+            # the current k-th nearest point. It is pushed first so the near
+            # side is searched (and tightens the bound) before it.
+            if len(best) < k or offset * offset < -best[0][0]:
+                stack.append(far)
+            stack.append(near)
+
+        return sorted((_chord_to_km(-squared), index) for squared, index in best)
+
+
+def parse_point(data: Any, default_id: str) -> Point:
+    """
+    Creates a `Point` from a decoded JSONL line or CSV row.
+
+    The location is a "coord" given as "lat,lon" (parsed like
+    `Coordinate.from_str`) or a [lat, lon] pair, or separate "latitude" and
+    "longitude" values. An optional "id" names the point; it defaults to
+    `default_id`. A bare "lat,lon" string is also accepted.
+
+    Raises:
+        ValueError: If no valid coordinate can be read.
+    """
+    if isinstance(data, str):
+        return Point(default_id, Coordinate.from_str(data))
+    if not isinstance(data, dict):
+        raise ValueError("Each point must be an object or a 'lat,lon' string.")
+
+    coord = data.get("coord")
+    if isinstance(coord, list | tuple) and len(coord) == 2:
+        coord = f"{coord[0]},{coord[1]}"
+    elif coord is None and "latitude" in data and "longitude" in data:
+        coord = f"{data['latitude']},{data['longitude']}"
+    if not isinstance(coord, str):
+        raise ValueError("Missing 'coord' or 'latitude'/'longitude'.")
+    point_id = data.get("id")
+    return Point(
+        str(point_id) if point_id not in (None, "") else default_id,
+        Coordinate.from_str(coord),
+    )
+
+
+def read_points(
+    lines: Iterable[str],
+    fmt: str,
+    on_error: Callable[[int, Exception], None] | None = None,
+) -> Iterator[Point]:
+    """
+    Reads points from a CSV file with a header row, or from JSONL.
+
+    Args:
+        lines (Iterable[str]): The file contents.
+        fmt (str): "csv" or "jsonl".
+        on_error (Callable | None): Called with the line number and error of
+            each invalid point, which is then skipped.
+
+    Yields:
+        Point: Points in file order; unnamed points are named by their
+            line number.
+
+    Raises:
+        ValueError: For the first invalid point, when `on_error` is `None`.
+    """
+    rows = _csv_rows(lines) if fmt == "csv" else _jsonl_rows(lines)
+    for number, row in rows:
+        try:
+            data = json.loads(row) if fmt == "jsonl" else row
+            yield parse_point(data, str(number))
+        except (ValueError, TypeError) as exc:
+            if on_error is None:
+                raise ValueError(f"Line {number}: {exc}") from exc
+            on_error(number, exc)
+
+
+def _csv_rows(lines: Iterable[str]) -> Iterator[tuple[int, Any]]:
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _jsonl_rows(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    for number, text in enumerate(lines, start=1):
+        if text.strip():
+            yield number, text
+
+
+def assign_nearest(
+    points: Iterable[Point], breweries: Sequence[Brewery], k: int
+) -> Iterator[dict[str, Any]]:
+    """
+    Yields the `k` nearest breweries of every point as output records.
+
+    The tree is built once over the breweries that have a coordinate, so m
+    points against n breweries cost O((n + m) log n) rather than n * m.
+    """
+    located: list[Brewery] = []
+    coordinates: list[Coordinate] = []
+    for brewery in breweries:
+        if brewery.address.coordinate is not None:
+            located.append(brewery)
+            coordinates.append(brewery.address.coordinate)
+    tree = KDTree(coordinates)
+    for point in points:
+        for rank, (distance, index) in enumerate(
+            tree.query(point.coordinate, k), start=1
+        ):
+            brewery = located[index]
+            yield {
+                "point": point.id,
+                "latitude": point.coordinate.latitude,
+                "longitude": point.coordinate.longitude,
+                "rank": rank,
+                "brewery_id": brewery.id,
+                "name": brewery.name,
+                "city": brewery.address.city,
+                "state": brewery.address.state,
+                "distance_km": round(distance, 3),
+            }
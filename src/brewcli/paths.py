@@ -0,0 +1,27 @@
+"""
+Default locations of brewcli's on-disk state.
+
+Only the standard library is imported, so shell completion can find the
+mirror and its index without loading the rest of the package.
+"""
+
+import os
+from pathlib import Path
+
+CACHE_DIR_ENV = "BREWCLI_CACHE_DIR"
+MIRROR_ENV = "BREWCLI_MIRROR"
+
+
+def default_cache_dir() -> Path:
+    """$BREWCLI_CACHE_DIR, else $XDG_CACHE_HOME/brewcli, else ~/.cache/brewcli."""
+    if path := os.environ.get(CACHE_DIR_ENV):
+        return Path(path)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "brewcli"
+
+
+def default_mirror_path() -> Path:
+    """$BREWCLI_MIRROR, else `mirror.sqlite3` in the cache directory."""
+    if path := os.environ.get(MIRROR_ENV):
+        return Path(path)
+    return default_cache_dir() / "mirror.sqlite3"
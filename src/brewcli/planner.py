@@ -0,0 +1,224 @@
+"""Planning and concurrent execution of searches with multi-valued filters."""
+
+import math
+import queue
+import threading
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Any
+
+from .brewery import BreweryAPI
+from .models import Brewery, SearchQuery
+
+# SearchQuery fields that may be given several values, and the brewery record
+# key each one filters on.
+MULTI_VALUE_FIELDS = {
+    "city": "city",
+    "country": "country",
+    "name": "name",
+    "postal": "postal_code",
+    "state": "state",
+    "type": "brewery_type",
+}
+# Default upper bound on the number of API queries a plan may expand into.
+MAX_QUERIES = 8
+# Ends the pages of one query in `run_plan`.
+_DONE = object()
+
+
+def value_matches(name: str, wanted: str, actual: Any) -> bool:
+    """
+    Whether a record value satisfies one filter value, like the API does:
+    names match as substrings, postal codes as prefixes, and everything else
+    exactly, all case-insensitively.
+    """
+    if not isinstance(actual, str):
+        return False
+    wanted, actual = wanted.casefold(), actual.casefold()
+    if name == "name":
+        return wanted in actual
+    if name == "postal":
+        return actual.startswith(wanted)
+    return wanted == actual
+
+
+@dataclass
+class QueryPlan:
+    """
+    The API queries that together answer a multi-valued search.
+
+    Attributes:
+        queries (list[SearchQuery]): One query per combination of the values
+            sent to the server.
+        residual (dict[str, tuple[str, ...]]): Filters applied client-side
+            instead, by `SearchQuery` field. A record must match one of the
+            values of every residual field.
+    """
+
+    queries: list[SearchQuery]
+    residual: dict[str, tuple[str, ...]] = field(default_factory=dict)
+
+    @property
+    def is_simple(self) -> bool:
+        """Whether the plan is a single query with no client-side filter."""
+        return len(self.queries) == 1 and not self.residual
+
+    def matches(self, record: dict) -> bool:
+        """Whether a brewery record passes the client-side filters."""
+        return all(
+            any(
+                value_matches(name, value, record.get(MULTI_VALUE_FIELDS[name]))
+                for value in values
+            )
+            for name, values in self.residual.items()
+        )
+
+    def merge(self, results: Iterable[Iterable[dict]]) -> Iterator[dict]:
+        """
+        Yields the records of every query once per ID, in plan order, that
+        pass the client-side filters.
+        """
+        seen: set[str] = set()
+        for records in results:
+            for record in records:
+                if record["id"] in seen or not self.matches(record):
+                    continue
+                seen.add(record["id"])
+                yield record
+
+    def merge_breweries(
+        self, results: Iterable[Iterable[Brewery]]
+    ) -> Iterator[Brewery]:
+        """Like `merge`, for parsed breweries."""
+        seen: set[str] = set()
+        for breweries in results:
+            for brewery in breweries:
+                if brewery.id in seen or (
+                    self.residual and not self.matches(brewery.to_flat_dict())
+                ):
+                    continue
+                seen.add(brewery.id)
+                yield brewery
+
+
+def plan_search(
+    values: dict[str, Sequence[str]], max_queries: int = MAX_QUERIES, **fields: Any
+) -> QueryPlan:
+    """
+    Expands multi-valued filters into the fewest queries that cover them.
+
+    Every combination of values needs its own API query, since each filter
+    takes a single value. When that would exceed `max_queries`, the filters
+    with the most values are applied client-side instead, trading a broader
+    download for fewer requests.
+
+    Args:
+        values (dict[str, Sequence[str]]): Values per field in
+            `MULTI_VALUE_FIELDS`; empty sequences leave a field unfiltered.
+            Repeated values (ignoring case) are dropped.
+        max_queries (int): The most queries the plan may contain.
+        **fields: Other `SearchQuery` fields shared by every query.
+
+    Returns:
+        QueryPlan: The queries and any client-side filters.
+    """
+    server: dict[str, tuple[str, ...]] = {}
+    for name, given in values.items():
+        unique: dict[str, str] = {}
+        for value in given:
+            unique.setdefault(value.casefold(), value)
+        if unique:
+            server[name] = tuple(unique.values())
+
+    residual: dict[str, tuple[str, ...]] = {}
+    while math.prod(len(v) for v in server.values()) > max_queries:
+        widest = max(server, key=lambda name: len(server[name]))
+        residual[widest] = server.pop(widest)
+
+    queries = []
+    for combination in product(*server.values()):
+        combined: dict[str, Any] = dict(zip(server, combination, strict=True))
+        queries.append(SearchQuery(**fields, **combined))
+    return QueryPlan(queries=queries, residual=residual)
+
+
+def run_plan(
+    client: BreweryAPI,
+    plan: QueryPlan,
+    concurrency: int = 4,
+    prefetch: int = 2,
+    first_page_only: bool = False,
+) -> Iterator[list[dict]]:
+    """
+    Runs every query of `plan` concurrently and yields their pages in plan
+    order.
+
+    Each query is paged through to the end on a worker thread, which stays
+    at most `prefetch` pages ahead of the consumer, so memory is bounded by
+    the pages in flight rather than by the size of the results. Records are
+    yielded once per ID, after the client-side filters.
+
+    Args:
+        client (BreweryAPI): An open client, shared by the worker threads.
+        plan (QueryPlan): The queries to run.
+        concurrency (int): Maximum number of queries in flight at once.
+        prefetch (int): Pages buffered per query ahead of the consumer.
+        first_page_only (bool): Fetch only the page each query asks for, as
+            one search per query would, instead of paging to the end.
+
+    Yields:
+        list[dict]: The new records of each page, possibly none.
+
+    Raises:
+        httpx.HTTPError: If any query fails.
+    """
+    stop = threading.Event()
+
+    def put(pages: queue.Queue, item: Any) -> bool:
+        """Queues `item` unless the consumer stopped; returns whether it did."""
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            return True
+        return False
+
+    def fetch(query: SearchQuery, pages: queue.Queue) -> None:
+        try:
+            for page in (
+                [client.get_brewery_filters(query)]
+                if first_page_only
+                else client.iter_brewery_pages(query)
+            ):
+                if not put(pages, page):
+                    return
+        except Exception as exc:  # raised again by the consumer
+            put(pages, exc)
+            return
+        put(pages, _DONE)
+
+    streams: list[queue.Queue] = [queue.Queue(prefetch) for _ in plan.queries]
+    pool = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        # Queries start in plan order, so the one being consumed always has
+        # a worker.
+        for query, pages in zip(plan.queries, streams, strict=True):
+            pool.submit(fetch, query, pages)
+        seen: set[str] = set()
+        for pages in streams:
+            while (page := pages.get()) is not _DONE:
+                if isinstance(page, Exception):
+                    raise page
+                fresh = []
+                for record in page:
+                    if record["id"] in seen or not plan.matches(record):
+                        continue
+                    seen.add(record["id"])
+                    fresh.append(record)
+                yield fresh
+    finally:
+        stop.set()
+        pool.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,160 @@
+"""Client-side ordering and top-K selection of streamed search results."""
+
+import heapq
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any
+
+from .geo import haversine_km
+from .models import Brewery, Coordinate
+
+# Fields search results can be sorted by.
+SORT_FIELDS = ("name", "city", "state", "type", "distance")
+
+_FIELD_VALUES: dict[str, Callable[[Brewery], Any]] = {
+    "name": lambda brewery: brewery.name,
+    "city": lambda brewery: brewery.address.city,
+    "state": lambda brewery: brewery.address.state,
+    "type": lambda brewery: brewery.brewery_type,
+}
+
+
+def distance_km(brewery: Brewery, center: Coordinate) -> float | None:
+    """Great-circle distance from `center`, or `None` without a coordinate."""
+    coordinate = brewery.address.coordinate
+    if coordinate is None:
+        return None
+    return haversine_km(
+        center.latitude, center.longitude, coordinate.latitude, coordinate.longitude
+    )
+
+
+def sort_key(
+    field: str, center: Coordinate | None = None, descending: bool = False
+) -> Callable[[Brewery], tuple]:
+    """
+    A key ordering breweries by `field`, with missing values last.
+
+    Text compares case-insensitively. The key is meant for `sorted` when
+    ascending and `heapq.nlargest`-style selection when `descending`, so the
+    missing-value flag is inverted for the latter to keep them last.
+
+    Args:
+        field (str): One of `SORT_FIELDS`.
+        center (Coordinate | None): The origin for "distance".
+        descending (bool): Whether the key will be used largest first.
+
+    Raises:
+        ValueError: If `field` is unknown, or is "distance" without `center`.
+    """
+    present = 1 if descending else 0
+    missing = 1 - present
+
+    if field == "distance":
+        if center is None:
+            raise ValueError("Sorting by distance needs a center coordinate.")
+        origin = center
+
+        def by_distance(brewery: Brewery) -> tuple:
+            distance = distance_km(brewery, origin)
+            return (missing, 0.0) if distance is None else (present, distance)
+
+        return by_distance
+
+    if field not in _FIELD_VALUES:
+        raise ValueError(
+            f"Invalid sort field {field!r}. Must be one of {', '.join(SORT_FIELDS)}."
+        )
+    value_of = _FIELD_VALUES[field]
+
+    def by_field(brewery: Brewery) -> tuple:
+        value = value_of(brewery)
+        return (missing, "") if not value else (present, str(value).casefold())
+
+    return by_field
+
+
+def select(
+    breweries: Iterable[Brewery],
+    key: Callable[[Brewery], Any] | None = None,
+    limit: int | None = None,
+    descending: bool = False,
+    presorted: bool = False,
+) -> list[Brewery]:
+    """
+    Orders a stream of breweries and keeps the first `limit`.
+
+    With a limit, selection runs on a heap bounded to `limit` entries
+    (`heapq.nsmallest`/`nlargest`), so memory stays O(limit) however long
+    the stream is. When the stream is `presorted` (already in the requested
+    order, or no `key` is given) only its first `limit` breweries are
+    consumed, so a lazily paged stream stops fetching as soon as the answer
+    is known. Ties keep their stream order.
+
+    Args:
+        breweries (Iterable[Brewery]): The stream to select from.
+        key (Callable | None): Sort key, e.g. from `sort_key`; `None` keeps
+            the stream order.
+        limit (int | None): How many breweries to keep; `None` keeps all.
+        descending (bool): Whether to order largest key first.
+        presorted (bool): Whether the stream is already ordered by `key`.
+
+    Returns:
+        list[Brewery]: The selected breweries, in order.
+    """
+    if key is None or presorted:
+        return list(islice(breweries, limit))
+    if limit is None:
+        return sorted(breweries, key=key, reverse=descending)
+    choose = heapq.nlargest if descending else heapq.nsmallest
+    return choose(limit, breweries, key=key)
+
+
+@dataclass(frozen=True)
+class Ordering:
+    """
+    How search results are ordered and cut down.
+
+    Attributes:
+        key (Callable | None): Sort key from `sort_key`; `None` keeps the
+            order results arrive in.
+        limit (int | None): How many results to keep; `None` keeps all.
+        descending (bool): Whether to order largest key first.
+        server_order (bool): Whether the API already returns results in this
+            order: with no key, or nearest first for a `by_dist` query.
+    """
+
+    key: Callable[[Brewery], Any] | None = None
+    limit: int | None = None
+    descending: bool = False
+    server_order: bool = True
+
+    @classmethod
+    def of(
+        cls,
+        field: str | None,
+        center: Coordinate | None = None,
+        descending: bool = False,
+        limit: int | None = None,
+    ) -> "Ordering":
+        """
+        The ordering for a `--sort-by` field (or none) and `--limit`.
+
+        Raises:
+            ValueError: As `sort_key` does.
+        """
+        if field is None:
+            return cls(limit=limit)
+        return cls(
+            key=sort_key(field, center, descending),
+            limit=limit,
+            descending=descending,
+            server_order=field == "distance" and not descending,
+        )
+
+    def apply(
+        self, breweries: Iterable[Brewery], presorted: bool = False
+    ) -> list[Brewery]:
+        """`select` with this ordering; see there for `presorted`."""
+        return select(breweries, self.key, self.limit, self.descending, presorted)
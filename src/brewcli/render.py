@@ -1,15 +1,26 @@
 """Rich-based rendering helpers for displaying breweries in the terminal."""
 
+from collections.abc import Callable, Iterable, Sequence
+from contextlib import AbstractContextManager, nullcontext
+
 from rich.box import ROUNDED, SIMPLE_HEAVY
 from rich.console import Console
+from rich.live import Live
 from rich.panel import Panel
 from rich.style import Style
 from rich.table import Table
 from rich.text import Text
 
+from .cache import CacheStats
+from .compress import CodecReport
+from .dedupe import DuplicateCluster
+from .memprofile import MemoryProfile
 from .models import Brewery
+from .stats import BreweryStats
+from .timings import NETWORK_SUBPHASES, PHASE_ORDER, Timings
 
 console = Console()
+err_console = Console(stderr=True)
 
 # Shown in place of a missing value.
 PLACEHOLDER = "—"
@@ -28,6 +39,21 @@ def _website_text(url: str | None) -> Text:
     return Text(display, style=Style(link=url, color="blue", underline=True))
 
 
+def _format_bytes(size: float) -> str:
+    """Human-readable byte count, e.g. "1.5 MiB"."""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+def _short_site(site: str) -> str:
+    """Trims an allocation site "path:line" to its last two path components."""
+    path, _, line = site.rpartition(":")
+    return "/".join(path.replace("\\", "/").split("/")[-2:]) + f":{line}"
+
+
 def _location(brewery: Brewery) -> str:
     """Human-readable "City, State" string, falling back gracefully."""
     address = brewery.address
@@ -35,27 +61,95 @@ def _location(brewery: Brewery) -> str:
     return ", ".join(parts) if parts else PLACEHOLDER
 
 
-def render_breweries(breweries: list[Brewery], out: Console = console) -> None:
-    """Print a list of breweries as a table."""
+def _breweries_table(*leading: str) -> Table:
+    """
+    An empty brewery list table with its column headers, after any `leading`
+    right-aligned columns such as a distance.
+    """
     table = Table(box=SIMPLE_HEAVY, header_style="bold magenta", expand=False)
+    for header in leading:
+        table.add_column(header, justify="right", no_wrap=True)
     table.add_column("Name", style="bold cyan")
     table.add_column("Type", style="green")
     table.add_column("Location")
     table.add_column("Phone")
     table.add_column("Website")
+    return table
 
-    for brewery in breweries:
-        table.add_row(
-            brewery.name,
-            brewery.brewery_type or PLACEHOLDER,
-            _location(brewery),
-            brewery.phone or PLACEHOLDER,
-            _website_text(brewery.website_url),
-        )
+
+def _add_brewery_row(table: Table, brewery: Brewery, *leading: str) -> None:
+    table.add_row(
+        *leading,
+        brewery.name,
+        brewery.brewery_type or PLACEHOLDER,
+        _location(brewery),
+        brewery.phone or PLACEHOLDER,
+        _website_text(brewery.website_url),
+    )
+
+
+def render_breweries(
+    breweries: list[Brewery],
+    out: Console = console,
+    distances: Sequence[float | None] | None = None,
+    unit: str = "km",
+) -> None:
+    """
+    Print a list of breweries as a table.
+
+    Args:
+        breweries (list[Brewery]): The breweries, in display order.
+        out (Console): Where to print the table.
+        distances (Sequence[float | None] | None): Distance of each brewery,
+            shown in a leading column when given; `None` leaves it blank.
+        unit (str): Label for the distance column.
+    """
+    if distances is None:
+        table = _breweries_table()
+        for brewery in breweries:
+            _add_brewery_row(table, brewery)
+    else:
+        table = _breweries_table(f"Distance ({unit})")
+        for brewery, distance in zip(breweries, distances, strict=True):
+            _add_brewery_row(
+                table, brewery, "" if distance is None else f"{distance:.1f}"
+            )
 
     out.print(table)
 
 
+def render_brewery_stream(
+    batches: Iterable[list[Brewery]],
+    out: Console = console,
+    measure: Callable[[str], AbstractContextManager] = lambda _: nullcontext(),
+) -> int:
+    """
+    Print breweries as a table that grows as each batch arrives.
+
+    On an interactive terminal the table is redrawn live; otherwise it is
+    printed once the stream is exhausted (or interrupted by an error).
+
+    Args:
+        batches (Iterable[list[Brewery]]): Breweries, in arrival order.
+        out (Console): Where to print the table.
+        measure (Callable): Wraps each batch's rendering as a "render" phase,
+            excluding the time spent waiting for the next batch.
+
+    Returns:
+        int: The number of breweries rendered.
+    """
+    table = _breweries_table()
+    count = 0
+    with Live(table, console=out, auto_refresh=False) as live:
+        for batch in batches:
+            with measure("render"):
+                for brewery in batch:
+                    _add_brewery_row(table, brewery)
+                live.refresh()
+            count += len(batch)
+    return count
+
+
 def render_brewery(brewery: Brewery, out: Console = console) -> None:
     """Print a single brewery as a detailed panel."""
     address = brewery.address
@@ -78,3 +172,178 @@ def render_brewery(brewery: Brewery, out: Console = console) -> None:
     title.append(f"  ({brewery.brewery_type})", style="green")
 
     out.print(Panel(body, title=title, title_align="left", box=ROUNDED, expand=False))
+
+
+def render_timings(timings: Timings, out: Console = err_console) -> None:
+    """Print a compact per-phase latency breakdown."""
+    total = timings.total
+    table = Table(
+        box=SIMPLE_HEAVY,
+        header_style="bold magenta",
+        title="Timings",
+        title_justify="left",
+        expand=False,
+    )
+    table.add_column("Phase")
+    table.add_column("Time (ms)", justify="right")
+    table.add_column("Calls", justify="right")
+    table.add_column("Share", justify="right")
+
+    extra = sorted(set(timings.durations) - set(PHASE_ORDER))
+    for name in PHASE_ORDER + extra:
+        if name not in timings.durations:
+            continue
+        seconds = timings.durations[name]
+        label = f"  {name}" if name in NETWORK_SUBPHASES else name
+        share = f"{seconds / total:.0%}" if total else PLACEHOLDER
+        table.add_row(label, f"{seconds * 1000:.1f}", str(timings.calls[name]), share)
+    table.add_row("total", f"{total * 1000:.1f}", "", "", style="bold")
+
+    out.print(table)
+    out.print(
+        f"{timings.requests} request(s), {timings.bytes_received:,} bytes received "
+        f"({timings.bytes_decoded:,} decoded, {timings.compression_ratio:.1f}x), "
+        f"{timings.records} record(s)",
+        style="dim",
+    )
+
+
+def render_memprofile(profile: MemoryProfile, out: Console = err_console) -> None:
+    """Print peak memory and the top allocation sites for each phase."""
+    table = Table(
+        box=SIMPLE_HEAVY,
+        header_style="bold magenta",
+        title="Memory",
+        title_justify="left",
+        expand=False,
+    )
+    table.add_column("Phase")
+    table.add_column("Peak", justify="right")
+    table.add_column("Retained", justify="right")
+    table.add_column("Top allocation sites")
+
+    for result in profile.phases.values():
+        sites = "\n".join(
+            f"{_format_bytes(size):>10}  {_short_site(site)}"
+            for site, size in result.top_sites(profile.top)
+        )
+        table.add_row(
+            result.name,
+            _format_bytes(result.peak),
+            _format_bytes(result.retained),
+            sites or PLACEHOLDER,
+        )
+
+    out.print(table)
+    out.print(f"Peak across phases: {_format_bytes(profile.peak)}", style="dim")
+
+
+def render_stats(stats: BreweryStats, top: int = 10, out: Console = console) -> None:
+    """Print grouped counts and field coverage, `top` rows per group."""
+    for name, counts in stats.groups.items():
+        table = Table(
+            box=SIMPLE_HEAVY,
+            header_style="bold magenta",
+            title=f"By {name.replace('_', ' ')}",
+            title_justify="left",
+            expand=False,
+        )
+        table.add_column(name.replace("_", " ").capitalize(), style="bold cyan")
+        table.add_column("Count", justify="right")
+        table.add_column("Share", justify="right")
+        for value, count in counts.most_common(top):
+            table.add_row(value, f"{count:,}", f"{count / stats.total:.1%}")
+        if len(counts) > top:
+            rest = stats.total - sum(count for _, count in counts.most_common(top))
+            table.add_row(
+                f"{len(counts) - top} more",
+                f"{rest:,}",
+                f"{rest / stats.total:.1%}",
+                style="dim",
+            )
+        out.print(table)
+
+    table = Table(
+        box=SIMPLE_HEAVY,
+        header_style="bold magenta",
+        title="Missing fields",
+        title_justify="left",
+        expand=False,
+    )
+    table.add_column("Field")
+    table.add_column("Missing", justify="right")
+    for name, rate in stats.missing_rates().items():
+        if rate:
+            table.add_row(name, f"{rate:.1%}")
+    out.print(table)
+    out.print(
+        f"{stats.total:,} breweries, {stats.coordinate_coverage:.1%} with coordinates",
+        style="dim",
+    )
+
+
+def render_duplicates(clusters: list[DuplicateCluster], out: Console = console) -> None:
+    """Print clusters of likely duplicates as one table, numbered by cluster."""
+    table = _breweries_table("#")
+    for number, cluster in enumerate(clusters, start=1):
+        for position, brewery in enumerate(cluster.breweries):
+            _add_brewery_row(table, brewery, str(number) if position == 0 else "")
+        table.add_section()
+    out.print(table)
+
+
+def render_codecs(reports: list[CodecReport], out: Console = console) -> None:
+    """Print the size, ratio and costs of each codec on a sample payload."""
+    table = Table(
+        box=SIMPLE_HEAVY,
+        header_style="bold magenta",
+        title="Codecs",
+        title_justify="left",
+        expand=False,
+    )
+    table.add_column("Codec", style="bold cyan")
+    table.add_column("Size", justify="right")
+    table.add_column("Ratio", justify="right")
+    table.add_column("Compress (ms)", justify="right")
+    table.add_column("Decode (ms)", justify="right")
+    table.add_column("Decode MB/s", justify="right")
+    for report in reports:
+        table.add_row(
+            report.codec,
+            _format_bytes(report.compressed),
+            f"{report.ratio:.1f}x",
+            f"{report.compress_seconds * 1000:.1f}",
+            f"{report.decompress_seconds * 1000:.1f}",
+            f"{report.decode_mb_per_second:,.0f}",
+        )
+    out.print(table)
+
+
+def render_cache_stats(
+    stats: dict[str, CacheStats], entries: int, size: int, out: Console = console
+) -> None:
+    """Print lookups and hit rate per cache layer, and the on-disk cache size."""
+    table = Table(
+        box=SIMPLE_HEAVY,
+        header_style="bold magenta",
+        title="Cache",
+        title_justify="left",
+        expand=False,
+    )
+    table.add_column("Layer", style="bold cyan")
+    table.add_column("Lookups", justify="right")
+    table.add_column("Hits", justify="right")
+    table.add_column("Stale", justify="right")
+    table.add_column("Misses", justify="right")
+    table.add_column("Hit rate", justify="right")
+    for layer, counts in stats.items():
+        table.add_row(
+            layer,
+            f"{counts.lookups:,}",
+            f"{counts.hits:,}",
+            f"{counts.stale_hits:,}",
+            f"{counts.misses:,}",
+            f"{counts.hit_rate:.1%}",
+        )
+    out.print(table)
+    out.print(f"On disk: {entries:,} responses, {_format_bytes(size)}")
@@ -0,0 +1,210 @@
+"""Hedged requests and a circuit breaker, to bound the latency of API calls."""
+
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+
+import httpx
+
+# Status codes that mean the API itself is failing, rather than the request.
+FAILURE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class CircuitOpenError(httpx.HTTPError):
+    """Raised instead of sending a request while the circuit is open."""
+
+
+def is_failure(exc: httpx.HTTPError) -> bool:
+    """
+    Whether an error counts against the API's health: transport errors,
+    rate limiting and server errors do, while a 404 or other client error
+    is an answer like any other.
+    """
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in FAILURE_STATUSES
+    return isinstance(exc, httpx.TransportError)
+
+
+class CircuitBreaker:
+    """
+    Fails fast after repeated failures instead of waiting on a broken API.
+
+    The circuit starts closed and lets every request through. After
+    `failure_threshold` consecutive failures it opens, and requests are
+    refused for `reset_timeout` seconds. It is then half-open: a single
+    trial request goes through, and closes the circuit if it succeeds or
+    opens it again if it fails.
+
+    Example:
+        >>> breaker = CircuitBreaker(failure_threshold=2)
+        >>> breaker.record_failure(); breaker.record_failure()
+        >>> breaker.allow()
+        False
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open the circuit.
+            reset_timeout (float): Seconds the circuit stays open before a
+                trial request is let through.
+            clock (Callable[[], float]): Monotonic time source, for tests.
+
+        Raises:
+            ValueError: If the threshold is below 1 or the timeout negative.
+        """
+        if failure_threshold < 1:
+            raise ValueError("failure_threshold must be at least 1.")
+        if reset_timeout < 0:
+            raise ValueError("reset_timeout must not be negative.")
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._clock = clock
+        self._opened_at = 0.0
+        self._state = self.CLOSED
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """`CLOSED`, `OPEN` or `HALF_OPEN`."""
+        with self._lock:
+            if (
+                self._state == self.OPEN
+                and self._clock() - self._opened_at >= self.reset_timeout
+            ):
+                return self.HALF_OPEN
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Whether repeated failures have tripped the circuit."""
+        return self.state != self.CLOSED
+
+    def allow(self) -> bool:
+        """
+        Whether a request may be sent now. A `True` while half-open admits
+        the trial request, whose outcome must then be recorded, or which must
+        be released if it has none.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        """Closes the circuit and clears the failure count."""
+        with self._lock:
+            self.failures = 0
+            self._state = self.CLOSED
+            self._trial_in_flight = False
+
+    def release(self) -> None:
+        """
+        Ends a request that had no outcome, such as one interrupted before
+        an answer, so a half-open circuit admits another trial.
+        """
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Counts a failure, opening the circuit at the threshold or on a trial."""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class Hedging:
+    """
+    When to send a duplicate of a request that is slower than usual.
+
+    Latencies of successful requests are kept per endpoint, in a window of
+    the most recent `window`. A request still unanswered after the window's
+    `percentile` latency is sent again, and whichever copy answers first is
+    used, so a slow outlier costs about one typical latency more rather than
+    its own. At the 95th percentile about one request in twenty is hedged.
+
+    Until `min_samples` latencies were seen for an endpoint, `initial_delay`
+    is used. The delay is always kept between `min_delay` and `max_delay`.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        percentile: float = 95.0,
+        *,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.05,
+        max_delay: float = 5.0,
+        window: int = 200,
+        min_samples: int = 20,
+    ):
+        """
+        Args:
+            percentile (float): Latency percentile, 0 to 100, after which a
+                request is hedged.
+            initial_delay (float): Seconds to wait before hedging while there
+                are too few samples.
+            min_delay (float): Shortest delay in seconds, so fast endpoints
+                are not hedged on jitter alone.
+            max_delay (float): Longest delay in seconds.
+            window (int): Recent latencies kept per endpoint.
+            min_samples (int): Latencies needed before the percentile is used.
+
+        Raises:
+            ValueError: If the percentile is outside 0 to 100, or the delays
+                are out of order.
+        """
+        if not 0 <= percentile <= 100:
+            raise ValueError("percentile must be between 0 and 100.")
+        if not 0 <= min_delay <= max_delay:
+            raise ValueError("min_delay must be between 0 and max_delay.")
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self._window = window
+        self._latencies: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, seconds: float) -> None:
+        """Records the latency of a successful request to `endpoint`."""
+        with self._lock:
+            latencies = self._latencies.get(endpoint)
+            if latencies is None:
+                latencies = self._latencies[endpoint] = deque(maxlen=self._window)
+            latencies.append(seconds)
+
+    def delay(self, endpoint: str) -> float:
+        """Seconds to wait for a request to `endpoint` before hedging it."""
+        with self._lock:
+            latencies = sorted(self._latencies.get(endpoint, ()))
+        if len(latencies) < self.min_samples:
+            delay = self.initial_delay
+        else:
+            # Nearest-rank percentile.
+            rank = math.ceil(self.percentile / 100 * len(latencies))
+            delay = latencies[max(rank, 1) - 1]
+        return min(max(delay, self.min_delay), self.max_delay)
@@ -0,0 +1,59 @@
+"""Coalescing of identical concurrent calls into a single execution."""
+
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time; concurrent callers share its result.
+
+    The first caller for a key (the leader) executes the function. Callers
+    arriving while it is in flight wait for and receive the same result, or
+    the same exception. Once the call finishes the key is forgotten, so later
+    callers trigger a fresh execution.
+
+    Attributes:
+        saved (int): Number of calls answered by another caller's execution.
+    """
+
+    def __init__(self) -> None:
+        self.saved = 0
+        self._calls: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> tuple[T, bool]:
+        """
+        Executes `fn` unless a call with the same `key` is already in flight.
+
+        Returns:
+            tuple[T, bool]: The result and whether it was shared with an
+                in-flight call rather than computed by this caller.
+        """
+        with self._lock:
+            pending = self._calls.get(key)
+            if pending is None:
+                future: Future = Future()
+                self._calls[key] = future
+            else:
+                self.saved += 1
+        if pending is not None:
+            return pending.result(), True
+
+        try:
+            result = fn()
+        except BaseException as exc:
+            self._forget(key)
+            future.set_exception(exc)
+            raise
+        self._forget(key)
+        future.set_result(result)
+        return result, False
+
+    def _forget(self, key: Hashable) -> None:
+        with self._lock:
+            del self._calls[key]
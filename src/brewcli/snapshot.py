@@ -0,0 +1,255 @@
+"""
+A compact, memory-mapped binary snapshot of the brewery dataset.
+
+Opening a snapshot only maps the file; breweries are decoded one at a time on
+access, so cold-start lookups cost the same whatever the dataset size.
+
+Layout (little-endian, sections 8-byte aligned)::
+
+    header     MAGIC, record count, string count, section offsets
+    records    one fixed-width row per brewery, sorted by ID: a u32 string
+               index per field in `STRING_FIELDS` (`NULL` for None)
+    latitude   float64 per record (NaN when the brewery has no coordinate)
+    longitude  float64 per record
+    offsets    u32 per string plus a final end offset into the string data
+    strings    deduplicated UTF-8 string data
+"""
+
+import math
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from .models import Brewery
+from .paths import default_mirror_path
+
+MAGIC = b"BRWSNAP1"
+NULL = 0xFFFFFFFF
+
+# Every flattened field except the coordinates, in record order. "id" must stay
+# first: lookups binary-search on it.
+STRING_FIELDS = (
+    "id",
+    "name",
+    "brewery_type",
+    "phone",
+    "website_url",
+    "address_one",
+    "address_two",
+    "address_three",
+    "postal_code",
+    "city",
+    "state",
+    "country",
+    "street",
+)
+
+_HEADER = struct.Struct("<8sII5Q")
+_RECORD = struct.Struct(f"<{len(STRING_FIELDS)}I")
+_FLOAT = struct.Struct("<d")
+_OFFSET = struct.Struct("<I")
+
+
+def default_snapshot_path() -> Path:
+    """`snapshot.bin` next to the mirror database."""
+    return default_mirror_path().with_name("snapshot.bin")
+
+
+def _pad(size: int) -> int:
+    return -size % 8
+
+
+def write_snapshot(breweries: Iterable[Brewery], path: Path | str) -> int:
+    """
+    Writes `breweries` as a snapshot, replacing `path` atomically.
+
+    Args:
+        breweries (Iterable[Brewery]): The dataset. Duplicate IDs keep the
+            last occurrence.
+        path (Path | str): The snapshot file.
+
+    Returns:
+        int: Number of breweries written.
+    """
+    by_id = {brewery.id: brewery.to_flat_dict() for brewery in breweries}
+    records = [by_id[key] for key in sorted(by_id, key=str.encode)]
+
+    strings: dict[str, int] = {}
+    rows = bytearray()
+    latitudes = bytearray()
+    longitudes = bytearray()
+    for record in records:
+        indexes = []
+        for name in STRING_FIELDS:
+            value = record[name]
+            indexes.append(
+                NULL if value is None else strings.setdefault(value, len(strings))
+            )
+        rows += _RECORD.pack(*indexes)
+        latitude, longitude = record["latitude"], record["longitude"]
+        if latitude is None or longitude is None:
+            latitude = longitude = math.nan
+        latitudes += _FLOAT.pack(latitude)
+        longitudes += _FLOAT.pack(longitude)
+
+    data = bytearray()
+    offsets = bytearray()
+    for value in strings:
+        offsets += _OFFSET.pack(len(data))
+        data += value.encode()
+    offsets += _OFFSET.pack(len(data))
+
+    sections = [rows, latitudes, longitudes, offsets, data]
+    starts = []
+    position = _HEADER.size + _pad(_HEADER.size)
+    for section in sections:
+        starts.append(position)
+        position += len(section) + _pad(len(section))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp.open("wb") as file:
+        header = _HEADER.pack(MAGIC, len(records), len(strings), *starts)
+        file.write(header + bytes(_pad(len(header))))
+        for section in sections:
+            file.write(section + bytes(_pad(len(section))))
+    os.replace(tmp, path)
+    return len(records)
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped access to a snapshot written by `write_snapshot`.
+
+    Example:
+        >>> with Snapshot(default_snapshot_path()) as snapshot:
+        ...     brewery = snapshot.get("b54b16e1-ac3b-4bff-a11f-f7ae9ddc27e0")
+
+    Raises:
+        ValueError: On entry, if the file is not a brewcli snapshot or is
+            truncated.
+    """
+
+    def __init__(self, path: Path | str | None = None):
+        """
+        Args:
+            path (Path | str | None): The snapshot file. Defaults to
+                `default_snapshot_path()`.
+        """
+        self.path = Path(path) if path else default_snapshot_path()
+        self._map: mmap.mmap
+        self._count = 0
+
+    def __enter__(self) -> "Snapshot":
+        with self.path.open("rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, count, strings, *starts = _HEADER.unpack_from(self._map)
+        except struct.error:
+            magic = None
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError(f"{self.path} is not a brewcli snapshot.")
+        if not self._is_whole(count, strings, starts):
+            self._map.close()
+            raise ValueError(f"{self.path} is truncated.")
+        self._count = count
+        (
+            self._records,
+            self._latitudes,
+            self._longitudes,
+            self._offsets,
+            self._strings,
+        ) = starts
+        return self
+
+    def _is_whole(self, count: int, strings: int, starts: list[int]) -> bool:
+        """Whether the mapped file holds every section its header describes."""
+        records, latitudes, longitudes, offsets, data = starts
+        size = len(self._map)
+        if (
+            records + count * _RECORD.size > latitudes
+            or latitudes + count * _FLOAT.size > longitudes
+            or longitudes + count * _FLOAT.size > offsets
+            or offsets + (strings + 1) * _OFFSET.size > data
+            or data > size
+        ):
+            return False
+        (end,) = _OFFSET.unpack_from(self._map, offsets + strings * _OFFSET.size)
+        return data + end <= size
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._map.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Brewery]:
+        for index in range(self._count):
+            yield self.record(index)
+
+    def _string_bytes(self, index: int) -> bytes:
+        start, end = struct.unpack_from(
+            "<2I", self._map, self._offsets + index * _OFFSET.size
+        )
+        return self._map[self._strings + start : self._strings + end]
+
+    def _string(self, index: int) -> str | None:
+        return None if index == NULL else self._string_bytes(index).decode()
+
+    def _id_bytes(self, index: int) -> bytes:
+        (string,) = _OFFSET.unpack_from(self._map, self._records + index * _RECORD.size)
+        return self._string_bytes(string)
+
+    def coordinate(self, index: int) -> tuple[float, float] | None:
+        """The (latitude, longitude) of record `index`, if it has one."""
+        (latitude,) = _FLOAT.unpack_from(
+            self._map, self._latitudes + index * _FLOAT.size
+        )
+        (longitude,) = _FLOAT.unpack_from(
+            self._map, self._longitudes + index * _FLOAT.size
+        )
+        if math.isnan(latitude):
+            return None
+        return latitude, longitude
+
+    def record(self, index: int) -> Brewery:
+        """
+        Decodes the brewery at row `index` (in ID order).
+
+        Raises:
+            IndexError: If `index` is out of range.
+        """
+        if not 0 <= index < self._count:
+            raise IndexError(f"Snapshot record {index} out of range.")
+        indexes = _RECORD.unpack_from(self._map, self._records + index * _RECORD.size)
+        record: dict = {
+            name: self._string(string)
+            for name, string in zip(STRING_FIELDS, indexes, strict=True)
+        }
+        coordinate = self.coordinate(index)
+        record["latitude"], record["longitude"] = coordinate or (None, None)
+        return Brewery.from_flat_dict(record)
+
+    def index_of(self, brewery_id: str) -> int | None:
+        """The row of `brewery_id`, found by binary search on the mapped IDs."""
+        target = brewery_id.encode()
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._id_bytes(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._count and self._id_bytes(low) == target:
+            return low
+        return None
+
+    def get(self, brewery_id: str) -> Brewery | None:
+        """Looks up one brewery by ID."""
+        index = self.index_of(brewery_id)
+        return None if index is None else self.record(index)
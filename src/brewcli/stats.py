@@ -0,0 +1,85 @@
+"""Single-pass aggregate statistics over a stream of breweries."""
+
+import json
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from .mirror import FIELDS
+from .models import Brewery
+
+# Fields breweries are grouped and counted by.
+GROUP_FIELDS = ("state", "brewery_type", "country")
+# Group key for breweries with no value in a grouped field.
+UNKNOWN = "unknown"
+
+
+@dataclass
+class BreweryStats:
+    """
+    Grouped counts, coordinate coverage and missing-field rates.
+
+    Breweries are folded in one at a time, so memory depends only on the
+    number of distinct group values, never on the number of breweries.
+
+    Attributes:
+        total (int): Number of breweries seen.
+        with_coordinate (int): Breweries that have a valid coordinate.
+        groups (dict[str, Counter[str]]): Counts per value of each field in
+            `GROUP_FIELDS`.
+        missing (Counter[str]): Number of breweries with each field empty.
+    """
+
+    total: int = 0
+    with_coordinate: int = 0
+    groups: dict[str, Counter[str]] = field(
+        default_factory=lambda: {name: Counter() for name in GROUP_FIELDS}
+    )
+    missing: Counter[str] = field(default_factory=Counter)
+
+    def add(self, brewery: Brewery) -> None:
+        """Folds one brewery into the statistics."""
+        record = brewery.to_flat_dict()
+        self.total += 1
+        if brewery.address.coordinate is not None:
+            self.with_coordinate += 1
+        for name in GROUP_FIELDS:
+            self.groups[name][record[name] or UNKNOWN] += 1
+        for name in FIELDS:
+            if record[name] is None or record[name] == "":
+                self.missing[name] += 1
+
+    def update(self, breweries: Iterable[Brewery]) -> "BreweryStats":
+        """Folds every brewery in `breweries` and returns `self`."""
+        for brewery in breweries:
+            self.add(brewery)
+        return self
+
+    @property
+    def coordinate_coverage(self) -> float:
+        """Share of breweries with a coordinate, 0.0 when there are none."""
+        return self.with_coordinate / self.total if self.total else 0.0
+
+    def missing_rates(self) -> dict[str, float]:
+        """Share of breweries missing each field, in `FIELDS` order."""
+        return {
+            name: self.missing[name] / self.total if self.total else 0.0
+            for name in FIELDS
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        """The statistics as plain data, groups ordered by descending count."""
+        return {
+            "total": self.total,
+            "with_coordinate": self.with_coordinate,
+            "coordinate_coverage": self.coordinate_coverage,
+            "groups": {
+                name: dict(counts.most_common()) for name, counts in self.groups.items()
+            },
+            "missing_rates": self.missing_rates(),
+        }
+
+    def to_json(self, **kwargs: Any) -> str:
+        """The statistics as JSON; `kwargs` are passed to `json.dumps`."""
+        return json.dumps(self.to_dict(), **kwargs)
@@ -0,0 +1,145 @@
+"""Per-phase latency accounting behind the global `--timings` flag."""
+
+import threading
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, ExitStack, contextmanager, nullcontext
+from time import perf_counter
+from typing import Protocol
+
+import httpx
+
+# httpcore trace steps folded into the network sub-phases we report.
+TRACE_PHASES = {
+    "connect_tcp": "connect",
+    "start_tls": "tls",
+    "send_request_headers": "send",
+    "send_request_body": "send",
+    "receive_response_headers": "wait",
+    "receive_response_body": "download",
+}
+
+# Display order; network sub-phases are nested under "network".
+PHASE_ORDER = [
+    "network",
+    "connect",
+    "tls",
+    "send",
+    "wait",
+    "download",
+    "decode",
+    "parse",
+    "render",
+]
+NETWORK_SUBPHASES = {"connect", "tls", "send", "wait", "download"}
+
+
+class PhaseCollector(Protocol):
+    """Anything that can measure a named block, e.g. `Timings`."""
+
+    def phase(self, name: str) -> AbstractContextManager: ...
+
+
+def phase(name: str, *collectors: PhaseCollector | None) -> AbstractContextManager:
+    """
+    Enters phase `name` on every enabled collector, outermost first.
+
+    `None` entries are skipped, so callers can pass optional collectors
+    straight through.
+    """
+    enabled = [c for c in collectors if c is not None]
+    if not enabled:
+        return nullcontext()
+    if len(enabled) == 1:
+        return enabled[0].phase(name)
+    stack = ExitStack()
+    for collector in enabled:
+        stack.enter_context(collector.phase(name))
+    return stack
+
+
+class Timings:
+    """
+    Collects wall-clock time spent in each phase of a CLI invocation.
+
+    Phases are timed either explicitly with `phase()` or, for the network
+    breakdown, from httpcore trace events attached to each request through
+    the httpx event hooks returned by `event_hooks()`.
+
+    Attributes:
+        durations (dict[str, float]): Total seconds spent per phase.
+        calls (dict[str, int]): Number of times each phase was entered.
+        requests (int): Number of HTTP requests sent.
+        bytes_received (int): Response body bytes downloaded (pre-decompression).
+        bytes_decoded (int): Response body bytes after decompression.
+        records (int): Number of brewery records parsed.
+    """
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = defaultdict(float)
+        self.calls: dict[str, int] = defaultdict(int)
+        self.requests = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+        self.records = 0
+        self.started = perf_counter()
+        self._trace_starts: dict[tuple[int, str], float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        """Adds `seconds` to the running total for phase `name`."""
+        with self._lock:
+            self.durations[name] += seconds
+            self.calls[name] += 1
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Times the enclosed block as one occurrence of phase `name`."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, perf_counter() - start)
+
+    @property
+    def compression_ratio(self) -> float:
+        """Decoded over received body bytes; 1.0 when nothing was received."""
+        return self.bytes_decoded / self.bytes_received if self.bytes_received else 1.0
+
+    @property
+    def total(self) -> float:
+        """Seconds elapsed since this object was created."""
+        return perf_counter() - self.started
+
+    def trace(self, event_name: str, info: dict) -> None:
+        """
+        httpcore trace callback, e.g. "connection.connect_tcp.started".
+
+        DNS resolution happens inside `connect_tcp`, so it is reported as part
+        of the "connect" phase.
+        """
+        _, step, state = event_name.rsplit(".", 2)
+        name = TRACE_PHASES.get(step)
+        if name is None:
+            return
+        key = (threading.get_ident(), step)
+        if state == "started":
+            self._trace_starts[key] = perf_counter()
+        elif key in self._trace_starts:
+            self.add(name, perf_counter() - self._trace_starts.pop(key))
+
+    def on_request(self, request: httpx.Request) -> None:
+        """Request event hook: attaches the trace callback to the request."""
+        request.extensions["trace"] = self.trace
+        with self._lock:
+            self.requests += 1
+
+    def record_response(self, response: httpx.Response) -> None:
+        """Counts the body bytes of a fully read response, on the wire and decoded."""
+        with self._lock:
+            self.bytes_received += response.num_bytes_downloaded
+            self.bytes_decoded += len(response.content)
+
+    def event_hooks(self) -> dict[str, list]:
+        """Returns httpx `event_hooks` that feed this collector."""
+        return {"request": [self.on_request]}
@@ -0,0 +1,211 @@
+"""Cheap repeated polling of a search for added, removed and changed breweries."""
+
+import hashlib
+import json
+from collections.abc import Iterator
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+from .brewery import MAX_PER_PAGE, BreweryAPI
+from .mirror import FIELDS, content_hash
+from .models import Brewery, BreweryType, SearchQuery
+
+
+@dataclass
+class BreweryChange:
+    """
+    A brewery whose fields changed between two polls.
+
+    Attributes:
+        id (str): The brewery ID.
+        name (str): Its current name.
+        fields (dict[str, tuple[Any, Any]]): Old and new value of each
+            changed field, in `FIELDS` order.
+    """
+
+    id: str
+    name: str
+    fields: dict[str, tuple[Any, Any]]
+
+    @property
+    def closed(self) -> bool:
+        """Whether the brewery's type flipped to closed."""
+        old, new = self.fields.get("brewery_type", (None, None))
+        return new == BreweryType.CLOSED and old != BreweryType.CLOSED
+
+
+@dataclass
+class WatchDelta:
+    """
+    What changed in a search's results since the previous poll.
+
+    Attributes:
+        added (list[dict]): New breweries, as flattened records.
+        removed (list[dict]): Breweries no longer in the results.
+        changed (list[BreweryChange]): Breweries whose fields changed.
+        total (int): Number of breweries in the results now.
+        requests (int): Page requests made by the poll.
+        not_modified (int): Pages the server or the page hash reported
+            unchanged, which were not parsed again.
+    """
+
+    added: list[dict] = field(default_factory=list)
+    removed: list[dict] = field(default_factory=list)
+    changed: list[BreweryChange] = field(default_factory=list)
+    total: int = 0
+    requests: int = 0
+    not_modified: int = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def events(self) -> Iterator[dict]:
+        """The changes as JSON-serialisable events, one per brewery."""
+        for record in self.added:
+            yield {"event": "added", "id": record["id"], "record": record}
+        for record in self.removed:
+            yield {"event": "removed", "id": record["id"], "record": record}
+        for change in self.changed:
+            yield {
+                "event": "changed",
+                "id": change.id,
+                "name": change.name,
+                "closed": change.closed,
+                "fields": {name: list(pair) for name, pair in change.fields.items()},
+            }
+
+
+@dataclass
+class _Page:
+    """One fetched page: its validators and parsed records."""
+
+    etag: str | None
+    digest: str
+    records: list[dict]
+    size: int
+
+
+class Watcher:
+    """
+    Re-runs one search and reports what changed since the previous run.
+
+    Every page is requested conditionally with the ETag it was last served
+    with, so an unchanged page costs a 304 without a body. Servers that send
+    no ETag still return the page, but one whose body hashes the same as
+    before is not parsed again. Only when some page changed are the records
+    compared, by per-brewery content hash, so a poll that finds nothing
+    costs the requests and little more.
+
+    Example:
+        >>> with BreweryAPI() as client:
+        ...     watcher = Watcher(client, SearchQuery(city="Denver"))
+        ...     watcher.poll()  # the baseline
+        ...     delta = watcher.poll()
+    """
+
+    def __init__(self, client: BreweryAPI, query: SearchQuery):
+        """
+        Args:
+            client (BreweryAPI): An open client.
+            query (SearchQuery): The search to watch; it is paged from the
+                first page, `MAX_PER_PAGE` at a time.
+        """
+        self.client = client
+        self.query = replace(query, page=1, per_page=MAX_PER_PAGE)
+        self._pages: list[_Page] = []
+        # Content hash and record of every brewery, by ID, as of the last poll.
+        self._records: dict[str, tuple[str, dict]] | None = None
+        self.invalid = 0
+
+    def poll(self) -> WatchDelta:
+        """
+        Fetches the results and diffs them against the previous poll.
+
+        The first poll records the baseline and reports no changes.
+
+        Raises:
+            httpx.HTTPError: If a request fails; the previous state is kept.
+            ValueError: If a response cannot be parsed as JSON, or a page
+                that was never fetched keeps answering 304 Not Modified.
+        """
+        delta = WatchDelta()
+        pages: list[_Page] = []
+        per_page = self.query.per_page or MAX_PER_PAGE
+        while True:
+            index = len(pages)
+            previous = self._pages[index] if index < len(self._pages) else None
+            query = replace(self.query, page=index + 1)
+            data, etag = self.client.get_brewery_page_if_changed(
+                query, previous.etag if previous else None
+            )
+            delta.requests += 1
+            if data is None and previous is None:
+                # A 304 with no page to reuse, e.g. from an intermediary
+                # cache: the page counts as changed and is fetched again.
+                data, etag = self.client.get_brewery_page_if_changed(query)
+                delta.requests += 1
+            page = self._page(data, etag, previous)
+            if page is previous:
+                delta.not_modified += 1
+            pages.append(page)
+            if page.size < per_page:
+                break
+
+        changed = len(pages) != len(self._pages) or delta.not_modified < len(pages)
+        self._pages = pages
+        if self._records is not None and not changed:
+            delta.total = len(self._records)
+            return delta
+
+        current: dict[str, tuple[str, dict]] = {}
+        for page in pages:
+            for record in page.records:
+                current[record["id"]] = (content_hash(record), record)
+        delta.total = len(current)
+        if self._records is not None:
+            _diff(self._records, current, delta)
+        self._records = current
+        return delta
+
+    def _page(
+        self, data: list[dict] | None, etag: str | None, previous: _Page | None
+    ) -> _Page:
+        """The page for a response, reusing `previous` when it is unchanged."""
+        if data is None:
+            if previous is None:
+                raise ValueError("Search page answered 304 Not Modified twice.")
+            previous.etag = etag
+            return previous
+        encoded = json.dumps(data, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+        if previous is not None and previous.digest == digest:
+            previous.etag = etag
+            return previous
+
+        records = []
+        for raw in data:
+            try:
+                records.append(Brewery.from_dict(raw).to_flat_dict())
+            except (KeyError, TypeError):
+                self.invalid += 1
+        return _Page(etag=etag, digest=digest, records=records, size=len(data))
+
+
+def _diff(
+    before: dict[str, tuple[str, dict]],
+    after: dict[str, tuple[str, dict]],
+    delta: WatchDelta,
+) -> None:
+    """Fills `delta` with the differences between two polls, in ID order."""
+    for brewery_id in sorted(after.keys() - before.keys()):
+        delta.added.append(after[brewery_id][1])
+    for brewery_id in sorted(before.keys() - after.keys()):
+        delta.removed.append(before[brewery_id][1])
+    for brewery_id in sorted(after.keys() & before.keys()):
+        (old_hash, old), (new_hash, new) = before[brewery_id], after[brewery_id]
+        if old_hash == new_hash:
+            continue
+        fields = {
+            name: (old[name], new[name]) for name in FIELDS if old[name] != new[name]
+        }
+        delta.changed.append(BreweryChange(brewery_id, new["name"], fields))
@@ -0,0 +1,80 @@
+"""Tests for JSONL batch execution in batch.py."""
+
+import json
+
+import httpx
+import pytest
+
+from brewcli.batch import BatchQuery, run_batch
+from brewcli.brewery import BreweryAPI
+from brewcli.models import Coordinate
+
+
+class TestBatchQuery:
+    def test_search_fields_map_to_search_query(self):
+        query = BatchQuery.from_dict(
+            {"city": "Denver", "type": "micro", "coord": "39.7,-104.9", "ids": ["1"]}
+        )
+
+        assert query.kind == "search"
+        assert query.query is not None
+        assert query.query.city == "Denver"
+        assert query.query.coord == Coordinate(39.7, -104.9)
+        assert query.query.ids == ["1"]
+
+    def test_by_id_and_random(self):
+        assert BatchQuery.from_dict({"kind": "by_id", "brewery_id": "x"}).brewery_id
+        assert BatchQuery.from_dict({"kind": "random", "number": 4}).number == 4
+
+    @pytest.mark.parametrize(
+        "spec",
+        [
+            {"kind": "nearby"},
+            {"kind": "by_id"},
+            {"kind": "random", "number": 0},
+            {"city": "Denver", "colour": "red"},
+            {"type": "gigantic"},
+            ["not", "an", "object"],
+        ],
+    )
+    def test_invalid_specs_rejected(self, spec):
+        with pytest.raises(ValueError):
+            BatchQuery.from_dict(spec)
+
+
+def test_run_batch_reports_per_query_status(httpx_mock, brewery_data):
+    httpx_mock.add_response(json=[brewery_data], is_reusable=True)
+    lines = [
+        json.dumps({"city": "Grandville"}),
+        "",
+        "not json",
+        json.dumps({"kind": "random", "number": 1}),
+    ]
+
+    with BreweryAPI() as client:
+        results = list(run_batch(client, lines, concurrency=2))
+
+    assert [r.line for r in results] == [1, 3, 4]
+    assert [r.status for r in results] == ["ok", "error", "ok"]
+    assert results[0].results[0]["name"] == "Osgood Brewing"
+    assert results[1].error is not None
+    assert all(r.elapsed_ms >= 0 for r in results)
+
+
+def test_large_random_query_is_fanned_out(httpx_mock, brewery_data):
+    served = []
+
+    def respond(request):
+        size = int(request.url.params["size"])
+        page = [dict(brewery_data, id=str(len(served) + i)) for i in range(size)]
+        served.extend(page)
+        return httpx.Response(200, json=page)
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+
+    with BreweryAPI() as client:
+        (result,) = run_batch(client, [json.dumps({"kind": "random", "number": 120})])
+
+    assert result.status == "ok"
+    assert len({r["id"] for r in result.results}) == 120
+    assert len(httpx_mock.get_requests()) == 3
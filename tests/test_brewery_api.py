@@ -1,8 +1,11 @@
 # Need to mock httpx.get for testing the request functions
+import threading
+
 import httpx
 import pytest
 
 from brewcli.brewery import BreweryAPI
+from brewcli.metrics import Metrics
 from brewcli.models import SearchQuery
 
 
@@ -11,9 +14,8 @@ def test_brewery_api_initialization():
     with BreweryAPI() as client:
         assert isinstance(client.client, httpx.Client)
         assert client.base_url == "https://api.openbrewerydb.org/v1/breweries"
-        assert client.headers == {
-            "Accept": "application/json",
-        }
+        assert client.headers["Accept"] == "application/json"
+        assert "gzip" in client.headers["Accept-Encoding"]
 
 
 def test_get_random_breweries(httpx_mock, api_client: BreweryAPI):
@@ -122,3 +124,118 @@ def test_get_brewery_filters_http_error(httpx_mock, api_client):
 
     with pytest.raises(httpx.HTTPError):
         api_client.get_brewery_filters(SearchQuery(city="Denver"))
+
+
+def test_identical_concurrent_requests_are_coalesced(httpx_mock):
+    """Concurrent identical by-id calls share a single HTTP request."""
+    release = threading.Event()
+
+    def slow_response(request):
+        release.wait(timeout=5)
+        return httpx.Response(200, json={"id": "123"})
+
+    httpx_mock.add_callback(slow_response)
+    metrics = Metrics()
+
+    with BreweryAPI(metrics=metrics) as client:
+        results: list = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(client.get_brewery_by_id("123"))
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        while client.inflight.saved < 4:
+            threading.Event().wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+    assert results == [{"id": "123"}] * 5
+    assert len(httpx_mock.get_requests()) == 1
+    assert metrics.coalesced == {"by_id": 4}
+
+
+def test_random_requests_are_not_coalesced(httpx_mock, api_client):
+    httpx_mock.add_response(json=[{"id": "1"}], is_reusable=True)
+
+    api_client.get_random_breweries(1)
+    api_client.get_random_breweries(1)
+
+    assert len(httpx_mock.get_requests()) == 2
+    assert api_client.inflight.saved == 0
+
+
+def test_iter_random_breweries_fans_out_and_dedupes(httpx_mock, api_client):
+    """Large requests are split into capped calls and topped up past duplicates."""
+    counter = iter(range(10_000))
+
+    def random_page(request):
+        size = int(request.url.params["size"])
+        # Every page repeats brewery "dup", so top-up rounds are needed.
+        ids = ["dup"] + [str(next(counter)) for _ in range(size - 1)]
+        return httpx.Response(200, json=[{"id": i} for i in ids])
+
+    httpx_mock.add_callback(random_page, is_reusable=True)
+
+    batches = list(api_client.iter_random_breweries(120))
+    ids = [brewery["id"] for batch in batches for brewery in batch]
+
+    assert len(ids) == 120
+    assert len(set(ids)) == 120
+    sizes = [int(r.url.params["size"]) for r in httpx_mock.get_requests()]
+    assert max(sizes) == 50
+    assert sorted(sizes[:3]) == [20, 50, 50]
+    assert len(sizes) > 3
+
+
+def test_iter_random_breweries_stops_when_exhausted(httpx_mock, api_client):
+    httpx_mock.add_response(json=[{"id": "1"}, {"id": "2"}], is_reusable=True)
+
+    batches = list(api_client.iter_random_breweries(10))
+
+    assert [b["id"] for batch in batches for b in batch] == ["1", "2"]
+
+
+def test_get_breweries_by_ids_chunks_requests(httpx_mock, api_client):
+    """5,000 IDs are resolved with a handful of by_ids requests."""
+
+    def by_ids_page(request):
+        ids = request.url.params["by_ids"].split(",")
+        return httpx.Response(200, json=[{"id": i} for i in ids if i != "42"])
+
+    httpx_mock.add_callback(by_ids_page, is_reusable=True)
+    ids = [str(i) for i in range(5000)]
+
+    found = api_client.get_breweries_by_ids([*ids, "7"])
+
+    assert len(httpx_mock.get_requests()) == 25
+    assert "42" not in found
+    assert len(found) == 4999
+    request = httpx_mock.get_requests()[0]
+    assert request.url.params["per_page"] == "200"
+
+
+def test_iter_brewery_pages_stops_on_short_page(httpx_mock, api_client):
+    httpx_mock.add_response(json=[{"id": str(i)} for i in range(200)])
+    httpx_mock.add_response(json=[{"id": "200"}])
+
+    pages = list(api_client.iter_brewery_pages())
+
+    assert [len(page) for page in pages] == [200, 1]
+    params = [request.url.params for request in httpx_mock.get_requests()]
+    assert [p["page"] for p in params] == ["1", "2"]
+    assert params[0]["per_page"] == "200"
+
+
+def test_get_brewery_page_if_changed_sends_etag(httpx_mock, api_client):
+    httpx_mock.add_response(json=[{"id": "1"}], headers={"ETag": '"v1"'})
+    httpx_mock.add_response(status_code=304, match_headers={"If-None-Match": '"v1"'})
+
+    first = api_client.get_brewery_page_if_changed(SearchQuery(city="Denver"))
+    second = api_client.get_brewery_page_if_changed(SearchQuery(city="Denver"), '"v1"')
+
+    assert first == ([{"id": "1"}], '"v1"')
+    assert second == (None, '"v1"')
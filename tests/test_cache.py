@@ -0,0 +1,173 @@
+"""Tests for response caching and stale-while-revalidate in cache.py."""
+
+import time
+
+import pytest
+
+from brewcli.brewery import BreweryAPI
+from brewcli.cache import (
+    CachePolicy,
+    CacheStats,
+    DiskCache,
+    MemoryCache,
+    ResultCache,
+    load_stats,
+    save_stats,
+)
+from brewcli.compress import GZIP, LZMA
+from brewcli.metrics import Metrics
+from brewcli.models import Brewery, SearchQuery
+
+URL = "https://api.openbrewerydb.org/v1/breweries/1"
+
+
+def test_policy_rejects_max_stale_below_ttl():
+    with pytest.raises(ValueError):
+        CachePolicy(ttl=60, max_stale=30)
+
+
+def test_disk_cache_round_trip(tmp_path):
+    cache = DiskCache(tmp_path)
+    cache.set("key", [{"id": "1"}])
+
+    entry = DiskCache(tmp_path).get("key")
+
+    assert entry is not None
+    assert entry.value == [{"id": "1"}]
+    assert entry.age >= 0
+    assert DiskCache(tmp_path).get("other") is None
+
+
+def test_disk_cache_compresses_and_reads_any_codec(tmp_path):
+    DiskCache(tmp_path, codec=GZIP).set("key", [{"id": "1"}] * 100)
+    (path,) = (tmp_path / "responses").iterdir()
+
+    assert path.read_bytes().startswith(GZIP.magic)
+    assert DiskCache(tmp_path, codec=LZMA).get("key").value == [{"id": "1"}] * 100
+    assert DiskCache(tmp_path).get("key") is not None
+
+    path.write_bytes(GZIP.magic + b"corrupt")
+    assert DiskCache(tmp_path).get("key") is None
+
+
+def test_fresh_entry_served_without_request(httpx_mock):
+    httpx_mock.add_response(url=URL, json={"id": "1", "v": 1})
+    metrics = Metrics()
+
+    with BreweryAPI(cache=MemoryCache(), metrics=metrics) as client:
+        first = client.get_brewery_by_id("1")
+        second = client.get_brewery_by_id("1")
+
+    assert first == second == {"id": "1", "v": 1}
+    assert len(httpx_mock.get_requests()) == 1
+    assert metrics.cache_hits == {"by_id": 1}
+
+
+def test_stale_entry_served_then_refreshed(httpx_mock):
+    httpx_mock.add_response(url=URL, json={"id": "1", "v": 1})
+    httpx_mock.add_response(url=URL, json={"id": "1", "v": 2})
+    cache = MemoryCache()
+    policy = CachePolicy(ttl=0, max_stale=3600)
+
+    with BreweryAPI(cache=cache, cache_policy=policy) as client:
+        assert client.get_brewery_by_id("1")["v"] == 1
+        # Stale: answered immediately from cache, refreshed in the background.
+        assert client.get_brewery_by_id("1")["v"] == 1
+
+    assert len(httpx_mock.get_requests()) == 2
+    entry = cache.get(URL)
+    assert entry is not None
+    assert entry.value["v"] == 2
+
+
+def test_entry_beyond_max_stale_blocks(httpx_mock):
+    httpx_mock.add_response(url=URL, json={"id": "1", "v": 1})
+    httpx_mock.add_response(url=URL, json={"id": "1", "v": 2})
+    policy = CachePolicy(ttl=0, max_stale=0)
+
+    with BreweryAPI(cache=MemoryCache(), cache_policy=policy) as client:
+        assert client.get_brewery_by_id("1")["v"] == 1
+        assert client.get_brewery_by_id("1")["v"] == 2
+
+
+def test_random_is_never_cached(httpx_mock):
+    httpx_mock.add_response(json=[{"id": "1"}], is_reusable=True)
+    cache = MemoryCache()
+
+    with BreweryAPI(cache=cache) as client:
+        client.get_random_breweries(1)
+        client.get_random_breweries(1)
+
+    assert len(httpx_mock.get_requests()) == 2
+    assert len(cache) == 0
+
+
+def test_equivalent_searches_share_a_cached_response(httpx_mock):
+    httpx_mock.add_response(json=[{"id": "1"}])
+    stats = CacheStats()
+
+    with BreweryAPI(cache=MemoryCache(), cache_stats=stats) as client:
+        first = client.get_brewery_filters(SearchQuery(state="Ohio"))
+        second = client.get_brewery_filters(SearchQuery(state=" ohio"))
+
+    assert first == second
+    assert len(httpx_mock.get_requests()) == 1
+    assert (stats.hits, stats.misses) == (1, 1)
+    assert stats.hit_rate == 0.5
+
+
+def test_cache_stats_take_resets_counts():
+    stats = CacheStats()
+    stats.record("hit")
+    stats.record("stale_hit")
+    stats.record("miss")
+
+    taken = stats.take()
+
+    assert taken.to_dict() == {"hits": 1, "stale_hits": 1, "misses": 1}
+    assert stats.lookups == 0
+
+
+def test_saved_stats_accumulate(tmp_path):
+    path = tmp_path / "stats.json"
+    assert load_stats(path) == {}
+
+    save_stats({"results": CacheStats(hits=2, misses=1)}, path)
+    totals = save_stats({"results": CacheStats(misses=1)}, path)
+
+    assert totals["results"] == CacheStats(hits=2, misses=2)
+    assert load_stats(path) == totals
+    path.write_text("[]")
+    assert load_stats(path) == {}
+
+
+def test_result_cache_evicts_least_recently_used(brewery_data):
+    cache = ResultCache(max_entries=2)
+    breweries = [Brewery.from_dict(brewery_data)]
+    cache.set("a", breweries)
+    cache.set("b", [])
+    assert cache.get("a") == breweries
+
+    cache.set("c", [])
+
+    assert cache.get("b") is None
+    assert cache.get("a", max_age=60) == breweries
+    assert cache.get("a", max_age=-1) is None
+    assert (cache.stats.hits, cache.stats.misses) == (2, 2)
+    assert len(cache) == 2
+
+
+def test_memory_cache_is_bounded(monkeypatch):
+    cache = MemoryCache(max_entries=2, max_age=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a").value == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a").value == 1
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("a") is None
+    assert len(cache) == 1
@@ -1,10 +1,18 @@
+import gzip
+import importlib.util
+import json
+import lzma
+import threading
+
 import httpx
 import pytest
 from click.testing import CliRunner
 from pytest_mock import MockerFixture
 
 from brewcli import cli
-from brewcli.models import SearchQuery
+from brewcli.models import Brewery, SearchQuery
+from brewcli.resilience import CircuitBreaker
+from brewcli.snapshot import write_snapshot
 
 
 @pytest.fixture(name="cli_runner")
@@ -67,22 +75,41 @@ def response_data():
 # ---------------------------------------------------------------------------
 class TestRandom:
     def test_success(self, mock_client, cli_runner, response_data):
-        mock_client.get_random_breweries.return_value = response_data
+        mock_client.iter_random_breweries.return_value = [response_data]
+
+        result = cli_runner.invoke(cli.random, ["2"])
+
+        assert result.exit_code == 0
+        mock_client.iter_random_breweries.assert_called_once_with(2)
+        assert "Test Brewery" in result.output
+        assert "Another Brewery" in result.output
+
+    def test_streams_batches(self, mock_client, cli_runner, response_data):
+        mock_client.iter_random_breweries.return_value = iter(
+            [response_data[:1], response_data[1:]]
+        )
 
         result = cli_runner.invoke(cli.random, ["2"])
 
         assert result.exit_code == 0
-        mock_client.get_random_breweries.assert_called_once_with(number=2)
         assert "Test Brewery" in result.output
         assert "Another Brewery" in result.output
 
+    def test_reports_shortfall(self, mock_client, cli_runner, response_data):
+        mock_client.iter_random_breweries.return_value = [response_data]
+
+        result = cli_runner.invoke(cli.random, ["5"])
+
+        assert result.exit_code == 0
+        assert "Only 2 unique breweries available." in result.stderr
+
     def test_invalid_number_rejected(self, cli_runner):
         """IntRange(min=1) should reject 0 and negatives at the Click layer."""
         result = cli_runner.invoke(cli.random, ["0"])
         assert result.exit_code != 0
 
     def test_http_error(self, mock_client, cli_runner):
-        mock_client.get_random_breweries.side_effect = httpx.HTTPError("boom")
+        mock_client.iter_random_breweries.side_effect = httpx.HTTPError("boom")
 
         result = cli_runner.invoke(cli.random, ["2"])
 
@@ -92,7 +119,7 @@ class TestRandom:
 
     def test_parse_error(self, mock_client, cli_runner):
         """Malformed response data surfaces a friendly message, not a traceback."""
-        mock_client.get_random_breweries.return_value = [{"id": "1"}]  # missing keys
+        mock_client.iter_random_breweries.return_value = [[{"id": "1"}]]  # missing keys
 
         result = cli_runner.invoke(cli.random, ["1"])
 
@@ -204,3 +231,827 @@ class TestSearch:
         assert result.exception is None
         assert "Error parsing brewery" in result.output
         assert "Test Brewery" in result.output
+
+    def test_repeated_filters_merge_queries(
+        self, mock_client, cli_runner, response_data
+    ):
+        def first_page(query):
+            return [response_data[0]] if query.state == "CA" else response_data
+
+        mock_client.get_brewery_filters.side_effect = first_page
+
+        result = cli_runner.invoke(
+            cli.search, ["--by-state", "CA", "--by-state", "NY", "--by-type", "micro"]
+        )
+
+        assert result.exit_code == 0
+        assert result.stdout.count("Test Brewery") == 1
+        assert "Another Brewery" in result.stdout
+        queries = [c.args[0] for c in mock_client.get_brewery_filters.call_args_list]
+        assert sorted(q.state for q in queries) == ["CA", "NY"]
+        # One page per query, as a search with a single value fetches.
+        assert all(q.type == "micro" and q.per_page == 50 for q in queries)
+        mock_client.iter_brewery_pages.assert_not_called()
+
+    def test_max_queries_filters_client_side(
+        self, mock_client, cli_runner, response_data
+    ):
+        mock_client.get_brewery_filters.return_value = response_data
+
+        result = cli_runner.invoke(
+            cli.search,
+            ["--by-state", "ca", "--by-state", "Oregon", "--max-queries", "1"],
+        )
+
+        assert result.exit_code == 0
+        assert "Test Brewery" in result.stdout
+        assert "Another Brewery" not in result.stdout
+        (query,) = mock_client.get_brewery_filters.call_args.args
+        assert query.state is None
+
+    def test_local_repeated_filters(
+        self, mock_client, cli_runner, response_data, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        mock_client.iter_brewery_pages.return_value = iter([response_data])
+        cli_runner.invoke(cli.cli, ["mirror", "sync"])
+
+        result = cli_runner.invoke(
+            cli.search, ["--local", "--by-type", "micro", "--by-type", "nano"]
+        )
+
+        assert "Test Brewery" in result.stdout
+        assert "Another Brewery" in result.stdout
+
+
+# ---------------------------------------------------------------------------
+# --timings
+# ---------------------------------------------------------------------------
+class TestTimings:
+    def test_breakdown_printed_to_stderr(self, mock_client, cli_runner, response_data):
+        mock_client.get_brewery_filters.return_value = response_data
+
+        result = cli_runner.invoke(
+            cli.cli, ["--timings", "search", "--by-city", "Cincinnati"]
+        )
+
+        assert result.exit_code == 0
+        assert "Test Brewery" in result.stdout
+        assert "Timings" in result.stderr
+        assert "parse" in result.stderr
+        assert "2 record(s)" in result.stderr
+
+    def test_no_breakdown_by_default(self, mock_client, cli_runner, response_data):
+        mock_client.get_brewery_filters.return_value = response_data
+
+        result = cli_runner.invoke(cli.cli, ["search", "--by-city", "Cincinnati"])
+
+        assert result.exit_code == 0
+        assert "Timings" not in result.output
+
+
+# ---------------------------------------------------------------------------
+# --memprofile
+# ---------------------------------------------------------------------------
+class TestMemprofile:
+    def test_report_printed_to_stderr(self, mock_client, cli_runner, response_data):
+        mock_client.iter_random_breweries.return_value = [response_data]
+
+        result = cli_runner.invoke(cli.cli, ["--memprofile", "random", "2"])
+
+        assert result.exit_code == 0
+        assert "Test Brewery" in result.stdout
+        assert "Memory" in result.stderr
+        assert "parse" in result.stderr
+        assert "render" in result.stderr
+
+    @pytest.mark.parametrize(
+        "extra", [[], ["--sort-by", "name", "--limit", "1"]], ids=["all", "top"]
+    )
+    def test_multi_value_search_does_not_hang(
+        self, httpx_mock, cli_runner, response_data, extra
+    ):
+        """Parsing pages fetched by the planner's workers must not deadlock."""
+
+        def respond(request):
+            state = request.url.params["by_state"]
+            return httpx.Response(
+                200, json=[dict(response_data[0], id=state, state=state)]
+            )
+
+        httpx_mock.add_callback(respond, is_reusable=True)
+        args = ["--memprofile", "search", "--by-state", "ohio"]
+        outcome = {}
+        worker = threading.Thread(
+            target=lambda: outcome.update(
+                result=cli_runner.invoke(
+                    cli.cli, [*args, "--by-state", "kentucky", *extra]
+                )
+            ),
+            daemon=True,
+        )
+
+        worker.start()
+        worker.join(timeout=10)
+
+        assert not worker.is_alive()
+        result = outcome["result"]
+        assert result.exit_code == 0
+        assert "Memory" in result.stderr
+
+
+# ---------------------------------------------------------------------------
+# batch
+# ---------------------------------------------------------------------------
+class TestBatch:
+    def test_writes_jsonl_results(self, mock_client, cli_runner, response_data):
+        mock_client.get_brewery_filters.return_value = response_data
+        mock_client.get_brewery_by_id.side_effect = httpx.HTTPError("boom")
+        queries = '{"city": "Denver"}\n{"kind": "by_id", "brewery_id": "1"}\n'
+
+        result = cli_runner.invoke(cli.batch, ["-"], input=queries)
+
+        assert result.exit_code == 0
+        lines = [json.loads(line) for line in result.stdout.splitlines()]
+        assert [line["status"] for line in lines] == ["ok", "error"]
+        assert lines[0]["count"] == 2
+        assert "2 queries: 1 ok, 1 failed" in result.stderr
+
+
+class TestByIds:
+    def test_many_ids_preserve_input_order(
+        self, mock_client, cli_runner, response_data
+    ):
+        mock_client.get_breweries_by_ids.return_value = {
+            b["id"]: b for b in response_data
+        }
+
+        result = cli_runner.invoke(cli.by_id, ["2", "missing", "1", "2"])
+
+        assert result.exit_code == 0
+        mock_client.get_breweries_by_ids.assert_called_once_with(
+            ["2", "missing", "1", "2"]
+        )
+        assert result.stdout.index("Another Brewery") < result.stdout.index(
+            "Test Brewery"
+        )
+        assert "Not found (1): missing" in result.stderr
+
+    def test_ids_read_from_stdin(self, mock_client, cli_runner, response_data):
+        mock_client.get_breweries_by_ids.return_value = {
+            b["id"]: b for b in response_data
+        }
+
+        result = cli_runner.invoke(cli.by_id, ["--file", "-"], input="1\n\n2\n")
+
+        assert result.exit_code == 0
+        mock_client.get_breweries_by_ids.assert_called_once_with(["1", "2"])
+        assert "Test Brewery" in result.stdout
+
+    def test_no_ids_is_usage_error(self, cli_runner):
+        result = cli_runner.invoke(cli.by_id, [])
+        assert result.exit_code != 0
+
+
+class TestMirror:
+    def test_sync_then_info(
+        self, mock_client, cli_runner, response_data, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        mock_client.iter_brewery_pages.return_value = iter([response_data])
+
+        result = cli_runner.invoke(cli.cli, ["mirror", "sync"])
+
+        assert result.exit_code == 0
+        assert "2 inserted, 0 updated, 0 deleted, 0 unchanged" in result.stdout
+
+        mock_client.iter_brewery_pages.return_value = iter([response_data])
+        result = cli_runner.invoke(cli.cli, ["mirror", "sync"])
+        assert "0 inserted, 0 updated, 0 deleted, 2 unchanged" in result.stdout
+
+        result = cli_runner.invoke(cli.cli, ["mirror", "info"])
+        assert "Breweries:   2" in result.stdout
+        assert "never" not in result.stdout
+
+    def test_unparseable_brewery_is_not_deleted(
+        self, mock_client, cli_runner, response_data, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        mock_client.iter_brewery_pages.return_value = iter([response_data])
+        cli_runner.invoke(cli.cli, ["mirror", "sync"])
+        malformed = {"id": response_data[1]["id"]}
+        mock_client.iter_brewery_pages.return_value = iter(
+            [[response_data[0], malformed]]
+        )
+
+        result = cli_runner.invoke(cli.cli, ["mirror", "sync"])
+
+        assert result.exit_code == 0
+        assert "0 deleted" in result.stdout
+        assert "Skipped 1 unparseable breweries" in result.stderr
+        result = cli_runner.invoke(cli.cli, ["mirror", "info"])
+        assert "Breweries:   2" in result.stdout
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            ["search", "--local"],
+            ["search", "--local", "--by-dist", "37.77,-122.42", "--radius", "5km"],
+            ["stats", "--local"],
+            ["dedupe"],
+            ["nearest", "points.csv"],
+            ["codecs"],
+            ["mirror", "snapshot"],
+        ],
+    )
+    def test_commands_reading_a_missing_mirror_do_not_create_it(
+        self, cli_runner, tmp_path, monkeypatch, args
+    ):
+        path = tmp_path / "mirror.sqlite3"
+        monkeypatch.setenv("BREWCLI_MIRROR", str(path))
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "points.csv").write_text("lat,lon\n")
+
+        result = cli_runner.invoke(cli.cli, args)
+
+        assert result.exit_code == 1
+        assert "run 'brewcli mirror sync' first" in result.stderr
+        assert not path.exists()
+        result = cli_runner.invoke(cli.cli, ["mirror", "info"])
+        assert "Last synced: never" in result.stdout
+        assert not path.exists()
+
+    def test_import_dump(self, cli_runner, response_data, tmp_path, monkeypatch):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        dump = tmp_path / "dump.json"
+        dump.write_text(json.dumps([*response_data, {"name": "no id"}]))
+
+        result = cli_runner.invoke(
+            cli.cli, ["mirror", "import", str(dump), "--workers", "1"]
+        )
+
+        assert result.exit_code == 0
+        assert "Imported 3 records (1 invalid)" in result.stdout
+        assert "2 inserted" in result.stdout
+        assert "Record 3: KeyError" in result.stderr
+
+    def test_import_compressed_dump(
+        self, cli_runner, response_data, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        dump = tmp_path / "dump.jsonl.gz"
+        lines = "".join(json.dumps(record) + "\n" for record in response_data)
+        dump.write_bytes(gzip.compress(lines.encode()))
+
+        result = cli_runner.invoke(
+            cli.cli, ["mirror", "import", str(dump), "--workers", "1"]
+        )
+
+        assert result.exit_code == 0
+        assert "2 inserted" in result.stdout
+
+    def test_snapshot_then_offline_by_id(
+        self, mock_client, cli_runner, response_data, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        mock_client.iter_brewery_pages.return_value = iter([response_data])
+        cli_runner.invoke(cli.cli, ["mirror", "sync"])
+
+        result = cli_runner.invoke(cli.cli, ["mirror", "snapshot"])
+        assert result.exit_code == 0
+        assert (tmp_path / "snapshot.bin").exists()
+
+        result = cli_runner.invoke(cli.cli, ["by-id", "--offline", "2", "nope"])
+
+        assert result.exit_code == 0
+        assert "Another Brewery" in result.stdout
+        assert "Not found (1): nope" in result.stderr
+        mock_client.get_breweries_by_ids.assert_not_called()
+
+    def test_offline_without_snapshot(self, cli_runner, tmp_path, monkeypatch):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+
+        result = cli_runner.invoke(cli.cli, ["by-id", "--offline", "1"])
+
+        assert result.exit_code == 1
+        assert "mirror snapshot" in result.stderr
+
+    @pytest.mark.parametrize("keep", [0, 10, 0.5])
+    def test_offline_with_corrupt_snapshot(
+        self, cli_runner, brewery_data, tmp_path, monkeypatch, keep
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        path = tmp_path / "snapshot.bin"
+        write_snapshot([Brewery.from_dict(brewery_data)], path)
+        data = path.read_bytes()
+        path.write_bytes(data[: int(keep * len(data)) if keep < 1 else keep])
+
+        result = cli_runner.invoke(cli.cli, ["by-id", "--offline", brewery_data["id"]])
+
+        assert result.exit_code == 1
+        assert "run 'brewcli mirror snapshot'" in result.stderr
+        assert result.exception is None or isinstance(result.exception, SystemExit)
+
+
+class TestStats:
+    def test_streams_pages_from_api(self, mock_client, cli_runner, response_data):
+        mock_client.iter_brewery_pages.return_value = iter([response_data[:1]] * 3)
+
+        result = cli_runner.invoke(cli.cli, ["stats", "--by-state", "Ohio", "--json"])
+
+        assert result.exit_code == 0
+        data = json.loads(result.stdout)
+        assert data["total"] == 3
+        (query,) = mock_client.iter_brewery_pages.call_args.args
+        assert query.state == "Ohio"
+        assert query.per_page == 200
+
+    def test_renders_table(self, mock_client, cli_runner, response_data):
+        mock_client.iter_brewery_pages.return_value = iter([response_data])
+
+        result = cli_runner.invoke(cli.cli, ["stats"])
+
+        assert result.exit_code == 0
+        assert "By state" in result.stdout
+        assert "2 breweries" in result.stdout
+
+    def test_local_reads_mirror(
+        self, mock_client, cli_runner, response_data, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        mock_client.iter_brewery_pages.return_value = iter([response_data])
+        cli_runner.invoke(cli.cli, ["mirror", "sync"])
+        mock_client.iter_brewery_pages.reset_mock()
+
+        result = cli_runner.invoke(
+            cli.cli, ["stats", "--local", "--by-type", "nano", "--json"]
+        )
+
+        assert json.loads(result.stdout)["total"] == 1
+        mock_client.iter_brewery_pages.assert_not_called()
+
+
+class TestRadiusSearch:
+    SF = "37.7749,-122.4194"
+
+    @pytest.fixture
+    def pages(self, response_data):
+        near = dict(response_data[0], id="3", name="Near Brewery", latitude=37.8)
+        return [[response_data[0], near, response_data[1]], [near]]
+
+    def test_stops_paging_past_radius(self, mock_client, cli_runner, pages):
+        requested = []
+
+        def iter_pages(query):
+            for page in pages:
+                requested.append(page)
+                yield page
+
+        mock_client.iter_brewery_pages.side_effect = iter_pages
+
+        result = cli_runner.invoke(
+            cli.search, ["--by-dist", self.SF, "--radius", "10km"]
+        )
+
+        assert result.exit_code == 0
+        assert len(requested) == 1
+        assert "Distance (km)" in result.stdout
+        assert "Another Brewery" not in result.stdout
+        assert result.stdout.index("Test Brewery") < result.stdout.index("Near")
+        (query,) = mock_client.iter_brewery_pages.call_args.args
+        assert query.per_page == 200
+
+    def test_unit_is_shown(self, mock_client, cli_runner, pages):
+        mock_client.iter_brewery_pages.return_value = iter(pages)
+
+        result = cli_runner.invoke(
+            cli.search, ["--by-dist", self.SF, "--radius", "5000mi"]
+        )
+
+        assert "Distance (mi)" in result.stdout
+        assert "Another" in result.stdout
+        assert result.stdout.count("Near") == 1
+
+    def test_local_uses_mirror(
+        self, mock_client, cli_runner, pages, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        mock_client.iter_brewery_pages.return_value = iter(pages)
+        cli_runner.invoke(cli.cli, ["mirror", "sync"])
+        mock_client.iter_brewery_pages.reset_mock()
+
+        result = cli_runner.invoke(
+            cli.search, ["--local", "--by-dist", self.SF, "--radius", "10km"]
+        )
+
+        assert "Near Brewery" in result.stdout
+        assert "Another Brewery" not in result.stdout
+        mock_client.iter_brewery_pages.assert_not_called()
+
+    def test_near_postal_resolves_from_mirror(
+        self, mock_client, cli_runner, pages, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        mock_client.iter_brewery_pages.return_value = iter(pages)
+        cli_runner.invoke(cli.cli, ["mirror", "sync"])
+
+        result = cli_runner.invoke(
+            cli.search, ["--local", "--near-postal", " 67890", "--radius", "10km"]
+        )
+
+        assert result.exit_code == 0
+        assert " 0.0 " in result.stdout
+        assert "Near" not in result.stdout
+
+        result = cli_runner.invoke(cli.search, ["--near-postal", "00000"])
+        assert result.exit_code == 1
+        assert "not in the mirror" in result.stderr
+
+    def test_falls_back_to_mirror_when_circuit_is_open(
+        self, mock_client, cli_runner, pages, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        mock_client.iter_brewery_pages.return_value = iter(pages)
+        cli_runner.invoke(cli.cli, ["mirror", "sync"])
+        mock_client.get_brewery_filters.side_effect = httpx.HTTPError("boom")
+        breaker = CircuitBreaker(failure_threshold=1)
+        # The daemon's state: its shared client and breaker.
+        mock_client.cache_policy = cli.CachePolicy()
+        mock_client.hedging = None
+        mock_client.breaker = breaker
+        obj = {"client": mock_client, "breaker": breaker}
+
+        result = cli_runner.invoke(
+            cli.cli, ["--fail-after", "1", "search"], obj=dict(obj)
+        )
+        assert "HTTP Exception" in result.stderr
+        assert "Test Brewery" not in result.stdout
+
+        breaker.record_failure()
+        result = cli_runner.invoke(
+            cli.cli, ["--fail-after", "1", "search"], obj=dict(obj)
+        )
+
+        assert result.exit_code == 0
+        assert "searching the local mirror" in result.stderr
+        assert "Test Brewery" in result.stdout
+
+    def test_single_run_falls_back_to_mirror_on_failure(
+        self, mock_client, cli_runner, pages, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        mock_client.iter_brewery_pages.return_value = iter(pages)
+        cli_runner.invoke(cli.cli, ["mirror", "sync"])
+        mock_client.get_brewery_filters.side_effect = httpx.HTTPError("boom")
+
+        result = cli_runner.invoke(cli.cli, ["search"])
+
+        assert result.exit_code == 0
+        assert "searching the local mirror" in result.stderr
+        assert "Test Brewery" in result.stdout
+
+        result = cli_runner.invoke(cli.cli, ["--fail-after", "0", "search"])
+        assert "searching the local mirror" not in result.stderr
+
+    def test_missing_mirror_is_not_created(
+        self, mock_client, cli_runner, tmp_path, monkeypatch
+    ):
+        path = tmp_path / "mirror.sqlite3"
+        monkeypatch.setenv("BREWCLI_MIRROR", str(path))
+        mock_client.get_brewery_filters.side_effect = httpx.HTTPError("boom")
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure()
+
+        result = cli_runner.invoke(cli.search, ["--near-postal", "12345"])
+        assert result.exit_code == 1
+        assert "run 'brewcli mirror sync' first" in result.stderr
+
+        result = cli_runner.invoke(
+            cli.cli, ["--fail-after", "1", "search"], obj={"breaker": breaker}
+        )
+        assert "HTTP Exception" in result.stderr
+        assert "searching the local mirror" not in result.stderr
+
+        assert not path.exists()
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            ["--radius", "10km"],
+            ["--by-dist", SF, "--radius", "ten"],
+            ["--by-dist", SF, "--near-postal", "12345"],
+        ],
+    )
+    def test_usage_errors(self, mock_client, cli_runner, args):
+        result = cli_runner.invoke(cli.search, args)
+
+        assert result.exit_code == 2
+        mock_client.iter_brewery_pages.assert_not_called()
+
+
+class TestSortAndLimit:
+    @pytest.fixture
+    def pages(self, response_data):
+        extra = [
+            dict(response_data[0], id=str(i), name=f"Brewery {i:03}")
+            for i in range(3, 203)
+        ]
+        return [extra[:200], [*extra[200:], *response_data]]
+
+    def test_limit_keeps_top_k_across_pages(self, mock_client, cli_runner, pages):
+        mock_client.iter_brewery_pages.return_value = iter(pages)
+
+        result = cli_runner.invoke(
+            cli.search, ["--sort-by", "name", "--descending", "--limit", "2"]
+        )
+
+        assert result.exit_code == 0
+        assert "Test Brewery" in result.stdout
+        assert "Brewery 202" in result.stdout
+        assert "Brewery 201" not in result.stdout
+        (query,) = mock_client.iter_brewery_pages.call_args.args
+        assert query.per_page == 200
+
+    def test_multi_query_limit_parses_pages_as_they_arrive(
+        self, mocker, mock_client, cli_runner, response_data
+    ):
+        events = []
+
+        def iter_pages(query):
+            for i in range(5):
+                events.append("fetch")
+                yield [dict(response_data[0], id=f"{query.state}-{i}", name=f"{i}")]
+
+        mock_client.iter_brewery_pages.side_effect = iter_pages
+        from_dict = cli.Brewery.from_dict
+        mocker.patch.object(
+            cli.Brewery,
+            "from_dict",
+            side_effect=lambda data: events.append("parse") or from_dict(data),
+        )
+
+        states = ["--by-state", "ohio", "--by-state", "maine"]
+        result = cli_runner.invoke(
+            cli.search, [*states, "--sort-by", "name", "--descending", "--limit", "2"]
+        )
+
+        assert result.exit_code == 0
+        assert events.count("fetch") == 10
+        # Workers stay a few pages ahead, so parsing starts before the last
+        # page is fetched rather than after every query is collected.
+        assert events.index("parse") < len(events) - events[::-1].index("fetch") - 1
+
+    def test_limit_in_server_order_stops_paging(self, mock_client, cli_runner, pages):
+        requested = []
+
+        def iter_pages(query):
+            for page in pages:
+                requested.append(page)
+                yield page
+
+        mock_client.iter_brewery_pages.side_effect = iter_pages
+
+        result = cli_runner.invoke(
+            cli.search,
+            ["--by-dist", "37.7,-122.4", "--sort-by", "distance", "--limit", "5"],
+        )
+
+        assert result.exit_code == 0
+        assert len(requested) == 1
+        assert "Distance (km)" in result.stdout
+        (query,) = mock_client.iter_brewery_pages.call_args.args
+        assert query.per_page == 5
+
+    def test_sort_without_limit_orders_page(
+        self, mock_client, cli_runner, response_data
+    ):
+        mock_client.get_brewery_filters.return_value = response_data
+
+        result = cli_runner.invoke(cli.search, ["--sort-by", "state", "--descending"])
+
+        assert result.exit_code == 0
+        assert result.stdout.index("Another Brewery") < result.stdout.index(
+            "Test Brewery"
+        )
+
+    def test_distance_requires_by_dist(self, mock_client, cli_runner):
+        result = cli_runner.invoke(cli.search, ["--sort-by", "distance"])
+
+        assert result.exit_code != 0
+        assert "requires --by-dist" in result.output
+        mock_client.get_brewery_filters.assert_not_called()
+
+
+class TestNearest:
+    @pytest.fixture(autouse=True)
+    def synced_mirror(
+        self, mock_client, cli_runner, response_data, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        mock_client.iter_brewery_pages.return_value = iter([response_data])
+        cli_runner.invoke(cli.cli, ["mirror", "sync"])
+
+    def test_csv_in_csv_out(self, cli_runner, tmp_path):
+        points = tmp_path / "points.csv"
+        points.write_text('id,coord\nsf,"37.77,-122.41"\nnyc,"40.7,-74.0"\n')
+        output = tmp_path / "out.csv"
+
+        result = cli_runner.invoke(
+            cli.cli, ["nearest", str(points), "-k", "2", "-o", str(output)]
+        )
+
+        assert result.exit_code == 0
+        assert "2 points assigned." in result.stderr
+        rows = output.read_text().splitlines()
+        assert rows[0].startswith("point,latitude,longitude,rank,brewery_id")
+        assert rows[1].startswith("sf,37.77,-122.41,1,1,Test Brewery")
+        assert rows[3].startswith("nyc,40.7,-74.0,1,2,Another Brewery")
+        assert len(rows) == 5
+
+    def test_jsonl_from_stdin(self, cli_runner):
+        result = cli_runner.invoke(
+            cli.cli,
+            ["nearest", "-", "--by-type", "nano"],
+            input='{"coord": "37.77,-122.41"}\n{"coord": "oops"}\n',
+        )
+
+        (record,) = [json.loads(line) for line in result.stdout.splitlines()]
+        assert record["point"] == "1"
+        assert record["brewery_id"] == "2"
+        assert "Skipping point on line 2" in result.stderr
+
+    def test_compressed_input_and_output(self, cli_runner, tmp_path):
+        points = tmp_path / "points.jsonl.xz"
+        points.write_bytes(lzma.compress(b'{"id": "sf", "coord": "37.77,-122.41"}\n'))
+        output = tmp_path / "out.jsonl.gz"
+
+        result = cli_runner.invoke(cli.cli, ["nearest", str(points), "-o", str(output)])
+
+        assert result.exit_code == 0
+        (record,) = gzip.decompress(output.read_bytes()).decode().splitlines()
+        assert json.loads(record)["point"] == "sf"
+
+    def test_empty_mirror(self, cli_runner, tmp_path, monkeypatch):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "empty.sqlite3"))
+
+        result = cli_runner.invoke(cli.cli, ["nearest", "-"], input="1,2\n")
+
+        assert result.exit_code == 1
+        assert "mirror sync" in result.stderr
+
+
+class TestWatch:
+    def test_prints_changes_between_polls(
+        self, mock_client, cli_runner, response_data, mocker
+    ):
+        sleep = mocker.patch("brewcli.cli.sleep")
+        closed = dict(response_data[1], brewery_type="closed")
+        mock_client.get_brewery_page_if_changed.side_effect = [
+            (response_data, '"a"'),
+            (None, '"a"'),
+            ([response_data[0], closed], '"b"'),
+        ]
+
+        result = cli_runner.invoke(
+            cli.cli, ["watch", "--by-city", "Sample City", "--count", "3"]
+        )
+
+        assert result.exit_code == 0
+        assert "Watching 2 breweries" in result.stderr
+        assert "! Another Brewery is now closed [2]" in result.stdout
+        assert "brewery_type 'nano' -> 'closed'" in result.stdout
+        assert len(result.stdout.splitlines()) == 2
+        assert sleep.call_count == 2
+        query, etag = mock_client.get_brewery_page_if_changed.call_args.args
+        assert query.city == "Sample City"
+        assert etag == '"a"'
+
+    def test_json_and_http_errors(self, mock_client, cli_runner, response_data, mocker):
+        mocker.patch("brewcli.cli.sleep")
+        mock_client.get_brewery_page_if_changed.side_effect = [
+            ([response_data[0]], None),
+            httpx.HTTPError("boom"),
+            (response_data, None),
+        ]
+
+        result = cli_runner.invoke(
+            cli.cli, ["watch", "--interval", "0", "--count", "3", "--json"]
+        )
+
+        assert "HTTP error" in result.stderr
+        (event,) = [json.loads(line) for line in result.stdout.splitlines()]
+        assert event["event"] == "added"
+        assert event["id"] == "2"
+
+    def test_rejects_repeated_filters(self, mock_client, cli_runner):
+        result = cli_runner.invoke(
+            cli.cli, ["watch", "--by-city", "A", "--by-city", "B"]
+        )
+
+        assert result.exit_code != 0
+        mock_client.get_brewery_page_if_changed.assert_not_called()
+
+
+class TestDedupe:
+    def test_reports_clusters(
+        self, mock_client, cli_runner, response_data, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        copy = dict(response_data[0], id="1b", name="Test Brewing Co")
+        mock_client.iter_brewery_pages.return_value = iter([[*response_data, copy]])
+        cli_runner.invoke(cli.cli, ["mirror", "sync"])
+
+        result = cli_runner.invoke(cli.cli, ["dedupe", "--json"])
+
+        assert result.exit_code == 0
+        (cluster,) = [json.loads(line) for line in result.stdout.splitlines()]
+        assert cluster["ids"] == ["1", "1b"]
+        assert "1 duplicate clusters among 3 breweries" in result.stderr
+
+        result = cli_runner.invoke(cli.cli, ["dedupe"])
+        assert "Test Brewing Co" in result.stdout
+
+
+class TestCodecs:
+    def test_compares_codecs_on_sample(self, cli_runner, response_data, tmp_path):
+        sample = tmp_path / "sample.jsonl"
+        sample.write_text(json.dumps(response_data) * 50)
+
+        result = cli_runner.invoke(cli.cli, ["codecs", str(sample), "--repeat", "1"])
+
+        assert result.exit_code == 0
+        assert "gzip" in result.stdout
+        assert "lzma" in result.stdout
+
+    @pytest.mark.skipif(
+        importlib.util.find_spec("zstandard") is not None,
+        reason="zstandard is installed",
+    )
+    def test_zstd_cache_codec_needs_package(self, cli_runner):
+        result = cli_runner.invoke(
+            cli.cli, ["--cache", "--cache-codec", "zstd", "random", "1"]
+        )
+
+        assert result.exit_code != 0
+        assert "zstandard" in result.output
+
+
+class TestCompletion:
+    def test_city_values_complete_from_mirror(
+        self, mock_client, cli_runner, response_data, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_MIRROR", str(tmp_path / "mirror.sqlite3"))
+        mock_client.iter_brewery_pages.return_value = iter([response_data])
+        cli_runner.invoke(cli.cli, ["mirror", "sync"])
+
+        result = cli_runner.invoke(
+            cli.cli,
+            prog_name="brewcli",
+            env={
+                "_BREWCLI_COMPLETE": "bash_complete",
+                "COMP_WORDS": "brewcli search --by-city sam",
+                "COMP_CWORD": "3",
+            },
+        )
+
+        assert result.stdout.splitlines() == ["plain,Sample City"]
+        mock_client.get_brewery_filters.assert_not_called()
+
+
+class TestCacheStats:
+    def test_counts_lookups_across_runs(
+        self, mock_client, cli_runner, response_data, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_CACHE_DIR", str(tmp_path))
+        mock_client.get_brewery_filters.return_value = response_data
+
+        for state in ("Ohio", "Ohio"):
+            cli_runner.invoke(cli.cli, ["--cache", "search", "--by-state", state])
+
+        result = cli_runner.invoke(cli.cli, ["cache", "stats", "--json", "--reset"])
+
+        assert result.exit_code == 0
+        stats = json.loads(result.stdout)
+        # A one-shot run has no result cache worth counting; only the daemon does.
+        assert "results" not in stats["layers"]
+        assert stats["entries"] == 0
+        result = cli_runner.invoke(cli.cli, ["cache", "stats"])
+        assert "On disk: 0 responses" in result.stdout
+        assert "results" not in result.stdout
+
+    def test_equivalent_search_in_one_process_is_not_refetched(
+        self, mock_client, response_data, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("BREWCLI_CACHE_DIR", str(tmp_path))
+        mock_client.get_brewery_filters.return_value = response_data
+        # A long-lived process such as the daemon keeps its result cache.
+        obj = {"results": cli.ResultCache(), "cache_stats": cli.CacheStats()}
+
+        for state in ("Ohio", " ohio "):
+            cli.cli.main(
+                ["search", "--by-state", state], obj=dict(obj), standalone_mode=False
+            )
+
+        mock_client.get_brewery_filters.assert_called_once()
+        results = cli.load_stats()["results"]
+        assert (results.hits, results.misses) == (1, 1)
@@ -0,0 +1,146 @@
+"""Tests for the shell completion prefix index in completion.py."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from brewcli.completion import (
+    PrefixIndex,
+    build_index,
+    complete_from_env,
+    load_index,
+)
+from brewcli.mirror import Mirror
+from brewcli.models import Brewery
+
+
+@pytest.fixture
+def mirror_path(tmp_path, brewery_data):
+    path = tmp_path / "mirror.sqlite3"
+    cities = ["Denver", "Denver", "denver", "Dayton", "Boulder", None]
+    with Mirror(path) as store:
+        store.sync(
+            Brewery.from_dict(dict(brewery_data, id=str(i), city=city))
+            for i, city in enumerate(cities)
+        )
+    return path
+
+
+def test_prefix_matches_rank_by_count():
+    index = PrefixIndex(
+        {"city": {"Denver": 3, "Dayton": 1, "Dallas": 1, "Boulder": 5, "D": 1}}
+    )
+
+    assert index.complete("city", "da") == [("Dallas", 1), ("Dayton", 1)]
+    assert index.complete("city", "D") == [
+        ("Denver", 3),
+        ("D", 1),
+        ("Dallas", 1),
+        ("Dayton", 1),
+    ]
+    assert index.complete("city", "", limit=2) == [("Boulder", 5), ("Denver", 3)]
+    assert index.complete("city", "x") == []
+    assert index.complete("state", "d") == []
+
+
+def test_case_variants_merge_under_most_common_spelling():
+    index = PrefixIndex({"city": {"denver": 1, "Denver": 2}})
+
+    assert index.complete("city", "DEN") == [("Denver", 3)]
+
+
+def test_build_from_mirror_and_reload(mirror_path, tmp_path):
+    path = tmp_path / "completions.json"
+
+    built = build_index(mirror_path, path)
+    loaded = PrefixIndex.load(path)
+
+    assert loaded.complete("city", "d") == [("Denver", 3), ("Dayton", 1)]
+    assert loaded.complete("city", "d") == built.complete("city", "d")
+    # Every type completes, including ones no brewery has.
+    assert ("nano", 0) in loaded.complete("type", "n")
+
+
+def test_load_rebuilds_when_mirror_changes(mirror_path, tmp_path, brewery_data):
+    path = tmp_path / "completions.json"
+    assert load_index(mirror_path, path).complete("city", "a") == []
+
+    with Mirror(mirror_path) as store:
+        store.sync([Brewery.from_dict(dict(brewery_data, city="Austin"))])
+    stat = mirror_path.stat()
+    os.utime(mirror_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    assert load_index(mirror_path, path).complete("city", "a") == [("Austin", 1)]
+
+
+def test_load_without_mirror_or_with_bad_index(mirror_path, tmp_path):
+    assert load_index(tmp_path / "missing.sqlite3") is None
+
+    path = tmp_path / "completions.json"
+    path.write_text("not json")
+    assert load_index(mirror_path, path).complete("city", "b") == [("Boulder", 1)]
+
+
+@pytest.fixture
+def completing(mirror_path, monkeypatch):
+    """Sets up a completion request against `mirror_path`."""
+    monkeypatch.setenv("BREWCLI_MIRROR", str(mirror_path))
+
+    def request(shell, words, cword):
+        monkeypatch.setenv("_BREWCLI_COMPLETE", f"{shell}_complete")
+        monkeypatch.setenv("COMP_WORDS", words)
+        monkeypatch.setenv("COMP_CWORD", cword)
+        return complete_from_env()
+
+    return request
+
+
+def test_complete_from_env_formats_for_each_shell(completing):
+    words = "brewcli search --by-city de"
+
+    assert completing("bash", words, "3") == "plain,Denver"
+    assert completing("zsh", words, "3") == "plain\nDenver\n3 breweries"
+    assert completing("fish", words, "de") == "plain,Denver\t3 breweries"
+    assert completing("bash", "brewcli search --by-city=b", "2") == "plain,Boulder"
+    assert completing("bash", "brewcli stats --by-type n", "3").startswith("plain,nano")
+
+
+@pytest.mark.parametrize(
+    ("words", "cword"),
+    [
+        ("brewcli sea", "1"),
+        ("brewcli search --by-city de --", "4"),
+        ("brewcli search --by-name de", "3"),
+        ("brewcli search --by-city de", "x"),
+    ],
+)
+def test_complete_from_env_leaves_other_requests_to_click(completing, words, cword):
+    assert completing("bash", words, cword) is None
+
+
+def test_entry_point_completes_without_importing_the_cli(mirror_path):
+    script = (
+        "import sys; from brewcli.daemon import main; main(); "
+        "print(sorted(m for m in sys.modules if m == 'brewcli.cli' "
+        "or m.split('.')[0] in {'click', 'httpx', 'rich'}), file=sys.stderr)"
+    )
+    env = dict(
+        os.environ,
+        BREWCLI_MIRROR=str(mirror_path),
+        _BREWCLI_COMPLETE="bash_complete",
+        COMP_WORDS="brewcli search --by-city d",
+        COMP_CWORD="3",
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.splitlines() == ["plain,Denver", "plain,Dayton"]
+    assert result.stderr.strip() == "[]"
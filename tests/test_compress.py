@@ -0,0 +1,83 @@
+"""Tests for compression codecs in compress.py."""
+
+import importlib.util
+import io
+
+import pytest
+
+from brewcli.compress import (
+    GZIP,
+    LZMA,
+    NONE,
+    accept_encoding,
+    codec_for_path,
+    compare_codecs,
+    decompress,
+    detect,
+    get_codec,
+    open_text,
+    sniff,
+)
+
+PAYLOAD = b'{"id": "1", "name": "Test Brewery", "city": "Denver"}\n' * 200
+HAS_ZSTD = importlib.util.find_spec("zstandard") is not None
+
+
+@pytest.mark.parametrize("codec", [NONE, GZIP, LZMA])
+def test_round_trip_and_detection(codec):
+    compressed = codec.compress(PAYLOAD)
+
+    assert detect(compressed) == codec
+    assert decompress(compressed) == PAYLOAD
+
+
+def test_gzip_output_is_reproducible():
+    assert GZIP.compress(PAYLOAD) == GZIP.compress(PAYLOAD)
+
+
+def test_codec_lookup():
+    assert get_codec("lzma") is LZMA
+    assert codec_for_path("out.jsonl.gz") is GZIP
+    assert codec_for_path("out.csv") is NONE
+    with pytest.raises(ValueError, match="Unknown codec"):
+        get_codec("bz2")
+
+
+@pytest.mark.skipif(HAS_ZSTD, reason="zstandard is installed")
+def test_zstd_needs_optional_package():
+    with pytest.raises(ValueError, match="zstandard"):
+        get_codec("zstd")
+    assert "zstd" not in accept_encoding()
+
+
+@pytest.mark.skipif(not HAS_ZSTD, reason="zstandard is not installed")
+def test_zstd_round_trip():
+    codec = get_codec("zstd")
+
+    assert decompress(codec.compress(PAYLOAD)) == PAYLOAD
+    assert "zstd" in accept_encoding()
+
+
+@pytest.mark.parametrize("codec", [NONE, GZIP, LZMA])
+def test_open_text_streams_and_keeps_file_open(codec):
+    file = io.BytesIO()
+
+    with open_text(file, codec) as text:
+        text.write("héllo\n")
+
+    assert not file.closed
+    assert decompress(file.getvalue()) == "héllo\n".encode()
+
+    found, stream = sniff(io.BytesIO(file.getvalue()))
+    assert found == codec
+    with open_text(stream, found, "r") as text:
+        assert text.read() == "héllo\n"
+
+
+def test_compare_codecs_reports_ratio_and_cost():
+    reports = {r.codec: r for r in compare_codecs(PAYLOAD, [NONE, GZIP], repeat=1)}
+
+    assert reports["none"].ratio == 1.0
+    assert reports["gzip"].ratio > 10
+    assert reports["gzip"].size == len(PAYLOAD)
+    assert reports["gzip"].decompress_seconds >= 0
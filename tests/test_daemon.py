@@ -0,0 +1,236 @@
+"""Tests for the warm daemon and its thin client in daemon.py."""
+
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+
+import pytest
+
+from brewcli import cli
+from brewcli import daemon as daemon_module
+from brewcli.brewery import BreweryAPI
+from brewcli.cache import MemoryCache
+from brewcli.daemon import DaemonServer, default_socket_path, forward
+from brewcli.resilience import CircuitBreaker
+
+
+@pytest.fixture
+def socket_path():
+    """A short socket path (AF_UNIX paths are limited to ~100 bytes)."""
+    directory = tempfile.mkdtemp(prefix="brewcli-", dir="/tmp")
+    yield os.path.join(directory, "d.sock")
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+@pytest.fixture
+def daemon(socket_path):
+    with (
+        BreweryAPI(cache=MemoryCache(), breaker=CircuitBreaker()) as client,
+        DaemonServer(
+            socket_path, {"client": client, "breaker": client.breaker}
+        ) as server,
+    ):
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+
+
+def test_forward_returns_none_without_daemon(socket_path):
+    assert forward(["random", "1"], socket_path) is None
+
+
+def test_forwarded_command_uses_warm_client(
+    httpx_mock, daemon, socket_path, brewery_data
+):
+    httpx_mock.add_response(json=[brewery_data], is_reusable=True)
+
+    first = forward(["search", "--by-city", "Grandville"], socket_path)
+    second = forward(["search", "--by-city", "Grandville"], socket_path)
+
+    assert first is not None and second is not None
+    assert first["exit_code"] == 0
+    assert "Osgood Brewing" in first["stdout"]
+    assert second["stdout"] == first["stdout"]
+    assert daemon.state["client"].client.is_closed is False
+
+
+def test_global_options_are_honoured_in_daemon(
+    httpx_mock, daemon, socket_path, brewery_data
+):
+    httpx_mock.add_response(json=brewery_data, is_reusable=True)
+
+    for argv in (["by-id", "b1"], ["by-id", "b1"]):
+        assert forward(argv, socket_path)["exit_code"] == 0
+    assert len(httpx_mock.get_requests()) == 1
+
+    reply = forward(
+        ["--cache-ttl", "0", "--max-stale", "0", "by-id", "b1"], socket_path
+    )
+
+    assert reply is not None and reply["exit_code"] == 0, reply
+    assert len(httpx_mock.get_requests()) == 2
+
+
+def test_forwarded_stdin_and_exit_codes(httpx_mock, daemon, socket_path, brewery_data):
+    httpx_mock.add_response(json=[brewery_data, dict(brewery_data, id="2")])
+
+    reply = forward(["by-id", "--file", "-"], socket_path, stdin="2\nnope\n")
+    usage = forward(["random", "0"], socket_path)
+
+    assert reply is not None and usage is not None
+    assert "Osgood Brewing" in reply["stdout"]
+    assert "Not found (1): nope" in reply["stderr"]
+    assert usage["exit_code"] == 2
+    assert "Invalid value" in usage["stderr"]
+
+
+def test_serve_is_not_run_inside_daemon(daemon, socket_path):
+    reply = forward(["serve"], socket_path)
+
+    assert reply is not None
+    assert reply["exit_code"] == 2
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["watch"],
+        ["batch", "-"],
+        ["mirror", "sync"],
+        ["stats"],
+        ["dedupe"],
+        ["codecs", "-"],
+        ["random", "500"],
+    ],
+)
+def test_long_running_and_binary_commands_stay_local(daemon, socket_path, argv):
+    reply = forward(argv, socket_path)
+
+    assert reply is not None
+    assert reply["exit_code"] == 2
+    assert "cannot run in the daemon" in reply["stderr"]
+
+
+def test_command_errors_are_replied(daemon, socket_path, monkeypatch):
+    def crash(**kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(cli.cli, "main", crash)
+
+    reply = forward(["random", "1"], socket_path)
+
+    assert reply is not None
+    assert reply["exit_code"] == 1
+    assert "boom" in reply["stderr"]
+
+
+@pytest.mark.parametrize(
+    ("argv", "expected"),
+    [
+        (["search", "--by-city", "mirror"], ["search", "--by-city", "mirror"]),
+        (["--cache-ttl", "0", "--cache", "by-id", "x"], ["by-id", "x"]),
+        (["--cache-codec=gzip", "stats"], ["stats"]),
+        (["--fail-after", "2", "--", "random", "1"], ["random", "1"]),
+        (["--timings"], []),
+    ],
+)
+def test_command_args_skip_global_options(argv, expected):
+    assert daemon_module.command_args(argv) == expected
+
+
+def test_global_value_options_match_cli():
+    value_options = {
+        opt
+        for param in cli.cli.params
+        if not getattr(param, "is_flag", True)
+        for opt in param.opts
+    }
+
+    assert value_options == daemon_module.GLOBAL_VALUE_OPTIONS
+
+
+@pytest.mark.parametrize(
+    ("argv", "local"),
+    [
+        (["search", "--by-city", "mirror"], False),
+        (["--fail-after", "1", "mirror", "info"], True),
+        (["dedupe"], True),
+        (["random", "50"], False),
+        (["random", "51"], True),
+    ],
+)
+def test_runs_locally(argv, local):
+    assert daemon_module.runs_locally(argv) is local
+
+
+def test_option_value_named_like_a_command_is_forwarded(
+    httpx_mock, daemon, socket_path, brewery_data
+):
+    httpx_mock.add_response(json=[brewery_data])
+
+    reply = forward(["search", "--by-city", "mirror"], socket_path)
+
+    assert reply is not None
+    assert reply["exit_code"] == 0, reply["stderr"]
+
+
+def test_busy_daemon_turns_commands_away(daemon, socket_path, monkeypatch):
+    monkeypatch.setattr(daemon_module, "LOCK_TIMEOUT", 0.05)
+
+    with daemon.run_lock:
+        assert forward(["random", "1"], socket_path) is None
+
+
+def test_unanswered_command_falls_back_after_timeout(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(socket_path)
+        server.listen()
+
+        assert forward(["random", "1"], socket_path, timeout=0.1) is None
+
+
+def test_no_reply_after_connecting_is_an_error(socket_path):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(socket_path)
+        server.listen()
+
+        def hang_up():
+            connection, _ = server.accept()
+            connection.recv(1024)
+            connection.close()
+
+        thread = threading.Thread(target=hang_up, daemon=True)
+        thread.start()
+        reply = forward(["mirror", "info"], socket_path)
+        thread.join(timeout=5)
+
+    # Not None: falling back in-process would run the command twice.
+    assert reply is not None
+    assert reply["exit_code"] == 1
+
+
+def test_socket_of_another_user_is_not_used(daemon, socket_path, monkeypatch):
+    monkeypatch.setattr(daemon_module.os, "getuid", lambda: os.geteuid() + 1)
+
+    assert forward(["random", "1"], socket_path) is None
+
+
+def test_default_socket_is_in_private_directory(tmp_path, monkeypatch):
+    monkeypatch.delenv("BREWCLI_SOCKET", raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+
+    path = default_socket_path()
+
+    directory = os.path.dirname(path)
+    assert directory == str(tmp_path / f"brewcli-{os.getuid()}")
+    daemon_module._ensure_private_dir(directory)
+    assert stat.S_IMODE(os.lstat(directory).st_mode) == 0o700
+
+    os.chmod(directory, 0o777)
+    with pytest.raises(RuntimeError):
+        daemon_module._ensure_private_dir(directory)
@@ -0,0 +1,66 @@
+"""Tests for near-duplicate detection in dedupe.py."""
+
+import pytest
+
+from brewcli.dedupe import (
+    DedupeStats,
+    find_duplicates,
+    name_tokens,
+    normalize,
+    similarity,
+)
+from brewcli.geo import geohash
+from brewcli.models import Brewery
+
+
+@pytest.fixture
+def make(brewery_data):
+    def make(brewery_id, **changes):
+        return Brewery.from_dict(dict(brewery_data, id=brewery_id, **changes))
+
+    return make
+
+
+def test_normalize_and_name_tokens():
+    assert normalize("  Brasserie  Dieu du Ciel!  ") == "brasserie dieu du ciel"
+    assert normalize("Café Öl") == "cafe ol"
+    assert name_tokens("The Osgood Brewing Co.") == ["osgood"]
+
+
+def test_geohash_known_value():
+    assert geohash(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_similarity_separates_duplicates_from_chains(make):
+    original = make("1")
+    relisted = make("2", name="Osgood Brewing LLC", phone="(111) 111-1111")
+    branch = make("3", city="Detroit", street="1 Other Rd", postal_code="48201")
+    branch.address.coordinate = None
+
+    assert similarity(original, relisted) > 0.9
+    assert similarity(original, branch) < 0.75
+
+
+def test_find_duplicates_clusters_transitively(make):
+    breweries = [
+        make("a"),
+        make("b", name="Osgood Brewing Company"),
+        make("c", name="Osgood Brew Pub", latitude=42.9092),
+        make("d", name="Unrelated Ales", phone=None, website_url=None),
+    ]
+    stats = DedupeStats()
+
+    (cluster,) = find_duplicates(breweries, stats=stats)
+
+    assert [b.id for b in cluster.breweries] == ["a", "b", "c"]
+    assert len(cluster.pairs) >= 2
+    assert stats.comparisons <= 6
+
+
+def test_oversized_blocks_are_skipped(make):
+    breweries = [make(str(i)) for i in range(5)]
+    stats = DedupeStats()
+
+    assert find_duplicates(breweries, max_block_size=4, stats=stats) == []
+    assert stats.skipped_blocks > 0
+    assert stats.comparisons == 0
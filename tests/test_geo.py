@@ -0,0 +1,94 @@
+"""Tests for distance helpers in geo.py."""
+
+import pytest
+
+from brewcli.geo import (
+    BoundingBox,
+    centroid,
+    haversine_km,
+    parse_distance,
+    within_radius,
+)
+from brewcli.models import Brewery, Coordinate
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("25km", (25.0, "km")),
+        ("10 mi", (16.09344, "mi")),
+        ("500M", (0.5, "m")),
+        (".5km", (0.5, "km")),
+    ],
+)
+def test_parse_distance(text, expected):
+    distance, unit = parse_distance(text)
+    assert distance == pytest.approx(expected[0])
+    assert unit == expected[1]
+
+
+@pytest.mark.parametrize("text", ["25", "km", "-5km", "10 furlongs"])
+def test_parse_distance_invalid(text):
+    with pytest.raises(ValueError, match="Invalid distance"):
+        parse_distance(text)
+
+
+def test_haversine_london_paris():
+    assert haversine_km(51.5074, -0.1278, 48.8566, 2.3522) == pytest.approx(
+        343.5, abs=1
+    )
+
+
+def test_bounding_box_contains_circle():
+    center = Coordinate(45.0, -93.0)
+    box = BoundingBox.around(center, 100)
+
+    for lat, lon in [(45.899, -93.0), (44.101, -93.0), (45.0, -94.26), (45.0, -91.74)]:
+        assert haversine_km(45.0, -93.0, lat, lon) < 100
+        assert box.contains(lat, lon)
+    assert not box.contains(46.0, -93.0)
+    assert not box.contains(45.0, -95.0)
+
+
+def test_bounding_box_across_antimeridian():
+    box = BoundingBox.around(Coordinate(0.0, 179.9), 50)
+
+    assert box.crosses_antimeridian
+    assert box.contains(0.0, -179.9)
+    assert box.contains(0.0, 179.8)
+    assert not box.contains(0.0, 0.0)
+
+
+def test_bounding_box_around_pole_spans_all_longitudes():
+    box = BoundingBox.around(Coordinate(89.9, 0.0), 50)
+
+    assert (box.min_lon, box.max_lon, box.max_lat) == (-180.0, 180.0, 90.0)
+
+
+def test_within_radius_sorts_and_drops_far_or_unlocated(brewery_data):
+    def at(brewery_id, lat, lon):
+        return Brewery.from_dict(
+            dict(brewery_data, id=brewery_id, latitude=lat, longitude=lon)
+        )
+
+    breweries = [
+        at("far", 46.0, -93.0),
+        at("near", 45.01, -93.0),
+        at("nearer", 45.001, -93.0),
+        at("nowhere", None, None),
+    ]
+
+    found = within_radius(breweries, Coordinate(45.0, -93.0), 25)
+
+    assert [b.id for _, b in found] == ["nearer", "near"]
+    assert found[1][0] == pytest.approx(1.11, abs=0.01)
+
+
+def test_centroid_averages_across_antimeridian():
+    latitude, longitude = centroid([(10.0, 179.0), (10.0, -179.0)])
+
+    assert latitude == pytest.approx(10.0, abs=0.01)
+    assert abs(longitude) == pytest.approx(180.0)
+    assert centroid([(1.0, 2.0)]) == pytest.approx((1.0, 2.0))
+    with pytest.raises(ValueError):
+        centroid([])
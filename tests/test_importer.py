@@ -0,0 +1,97 @@
+"""Tests for parallel dump imports in importer.py."""
+
+import io
+import json
+
+import pytest
+
+from brewcli.importer import import_dump, parse_chunk, read_chunks
+from brewcli.mirror import Mirror
+
+
+@pytest.fixture
+def records(brewery_data):
+    return [dict(brewery_data, id=str(i), name=f"Brewery {i}") for i in range(25)]
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    with Mirror(tmp_path / "mirror.sqlite3") as store:
+        yield store
+
+
+def test_read_chunks_json_array(records):
+    dump = io.StringIO("  \n" + json.dumps(records))
+
+    chunks = list(read_chunks(dump, chunk_size=10))
+
+    assert [(start, len(chunk)) for start, chunk in chunks] == [
+        (1, 10),
+        (11, 10),
+        (21, 5),
+    ]
+    assert chunks[0][1][0] == records[0]
+
+
+def test_read_chunks_jsonl_keeps_lines(records):
+    dump = io.StringIO("\n".join(json.dumps(r) for r in records[:3]) + "\n\n")
+
+    ((start, chunk),) = read_chunks(dump)
+
+    assert start == 1
+    assert [json.loads(line)["id"] for line in chunk] == ["0", "1", "2"]
+
+
+def test_parse_chunk_reports_invalid_records(records):
+    rows, errors = parse_chunk(5, [records[0], "{not json", {"name": "no id"}])
+
+    assert [row[0] for row in rows] == ["0"]
+    assert errors[0].startswith("Record 6: JSONDecodeError")
+    assert errors[1].startswith("Record 7: KeyError")
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_import_dump(records, mirror, workers):
+    dump = io.StringIO("\n".join(json.dumps(r) for r in records))
+    progress = []
+
+    report = import_dump(
+        dump,
+        mirror,
+        workers=workers,
+        chunk_size=4,
+        on_progress=lambda r: progress.append(r.records),
+    )
+
+    assert report.records == 25
+    assert report.errors == []
+    assert len(report.delta.inserted) == 25
+    assert progress == [4, 8, 12, 16, 20, 24, 25]
+    assert mirror.get("7").name == "Brewery 7"
+
+
+def test_reimport_writes_only_changes(records, mirror):
+    import_dump(io.StringIO(json.dumps(records)), mirror, workers=1)
+    records[3]["name"] = "Renamed"
+
+    report = import_dump(
+        io.StringIO(json.dumps(records[:20])), mirror, workers=1, complete=True
+    )
+
+    assert report.delta.updated == ["3"]
+    assert report.delta.unchanged == 19
+    assert len(report.delta.deleted) == 5
+    assert len(mirror) == 20
+
+
+def test_invalid_record_prevents_pruning(records, mirror):
+    import_dump(io.StringIO(json.dumps(records)), mirror, workers=1)
+    dump = [*records[:20], {"id": "21", "name": "no type"}]
+
+    report = import_dump(
+        io.StringIO(json.dumps(dump)), mirror, workers=1, complete=True
+    )
+
+    assert len(report.errors) == 1
+    assert report.delta.deleted == []
+    assert len(mirror) == 25
@@ -0,0 +1,96 @@
+"""Tests for the `--memprofile` tracker in memprofile.py."""
+
+import io
+import threading
+import tracemalloc
+
+import pytest
+from rich.console import Console
+
+from brewcli.brewery import BreweryAPI
+from brewcli.memprofile import MemoryProfile
+from brewcli.render import render_memprofile
+
+
+@pytest.fixture
+def profile():
+    profile = MemoryProfile(top=3)
+    profile.start()
+    yield profile
+    profile.stop()
+
+
+def test_phase_records_peak_and_sites(profile):
+    with profile.phase("parse"):
+        data = [bytearray(1024) for _ in range(100)]
+
+    result = profile.phases["parse"]
+    assert result.calls == 1
+    assert result.peak >= 100 * 1024
+    assert result.retained >= 100 * 1024
+    site, _ = result.top_sites(1)[0]
+    assert site.startswith(__file__)
+    del data
+
+
+def test_nested_phase_is_skipped(profile):
+    with profile.phase("parse"), profile.phase("render"):
+        pass
+
+    assert profile.phases["parse"].skipped == 0
+    assert profile.phases["render"].calls == 1
+    assert profile.phases["render"].skipped == 1
+
+
+def test_phase_waiting_on_another_threads_phase_does_not_block(profile):
+    """Parsing pages fetched by a worker inside its network phase must not hang."""
+
+    def fetch():
+        with profile.phase("network"):
+            bytearray(1024)
+
+    with profile.phase("parse"):
+        worker = threading.Thread(target=fetch)
+        worker.start()
+        worker.join(timeout=5)
+        assert not worker.is_alive()
+
+    assert profile.phases["network"].skipped == 1
+    with profile.phase("network"):
+        pass
+    assert profile.phases["network"].calls == 2
+    assert profile.phases["network"].skipped == 1
+
+
+def test_phase_is_noop_when_not_tracing():
+    profile = MemoryProfile()
+    assert not tracemalloc.is_tracing()
+
+    with profile.phase("parse"):
+        pass
+
+    assert profile.phases == {}
+
+
+def test_client_profiles_network_and_decode(httpx_mock, profile):
+    httpx_mock.add_response(json=[{"id": str(i)} for i in range(100)])
+
+    with BreweryAPI(memprofile=profile) as client:
+        client.get_random_breweries(100)
+
+    assert set(profile.phases) == {"network", "decode"}
+    assert profile.phases["decode"].peak > 0
+
+
+def test_render_memprofile(profile):
+    with profile.phase("render"):
+        data = bytearray(4096)
+    buffer = io.StringIO()
+
+    render_memprofile(profile, out=Console(file=buffer, width=200))
+    output = buffer.getvalue()
+
+    assert "render" in output
+    assert "test_memprofile.py" in output
+    assert "Peak across phases" in output
+    del data
@@ -0,0 +1,83 @@
+"""Tests for the client metrics surface in metrics.py."""
+
+import json
+
+import httpx
+import pytest
+
+from brewcli.brewery import BreweryAPI
+from brewcli.metrics import Histogram, Metrics
+
+
+def test_histogram_cumulative_buckets():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+
+    assert histogram.cumulative() == [("0.1", 1), ("1.0", 3), ("+Inf", 4)]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(6.05)
+
+
+def test_client_counts_requests_per_endpoint(httpx_mock):
+    httpx_mock.add_response(json=[{"id": "1"}], is_reusable=True)
+    metrics = Metrics()
+
+    with BreweryAPI(metrics=metrics) as client:
+        client.get_random_breweries(1)
+        client.get_random_breweries(1)
+        client.get_brewery_by_id("1")
+
+    assert metrics.requests == {"random": 2, "by_id": 1}
+    assert metrics.latency["random"].count == 2
+
+
+def test_client_counts_errors_by_status(httpx_mock):
+    httpx_mock.add_response(status_code=503)
+    metrics = Metrics()
+
+    with BreweryAPI(metrics=metrics) as client, pytest.raises(httpx.HTTPError):
+        client.get_brewery_by_id("1")
+
+    assert metrics.errors == {("by_id", "503"): 1}
+    assert metrics.requests["by_id"] == 1
+
+
+def test_client_counts_transport_errors(httpx_mock):
+    httpx_mock.add_exception(httpx.ConnectError("refused"))
+    metrics = Metrics()
+
+    with BreweryAPI(metrics=metrics) as client, pytest.raises(httpx.HTTPError):
+        client.get_random_breweries(1)
+
+    assert metrics.errors == {("random", "transport"): 1}
+
+
+def test_prometheus_exposition():
+    metrics = Metrics(buckets=(0.5,))
+    metrics.observe_request("search", 0.2)
+    metrics.record_error("search", 500)
+    metrics.record_cache_hit("by_id")
+
+    text = metrics.to_prometheus()
+
+    assert "# TYPE brewcli_requests_total counter" in text
+    assert 'brewcli_requests_total{endpoint="search"} 1' in text
+    assert 'brewcli_errors_total{endpoint="search",status="500"} 1' in text
+    assert 'brewcli_cache_hits_total{endpoint="by_id"} 1' in text
+    assert (
+        'brewcli_request_duration_seconds_bucket{endpoint="search",le="+Inf"} 1' in text
+    )
+    assert text.endswith("\n")
+
+
+def test_json_export():
+    metrics = Metrics()
+    metrics.observe_request("random", 0.01)
+    metrics.record_retry("random")
+
+    data = json.loads(metrics.to_json())
+
+    assert data["requests"] == {"random": 1}
+    assert data["retries"] == {"random": 1}
+    assert data["latency_seconds"]["random"]["count"] == 1
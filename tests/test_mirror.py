@@ -0,0 +1,186 @@
+"""Tests for the local SQLite mirror in mirror.py."""
+
+import pytest
+
+from brewcli.geo import BoundingBox
+from brewcli.mirror import Mirror, content_hash, normalize_postal, to_row
+from brewcli.models import Brewery, Coordinate, SearchQuery
+
+
+@pytest.fixture
+def breweries(brewery_data):
+    return [
+        Brewery.from_dict(dict(brewery_data, id=str(i), name=f"Brewery {i}"))
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    with Mirror(tmp_path / "mirror.sqlite3") as mirror:
+        yield mirror
+
+
+def test_content_hash_ignores_key_order():
+    assert content_hash({"a": 1, "b": None}) == content_hash({"b": None, "a": 1})
+    assert content_hash({"a": 1}) != content_hash({"a": 2})
+
+
+def test_first_sync_inserts_everything(store, breweries):
+    delta = store.sync(breweries)
+
+    assert delta.inserted == ["0", "1", "2"]
+    assert len(store) == 3
+    assert store.last_synced is not None
+    assert store.get("1") == breweries[1]
+
+
+def test_resync_writes_only_changes(store, breweries):
+    store.sync(breweries)
+    changes_before = store.connection.total_changes
+    breweries[0].name = "Renamed"
+    new = Brewery.from_flat_dict(dict(breweries[2].to_flat_dict(), id="3"))
+
+    delta = store.sync([breweries[0], breweries[1], new])
+
+    assert delta.inserted == ["3"]
+    assert delta.updated == ["0"]
+    assert delta.deleted == ["2"]
+    assert delta.unchanged == 1
+    # One upsert per changed row, one delete and the last_synced marker.
+    assert store.connection.total_changes - changes_before == 4
+    assert [b.name for b in store.iter_breweries()] == [
+        "Renamed",
+        "Brewery 1",
+        "Brewery 2",
+    ]
+
+
+def test_unchanged_resync_touches_no_rows(store, breweries):
+    store.sync(breweries)
+
+    delta = store.sync(breweries)
+
+    assert delta.written == 0
+    assert delta.unchanged == 3
+
+
+def test_interrupted_sync_leaves_mirror_untouched(store, breweries):
+    store.sync(breweries)
+
+    def failing():
+        yield breweries[0]
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        store.sync(failing())
+
+    assert len(store) == 3
+
+
+def test_iter_breweries_applies_query_filters(store, brewery_data):
+    store.sync(
+        [
+            Brewery.from_dict(dict(brewery_data, id="1", city="Portland")),
+            Brewery.from_dict(dict(brewery_data, id="2", name="50%_Off Ales")),
+            Brewery.from_dict(dict(brewery_data, id="3", postal_code="97201-1234")),
+        ]
+    )
+
+    def ids(**filters):
+        return [b.id for b in store.iter_breweries(SearchQuery(**filters))]
+
+    assert ids(city="portland") == ["1"]
+    assert ids(name="%_off") == ["2"]
+    assert ids(name="_") == ["2"]
+    assert ids(postal="97201") == ["3"]
+    assert ids(ids=["3", "1"]) == ["1", "3"]
+    assert ids(state="Michigan", type="brewpub") == ["1", "2", "3"]
+
+
+def test_iter_breweries_bounding_box_across_antimeridian(store, brewery_data):
+    store.sync(
+        [
+            Brewery.from_dict(dict(brewery_data, id="east", longitude=179.9)),
+            Brewery.from_dict(dict(brewery_data, id="west", longitude=-179.9)),
+            Brewery.from_dict(dict(brewery_data, id="far", longitude=0.0)),
+        ]
+    )
+    latitude = float(brewery_data["latitude"])
+    bbox = BoundingBox(latitude - 1, latitude + 1, 179.0, -179.0)
+
+    assert [b.id for b in store.iter_breweries(bbox=bbox)] == ["east", "west"]
+
+
+def test_sync_rows_commits_in_batches(store, breweries):
+    commits = []
+    store.connection.set_trace_callback(
+        lambda sql: commits.append(sql) if sql == "COMMIT" else None
+    )
+
+    delta = store.sync_rows((to_row(b) for b in breweries), batch_size=2)
+
+    assert delta.inserted == ["0", "1", "2"]
+    assert len(commits) == 2
+    assert store.get("2") == breweries[2]
+
+
+def test_sync_asks_a_callable_complete_after_the_rows(store, breweries):
+    store.sync(breweries)
+    consumed = []
+
+    def rows():
+        yield breweries[0]
+        consumed.append(True)
+
+    delta = store.sync(rows(), complete=lambda: not consumed)
+
+    assert delta.deleted == []
+    assert len(store) == len(breweries)
+    assert store.sync(breweries[:1], complete=lambda: True).deleted == ["1", "2"]
+
+
+def test_normalize_postal():
+    assert normalize_postal(" 45213-2120 ") == "45213"
+    assert normalize_postal("sw1a 1aa") == "SW1A1AA"
+    assert normalize_postal("00-950") == "00-950"
+
+
+def test_postal_centroids_follow_syncs(store, brewery_data):
+    def brewery(brewery_id, postal_code, latitude, country="United States"):
+        return Brewery.from_dict(
+            dict(
+                brewery_data,
+                id=brewery_id,
+                postal_code=postal_code,
+                latitude=latitude,
+                longitude=-84.5,
+                country=country,
+            )
+        )
+
+    store.sync(
+        [
+            brewery("1", "45213", 39.0),
+            brewery("2", "45213-2120", 39.2),
+            brewery("3", "45213", 50.0, country="Germany"),
+        ]
+    )
+
+    center = store.postal_centroid("45213")
+    assert center.latitude == pytest.approx(39.1, abs=0.001)
+    assert center.longitude == pytest.approx(-84.5)
+    assert store.postal_centroid("45213", "germany") == Coordinate(50.0, -84.5)
+    assert store.postal_centroid("99999") is None
+
+    store.sync([brewery("1", "45213", 39.0)])
+    assert store.postal_centroid("45213").latitude == pytest.approx(39.0)
+    assert store.postal_centroid("45213", "Germany") is None
+
+
+def test_postal_centroids_built_for_older_mirrors(store, breweries):
+    store.sync(breweries)
+    with store.connection:
+        store.connection.execute("DELETE FROM postal_centroids")
+
+    assert store.postal_centroid(breweries[0].address.postal_code) is not None
@@ -1,5 +1,7 @@
 """Tests for classes from models.py"""
 
+import json
+
 import pytest
 
 from brewcli.models import Address, Brewery, BreweryType, Coordinate, SearchQuery
@@ -254,6 +256,30 @@ class TestBrewery:
             "street": "4051 Chicago Dr SW",
         }
 
+    def test_brewery_type_is_coded_as_enum(self, brewery_data):
+        brewery = Brewery.from_dict(brewery_data)
+
+        assert brewery.brewery_type is BreweryType.BREWPUB
+        assert f"{brewery.brewery_type}" == "brewpub"
+        assert type(brewery.to_flat_dict()["brewery_type"]) is str
+
+    def test_unknown_brewery_type_is_kept_as_string(self, brewery_data):
+        brewery_data["brewery_type"] = "taproom"
+
+        brewery = Brewery.from_dict(brewery_data)
+
+        assert brewery.brewery_type == "taproom"
+        assert not isinstance(brewery.brewery_type, BreweryType)
+
+    def test_repeated_location_fields_are_interned(self, brewery_data):
+        first, second = (
+            Brewery.from_dict(json.loads(json.dumps(brewery_data))) for _ in range(2)
+        )
+
+        assert first.address.city is second.address.city
+        assert first.address.state is second.address.state
+        assert first.address.country is second.address.country
+
 
 class TestSearchQuery:
     def test_init_all_fields(self, valid_query_inputs):
@@ -408,3 +434,24 @@ class TestSearchQuery:
             "per_page": 100,
             "sort_order": "asc",
         }
+
+    def test_equivalent_queries_share_a_cache_key(self):
+        """Case, whitespace, ID order and tiny coordinate differences are ignored."""
+        one = SearchQuery(
+            state="Ohio",
+            city="  Cincinnati ",
+            ids=["b", "a"],
+            coord=Coordinate(39.100001, -84.51),
+        )
+        other = SearchQuery(
+            state="OHIO",
+            city="cincinnati",
+            ids=["a", " b", "a"],
+            coord=Coordinate(39.1, -84.510004),
+        )
+
+        assert one.cache_key() == other.cache_key()
+        assert one.canonical().ids == ["a", "b"]
+        assert one.canonical().coord == Coordinate(39.1, -84.51)
+        assert one.cache_key() != SearchQuery(state="Ohio", page=2).cache_key()
+        assert SearchQuery(city="San  Diego").canonical().city == "san diego"
@@ -0,0 +1,96 @@
+"""Tests for the k-d tree and point parsing in nearest.py."""
+
+import random
+
+import pytest
+
+from brewcli.geo import haversine_km
+from brewcli.models import Brewery, Coordinate
+from brewcli.nearest import KDTree, Point, assign_nearest, parse_point, read_points
+
+
+def random_coordinates(rng, count):
+    return [
+        Coordinate(rng.uniform(-89, 89), rng.uniform(-180, 180)) for _ in range(count)
+    ]
+
+
+def test_kdtree_matches_brute_force():
+    rng = random.Random(3)
+    indexed = random_coordinates(rng, 500)
+    tree = KDTree(indexed)
+
+    for target in random_coordinates(rng, 50):
+        expected = sorted(
+            (
+                haversine_km(
+                    target.latitude, target.longitude, c.latitude, c.longitude
+                ),
+                i,
+            )
+            for i, c in enumerate(indexed)
+        )[:5]
+
+        found = tree.query(target, k=5)
+
+        assert [i for _, i in found] == [i for _, i in expected]
+        assert [d for d, _ in found] == pytest.approx([d for d, _ in expected])
+
+
+def test_kdtree_across_antimeridian():
+    tree = KDTree([Coordinate(0, 179.9), Coordinate(0, 170.0), Coordinate(0, -179.9)])
+
+    found = tree.query(Coordinate(0, -179.95), k=2)
+
+    assert [i for _, i in found] == [2, 0]
+
+
+def test_kdtree_with_fewer_points_than_k():
+    tree = KDTree([Coordinate(1, 1)])
+
+    assert [i for _, i in tree.query(Coordinate(0, 0), k=3)] == [0]
+    assert KDTree([]).query(Coordinate(0, 0)) == []
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"id": "depot", "coord": "45.0, -93.0"},
+        {"id": "depot", "coord": [45.0, -93.0]},
+        {"id": "depot", "latitude": "45.0", "longitude": "-93.0"},
+    ],
+)
+def test_parse_point_forms(data):
+    assert parse_point(data, "1") == Point("depot", Coordinate(45.0, -93.0))
+
+
+def test_parse_point_defaults_id():
+    assert parse_point("1,2", "7").id == "7"
+
+
+def test_read_points_csv_reports_bad_rows():
+    lines = ["id,latitude,longitude\n", "a,1,2\n", "b,north,2\n", "c,3,4\n"]
+    errors = []
+
+    points = list(read_points(lines, "csv", on_error=lambda n, e: errors.append(n)))
+
+    assert [p.id for p in points] == ["a", "c"]
+    assert errors == [3]
+
+
+def test_read_points_jsonl_raises_without_handler():
+    with pytest.raises(ValueError, match="Line 2"):
+        list(read_points(['"1,2"\n', "not json\n"], "jsonl"))
+
+
+def test_assign_nearest_skips_unlocated_breweries(brewery_data):
+    breweries = [
+        Brewery.from_dict(dict(brewery_data, id="none", latitude=None)),
+        Brewery.from_dict(dict(brewery_data, id="here")),
+    ]
+    point = Point("p", Coordinate(brewery_data["latitude"], brewery_data["longitude"]))
+
+    records = list(assign_nearest([point], breweries, k=2))
+
+    assert [(r["rank"], r["brewery_id"]) for r in records] == [(1, "here")]
+    assert records[0]["distance_km"] == 0
@@ -0,0 +1,163 @@
+"""Tests for multi-valued search planning in planner.py."""
+
+import threading
+import time
+
+import httpx
+import pytest
+
+from brewcli.brewery import BreweryAPI
+from brewcli.models import SearchQuery
+from brewcli.planner import QueryPlan, plan_search, run_plan, value_matches
+
+
+def test_expands_every_combination():
+    plan = plan_search(
+        {"state": ["Ohio", "Texas", "Maine"], "type": ["micro", "nano"], "city": []},
+        per_page=200,
+    )
+
+    assert plan.is_simple is False
+    assert plan.residual == {}
+    assert len(plan.queries) == 6
+    assert {(q.state, q.type) for q in plan.queries} == {
+        (state, kind)
+        for state in ("Ohio", "Texas", "Maine")
+        for kind in ("micro", "nano")
+    }
+    assert all(q.per_page == 200 and q.city is None for q in plan.queries)
+
+
+def test_single_values_make_a_simple_plan():
+    plan = plan_search({"city": ["Denver"], "type": ["micro"]})
+
+    assert plan.is_simple
+    assert plan.queries == [SearchQuery(city="Denver", type="micro")]
+
+
+def test_no_filters_make_one_unfiltered_query():
+    assert plan_search({}).queries == [SearchQuery()]
+
+
+def test_repeated_values_ignore_case():
+    plan = plan_search({"state": ["Ohio", "ohio", "OHIO"]})
+
+    assert plan.queries == [SearchQuery(state="Ohio")]
+
+
+def test_widest_filter_moves_client_side():
+    plan = plan_search(
+        {"state": ["a", "b", "c", "d", "e"], "type": ["micro", "nano"]},
+        max_queries=4,
+    )
+
+    assert plan.residual == {"state": ("a", "b", "c", "d", "e")}
+    assert [q.type for q in plan.queries] == ["micro", "nano"]
+    assert all(q.state is None for q in plan.queries)
+
+
+@pytest.mark.parametrize(
+    ("name", "wanted", "actual", "expected"),
+    [
+        ("name", "dog", "Dogfish Head", True),
+        ("name", "cat", "Dogfish Head", False),
+        ("postal", "4420", "44202-1234", True),
+        ("postal", "202", "44202-1234", False),
+        ("state", "ohio", "Ohio", True),
+        ("state", "Ohio", "New Ohio", False),
+        ("city", "Austin", None, False),
+    ],
+)
+def test_value_matches(name, wanted, actual, expected):
+    assert value_matches(name, wanted, actual) is expected
+
+
+def test_merge_dedupes_and_filters():
+    plan = QueryPlan(queries=[], residual={"state": ("ohio", "texas")})
+    first = [{"id": "1", "state": "Ohio"}, {"id": "2", "state": "Maine"}]
+    second = [{"id": "1", "state": "Ohio"}, {"id": "3", "state": "Texas"}]
+
+    assert [r["id"] for r in plan.merge([first, second])] == ["1", "3"]
+
+
+def test_run_plan_queries_concurrently(httpx_mock):
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+    barrier = threading.Barrier(2, timeout=5)
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        state = request.url.params["by_state"]
+        page = int(request.url.params["page"])
+        if page == 1:
+            barrier.wait()
+        records = (
+            [{"id": f"{state}-1", "state": state}, {"id": "shared", "state": state}]
+            if page == 1
+            else []
+        )
+        with lock:
+            in_flight -= 1
+        return httpx.Response(200, json=records)
+
+    httpx_mock.add_callback(respond, is_reusable=True)
+    plan = plan_search({"state": ["Ohio", "Texas"]}, per_page=2)
+
+    with BreweryAPI() as client:
+        records = [r for page in run_plan(client, plan, concurrency=2) for r in page]
+
+    assert [r["id"] for r in records] == ["Ohio-1", "shared", "Texas-1"]
+    assert peak == 2
+
+
+def test_run_plan_stays_a_few_pages_ahead():
+    produced = []
+
+    class Client:
+        def iter_brewery_pages(self, query):
+            for number in range(100):
+                produced.append((query.state, number))
+                yield [{"id": f"{query.state}-{number}", "state": query.state}]
+
+    plan = plan_search({"state": ["Ohio", "Texas"]})
+    pages = run_plan(Client(), plan, concurrency=2, prefetch=2)
+
+    assert next(pages) == [{"id": "Ohio-0", "state": "Ohio"}]
+    time.sleep(0.2)
+    # Per query: the consumed page, the queued ones and one waiting to queue.
+    assert len(produced) <= 2 * (1 + 2 + 1)
+    pages.close()
+
+
+def test_run_plan_raises_query_errors():
+    class Client:
+        def iter_brewery_pages(self, query):
+            yield [{"id": "1", "state": query.state}]
+            raise httpx.HTTPError("boom")
+
+    plan = plan_search({"state": ["Ohio", "Texas"]})
+
+    with pytest.raises(httpx.HTTPError, match="boom"):
+        list(run_plan(Client(), plan))
+
+
+def test_run_plan_first_page_only():
+    class Client:
+        def get_brewery_filters(self, query):
+            return [{"id": query.state, "state": query.state}]
+
+        def iter_brewery_pages(self, query):
+            raise AssertionError("paged past the first page")
+
+    plan = plan_search({"state": ["Ohio", "Texas"]})
+
+    pages = list(run_plan(Client(), plan, first_page_only=True))
+
+    assert pages == [
+        [{"id": "Ohio", "state": "Ohio"}],
+        [{"id": "Texas", "state": "Texas"}],
+    ]
@@ -0,0 +1,86 @@
+"""Tests for client-side ordering and top-K selection in ranking.py."""
+
+import random
+
+import pytest
+
+from brewcli.models import Brewery, Coordinate
+from brewcli.ranking import Ordering, distance_km, select, sort_key
+
+
+@pytest.fixture
+def make(brewery_data):
+    def make(brewery_id, **changes):
+        return Brewery.from_dict(dict(brewery_data, id=brewery_id, **changes))
+
+    return make
+
+
+def test_sort_key_ignores_case_and_puts_missing_last(make):
+    breweries = [
+        make("1", city="denver"),
+        make("2", city=None),
+        make("3", city="Austin"),
+    ]
+
+    ascending = sorted(breweries, key=sort_key("city"))
+    descending = sorted(breweries, key=sort_key("city", descending=True), reverse=True)
+
+    assert [b.id for b in ascending] == ["3", "1", "2"]
+    assert [b.id for b in descending] == ["1", "3", "2"]
+
+
+def test_sort_key_by_distance(make):
+    center = Coordinate(42.9, -85.7)
+    far = make("far", latitude="40.0", longitude="-80.0")
+    near = make("near")
+    unknown = make("unknown", latitude=None, longitude=None)
+
+    key = sort_key("distance", center)
+
+    assert [b.id for b in sorted([unknown, far, near], key=key)] == [
+        "near",
+        "far",
+        "unknown",
+    ]
+    assert distance_km(unknown, center) is None
+
+
+def test_sort_key_rejects_bad_fields():
+    with pytest.raises(ValueError, match="center"):
+        sort_key("distance")
+    with pytest.raises(ValueError, match="Invalid sort field"):
+        sort_key("phone")
+
+
+def test_select_matches_full_sort(make):
+    rng = random.Random(5)
+    breweries = [make(str(i), name=f"Brewery {rng.randint(0, 50)}") for i in range(300)]
+    key = sort_key("name")
+
+    for descending in (False, True):
+        expected = sorted(breweries, key=key, reverse=descending)[:10]
+        assert select(iter(breweries), key, 10, descending) == expected
+
+
+def test_select_presorted_stops_consuming(make):
+    consumed = []
+
+    def stream():
+        for i in range(100):
+            consumed.append(i)
+            yield make(str(i))
+
+    result = select(stream(), sort_key("name"), limit=3, presorted=True)
+
+    assert [b.id for b in result] == ["0", "1", "2"]
+    assert len(consumed) == 3
+
+
+def test_ordering_server_order():
+    center = Coordinate(0, 0)
+
+    assert Ordering.of(None).server_order
+    assert Ordering.of("distance", center).server_order
+    assert not Ordering.of("distance", center, descending=True).server_order
+    assert not Ordering.of("name").server_order
@@ -6,7 +6,12 @@ import pytest
 from rich.console import Console
 
 from brewcli.models import Brewery
-from brewcli.render import PLACEHOLDER, render_breweries, render_brewery
+from brewcli.render import (
+    PLACEHOLDER,
+    render_breweries,
+    render_brewery,
+    render_brewery_stream,
+)
 
 
 @pytest.fixture
@@ -80,3 +85,17 @@ class TestRenderBreweries:
         output = buffer.getvalue()
 
         assert PLACEHOLDER in output
+
+
+class TestRenderBreweryStream:
+    def test_renders_every_batch(self, brewery_data, capture_console):
+        second = dict(brewery_data, id="2", name="Second Brewery")
+        batches = iter([[Brewery.from_dict(brewery_data)], [Brewery.from_dict(second)]])
+
+        console, buffer = capture_console
+        count = render_brewery_stream(batches, out=console)
+        output = buffer.getvalue()
+
+        assert count == 2
+        assert "Osgood Brewing" in output
+        assert "Second Brewery" in output
@@ -0,0 +1,293 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+from brewcli.brewery import BreweryAPI
+from brewcli.cache import CachePolicy, MemoryCache
+from brewcli.metrics import Metrics
+from brewcli.models import SearchQuery
+from brewcli.resilience import CircuitBreaker, CircuitOpenError, Hedging, is_failure
+
+URL = "https://api.openbrewerydb.org/v1/breweries"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def status_error(status):
+    request = httpx.Request("GET", URL)
+    return httpx.HTTPStatusError(
+        "error", request=request, response=httpx.Response(status, request=request)
+    )
+
+
+@pytest.mark.parametrize(
+    ("exc", "expected"),
+    [
+        (httpx.ConnectError("refused"), True),
+        (httpx.ReadTimeout("slow"), True),
+        (status_error(503), True),
+        (status_error(429), True),
+        (status_error(404), False),
+        (httpx.HTTPError("other"), False),
+    ],
+)
+def test_is_failure(exc, expected):
+    assert is_failure(exc) is expected
+
+
+class TestCircuitBreaker:
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(failure_threshold=3)
+
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.allow()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+        breaker.record_failure()
+        assert not breaker.allow()
+        assert breaker.is_open
+
+    def test_half_open_admits_one_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 9.9
+        assert not breaker.allow()
+        clock.now = 10
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.allow()
+
+    def test_failed_trial_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        breaker.record_failure()
+
+        clock.now = 10
+        assert breaker.allow()
+        breaker.record_failure()
+
+        assert breaker.state == CircuitBreaker.OPEN
+        clock.now = 19
+        assert not breaker.allow()
+
+    def test_released_trial_admits_another(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 10
+        assert breaker.allow()
+        breaker.release()
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+
+    @pytest.mark.parametrize(
+        "options", [{"failure_threshold": 0}, {"reset_timeout": -1}]
+    )
+    def test_rejects_invalid_options(self, options):
+        with pytest.raises(ValueError):
+            CircuitBreaker(**options)
+
+
+class TestHedging:
+    def test_initial_delay_until_enough_samples(self):
+        hedging = Hedging(initial_delay=0.7, min_samples=5)
+        for _ in range(4):
+            hedging.observe("search", 0.1)
+
+        assert hedging.delay("search") == 0.7
+
+    def test_percentile_of_recent_latencies(self):
+        hedging = Hedging(90, min_delay=0, min_samples=10, window=10)
+        for i in range(1, 11):
+            hedging.observe("search", i / 100)
+
+        assert hedging.delay("search") == pytest.approx(0.09)
+        assert hedging.delay("by_id") == hedging.initial_delay
+
+        for _ in range(10):
+            hedging.observe("search", 0.5)
+        assert hedging.delay("search") == 0.5
+
+    def test_delay_is_clamped(self):
+        hedging = Hedging(min_delay=0.2, max_delay=1, min_samples=1)
+        hedging.observe("fast", 0.01)
+        hedging.observe("slow", 30)
+
+        assert hedging.delay("fast") == 0.2
+        assert hedging.delay("slow") == 1
+
+    def test_rejects_invalid_options(self):
+        with pytest.raises(ValueError):
+            Hedging(101)
+        with pytest.raises(ValueError):
+            Hedging(min_delay=2, max_delay=1)
+
+
+class TestHedgedRequests:
+    def test_slow_request_is_hedged(self, httpx_mock):
+        release = threading.Event()
+        calls = []
+
+        def respond(request):
+            calls.append(request)
+            if len(calls) == 1:
+                release.wait(5)
+                return httpx.Response(200, json={"id": "slow"})
+            return httpx.Response(200, json={"id": "fast"})
+
+        httpx_mock.add_callback(respond, is_reusable=True)
+        metrics = Metrics()
+        hedging = Hedging(initial_delay=0.05, min_delay=0.01)
+
+        with BreweryAPI(hedging=hedging, metrics=metrics) as client:
+            assert client.get_brewery_by_id("abc") == {"id": "fast"}
+            release.set()
+
+        assert len(calls) == 2
+        assert metrics.retries["by_id"] == 1
+
+    def test_winning_copy_latency_is_observed(self, httpx_mock):
+        release = threading.Event()
+        calls = []
+
+        def respond(request):
+            calls.append(request)
+            if len(calls) == 1:
+                release.wait(5)
+            return httpx.Response(200, json={"id": "abc"})
+
+        httpx_mock.add_callback(respond, is_reusable=True)
+        hedging = Hedging(initial_delay=0.1, min_delay=0, min_samples=1)
+
+        with BreweryAPI(hedging=hedging) as client:
+            client.get_brewery_by_id("abc")
+            release.set()
+
+        # The duplicate's own latency, not the delay before it was sent.
+        assert hedging.delay("by_id") < 0.1
+
+    def test_time_queued_for_a_worker_is_not_hedged(self, httpx_mock, monkeypatch):
+        monkeypatch.setattr("brewcli.brewery.HEDGE_WORKERS", 1)
+        httpx_mock.add_response(json={"id": "abc"})
+        metrics = Metrics()
+        hedging = Hedging(initial_delay=0.05, min_delay=0.01)
+
+        with BreweryAPI(hedging=hedging, metrics=metrics) as client:
+            assert client._hedge_pool is not None
+            client._hedge_pool.submit(time.sleep, 0.3)
+            assert client.get_brewery_by_id("abc") == {"id": "abc"}
+
+        assert len(httpx_mock.get_requests()) == 1
+        assert not metrics.retries
+
+    def test_fast_request_is_not_hedged(self, httpx_mock):
+        httpx_mock.add_response(json={"id": "abc"})
+        metrics = Metrics()
+        hedging = Hedging(initial_delay=5)
+
+        with BreweryAPI(hedging=hedging, metrics=metrics) as client:
+            assert client.get_brewery_by_id("abc") == {"id": "abc"}
+
+        assert len(httpx_mock.get_requests()) == 1
+        assert not metrics.retries
+
+    def test_failed_duplicate_does_not_mask_the_answer(self, httpx_mock):
+        calls = []
+
+        def respond(request):
+            calls.append(request)
+            if len(calls) == 1:
+                time.sleep(0.1)
+                return httpx.Response(200, json={"id": "late"})
+            raise httpx.ConnectError("refused", request=request)
+
+        httpx_mock.add_callback(respond, is_reusable=True)
+        hedging = Hedging(initial_delay=0.01, min_delay=0.01)
+
+        with BreweryAPI(hedging=hedging) as client:
+            assert client.get_brewery_by_id("abc") == {"id": "late"}
+
+
+class TestCircuitBreakerRequests:
+    def test_fails_fast_once_open(self, httpx_mock):
+        httpx_mock.add_exception(httpx.ConnectError("refused"), is_reusable=True)
+        metrics = Metrics()
+        breaker = CircuitBreaker(failure_threshold=2)
+
+        with BreweryAPI(breaker=breaker, metrics=metrics) as client:
+            for _ in range(2):
+                with pytest.raises(httpx.HTTPError):
+                    client.get_brewery_by_id("abc")
+            with pytest.raises(CircuitOpenError):
+                client.get_brewery_by_id("abc")
+
+        assert len(httpx_mock.get_requests()) == 2
+        assert metrics.errors["by_id", "circuit_open"] == 1
+
+    def test_client_errors_do_not_open_the_circuit(self, httpx_mock):
+        httpx_mock.add_response(status_code=404, is_reusable=True)
+        breaker = CircuitBreaker(failure_threshold=1)
+
+        with BreweryAPI(breaker=breaker) as client:
+            for _ in range(3):
+                with pytest.raises(httpx.HTTPError):
+                    client.get_brewery_by_id("missing")
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_interrupted_trial_does_not_keep_the_circuit_open(self, httpx_mock):
+        def interrupt(request):
+            raise RuntimeError("interrupted")
+
+        httpx_mock.add_callback(interrupt)
+        httpx_mock.add_response(json={"id": "abc"})
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        with BreweryAPI(breaker=breaker) as client:
+            with pytest.raises(RuntimeError):
+                client.get_brewery_by_id("abc")
+            assert client.get_brewery_by_id("abc") == {"id": "abc"}
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_serves_expired_cache_entry_when_open(self, httpx_mock):
+        breaker = CircuitBreaker(failure_threshold=1)
+        breaker.record_failure()
+        cache = MemoryCache()
+        query = SearchQuery(city="Denver")
+        cache.set(f"{URL}?{query.cache_key()}", [{"id": "cached"}])
+
+        with BreweryAPI(
+            cache=cache,
+            cache_policy=CachePolicy(ttl=0, max_stale=0),
+            breaker=breaker,
+        ) as client:
+            time.sleep(0.01)
+            assert client.get_brewery_filters(query) == [{"id": "cached"}]
+            with pytest.raises(CircuitOpenError):
+                client.get_brewery_by_id("uncached")
+
+        assert not httpx_mock.get_requests()
@@ -0,0 +1,53 @@
+"""Tests for request coalescing in singleflight.py."""
+
+import threading
+
+import pytest
+
+from brewcli.singleflight import SingleFlight
+
+
+def test_sequential_calls_each_execute():
+    flight = SingleFlight()
+    calls = []
+
+    results = [
+        flight.do("key", lambda: calls.append(1) or len(calls)) for _ in range(3)
+    ]
+
+    assert results == [(1, False), (2, False), (3, False)]
+    assert flight.saved == 0
+
+
+def test_waiters_share_leader_exception():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    errors: list[Exception] = []
+
+    def failing():
+        started.set()
+        release.wait(timeout=5)
+        raise RuntimeError("upstream down")
+
+    def call(fn):
+        try:
+            flight.do("key", fn)
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    leader = threading.Thread(target=call, args=(failing,))
+    leader.start()
+    started.wait(timeout=5)
+    follower = threading.Thread(
+        target=call, args=(lambda: pytest.fail("follower must not execute"),)
+    )
+    follower.start()
+    while flight.saved < 1:
+        threading.Event().wait(0.01)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert len(errors) == 2
+    assert all(str(exc) == "upstream down" for exc in errors)
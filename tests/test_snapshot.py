@@ -0,0 +1,62 @@
+"""Tests for the memory-mapped snapshot format in snapshot.py."""
+
+import pytest
+
+from brewcli.models import Brewery
+from brewcli.snapshot import Snapshot, write_snapshot
+
+
+@pytest.fixture
+def breweries(brewery_data):
+    without_coordinate = dict(brewery_data, id="c", latitude=None, longitude=None)
+    return [
+        Brewery.from_dict(dict(brewery_data, id="b", name="Brewery b")),
+        Brewery.from_dict(without_coordinate),
+        Brewery.from_dict(dict(brewery_data, id="a", name="Brewery a", phone=None)),
+    ]
+
+
+@pytest.fixture
+def path(tmp_path, breweries):
+    path = tmp_path / "snapshot.bin"
+    write_snapshot(breweries, path)
+    return path
+
+
+def test_round_trip_in_id_order(path, breweries):
+    with Snapshot(path) as snapshot:
+        assert len(snapshot) == 3
+        assert list(snapshot) == sorted(breweries, key=lambda b: b.id)
+
+
+def test_lookup_by_id(path, breweries):
+    with Snapshot(path) as snapshot:
+        assert snapshot.get("a") == breweries[2]
+        assert snapshot.get("c").address.coordinate is None
+        assert snapshot.get("missing") is None
+        assert snapshot.index_of("b") == 1
+
+
+def test_record_out_of_range(path):
+    with Snapshot(path) as snapshot, pytest.raises(IndexError):
+        snapshot.record(3)
+
+
+def test_strings_are_shared(tmp_path, brewery_data):
+    copies = [Brewery.from_dict(dict(brewery_data, id=str(i))) for i in range(100)]
+    one, many = tmp_path / "one.bin", tmp_path / "many.bin"
+
+    write_snapshot(copies[:1], one)
+    write_snapshot(copies, many)
+
+    # Each extra record costs its fixed-width row, coordinates and its ID only.
+    per_record = (many.stat().st_size - one.stat().st_size) / 99
+    assert per_record < 100
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-snapshot"
+    path.write_bytes(b"SQLite format 3\x00" + bytes(64))
+
+    with pytest.raises(ValueError, match="not a brewcli snapshot"):
+        Snapshot(path).__enter__()
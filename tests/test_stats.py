@@ -0,0 +1,44 @@
+"""Tests for the streaming aggregations in stats.py."""
+
+import json
+
+from brewcli.models import Brewery
+from brewcli.stats import UNKNOWN, BreweryStats
+
+
+def test_grouped_counts_and_coverage(brewery_data):
+    breweries = [
+        Brewery.from_dict(brewery_data),
+        Brewery.from_dict(dict(brewery_data, state="Ohio", latitude=None)),
+        Brewery.from_dict(dict(brewery_data, brewery_type="micro", country=None)),
+    ]
+
+    stats = BreweryStats().update(iter(breweries))
+
+    assert stats.total == 3
+    assert stats.groups["state"] == {"Michigan": 2, "Ohio": 1}
+    assert stats.groups["brewery_type"] == {"brewpub": 2, "micro": 1}
+    assert stats.groups["country"] == {"United States": 2, UNKNOWN: 1}
+    assert stats.coordinate_coverage == 2 / 3
+    rates = stats.missing_rates()
+    assert rates["latitude"] == 1 / 3
+    assert rates["country"] == 1 / 3
+    assert rates["name"] == 0
+
+
+def test_empty_stats():
+    stats = BreweryStats()
+
+    assert stats.coordinate_coverage == 0.0
+    assert set(stats.missing_rates().values()) == {0.0}
+
+
+def test_to_json_orders_groups_by_count(brewery_data):
+    stats = BreweryStats()
+    for state in ("Ohio", "Maine", "Ohio"):
+        stats.add(Brewery.from_dict(dict(brewery_data, state=state)))
+
+    data = json.loads(stats.to_json())
+
+    assert list(data["groups"]["state"].items()) == [("Ohio", 2), ("Maine", 1)]
+    assert data["total"] == 3
@@ -0,0 +1,90 @@
+"""Tests for the `--timings` collector in timings.py."""
+
+import gzip
+import io
+import json
+
+import httpx
+from rich.console import Console
+
+from brewcli.brewery import BreweryAPI
+from brewcli.render import render_timings
+from brewcli.timings import Timings
+
+
+def test_phase_accumulates_calls_and_duration():
+    timings = Timings()
+
+    with timings.phase("parse"):
+        pass
+    with timings.phase("parse"):
+        pass
+
+    assert timings.calls["parse"] == 2
+    assert timings.durations["parse"] >= 0
+
+
+def test_trace_events_map_to_network_subphases():
+    """httpcore started/complete pairs are folded into connect/tls/wait/etc."""
+    timings = Timings()
+
+    for step in ("connect_tcp", "start_tls", "receive_response_headers"):
+        timings.trace(f"connection.{step}.started", {})
+        timings.trace(f"connection.{step}.complete", {})
+    timings.trace("http11.response_closed.started", {})
+
+    assert set(timings.durations) == {"connect", "tls", "wait"}
+
+
+def test_client_records_network_decode_and_bytes(httpx_mock):
+    httpx_mock.add_response(json=[{"id": "1"}])
+    timings = Timings()
+
+    with BreweryAPI(timings=timings) as client:
+        client.get_random_breweries(1)
+
+    assert timings.requests == 1
+    assert timings.bytes_received > 0
+    assert timings.bytes_decoded == timings.bytes_received
+    assert timings.compression_ratio == 1.0
+    assert timings.calls["network"] == 1
+    assert timings.calls["decode"] == 1
+
+
+def test_compressed_responses_count_wire_and_decoded_bytes(httpx_mock):
+    body = json.dumps(
+        [{"id": str(i), "name": "Test Brewery"} for i in range(50)]
+    ).encode()
+    # A raw stream, so the mock does not decode the body before the client does.
+    httpx_mock.add_callback(
+        lambda request: httpx.Response(
+            200,
+            stream=httpx.ByteStream(gzip.compress(body)),
+            headers={"Content-Encoding": "gzip"},
+        )
+    )
+    timings = Timings()
+
+    with BreweryAPI(timings=timings) as client:
+        client.get_random_breweries(1)
+
+    request = httpx_mock.get_request()
+    assert "gzip" in request.headers["Accept-Encoding"]
+    assert timings.bytes_decoded == len(body)
+    assert timings.compression_ratio > 5
+
+
+def test_render_timings_lists_phases_and_totals():
+    timings = Timings()
+    timings.add("network", 0.25)
+    timings.add("connect", 0.05)
+    timings.records = 3
+    buffer = io.StringIO()
+
+    render_timings(timings, out=Console(file=buffer, width=200))
+    output = buffer.getvalue()
+
+    assert "network" in output
+    assert "connect" in output
+    assert "total" in output
+    assert "3 record(s)" in output
@@ -0,0 +1,112 @@
+"""Tests for change polling in watch.py."""
+
+import httpx
+import pytest
+
+from brewcli.brewery import BreweryAPI
+from brewcli.models import SearchQuery
+from brewcli.watch import Watcher
+
+
+@pytest.fixture
+def server(httpx_mock, brewery_data):
+    """A fake search endpoint serving `server.pages`, with ETags."""
+
+    class Server:
+        def __init__(self):
+            self.pages = [[dict(brewery_data, id="1"), dict(brewery_data, id="2")]]
+            self.etags = True
+
+        def respond(self, request: httpx.Request) -> httpx.Response:
+            page = int(request.url.params["page"])
+            body = self.pages[page - 1] if page <= len(self.pages) else []
+            etag = f'"{page}-{hash(str(body))}"'
+            if not self.etags:
+                return httpx.Response(200, json=body)
+            if request.headers.get("If-None-Match") == etag:
+                return httpx.Response(304, headers={"ETag": etag})
+            return httpx.Response(200, json=body, headers={"ETag": etag})
+
+    fake = Server()
+    httpx_mock.add_callback(fake.respond, is_reusable=True)
+    return fake
+
+
+def test_unchanged_poll_is_not_modified(server):
+    with BreweryAPI() as client:
+        watcher = Watcher(client, SearchQuery(city="Grandville"))
+        baseline = watcher.poll()
+        delta = watcher.poll()
+
+    assert baseline.total == 2
+    assert not baseline
+    assert not delta
+    assert delta.total == 2
+    assert delta.not_modified == delta.requests == 1
+
+
+def test_reports_additions_removals_and_closures(server, brewery_data):
+    with BreweryAPI() as client:
+        watcher = Watcher(client, SearchQuery(city="Grandville"))
+        watcher.poll()
+        server.pages = [
+            [
+                dict(brewery_data, id="1", brewery_type="closed", phone="222"),
+                dict(brewery_data, id="3", name="New Brewing"),
+            ]
+        ]
+        delta = watcher.poll()
+
+    assert [r["id"] for r in delta.added] == ["3"]
+    assert [r["id"] for r in delta.removed] == ["2"]
+    (change,) = delta.changed
+    assert change.id == "1"
+    assert change.closed
+    assert change.fields == {
+        "brewery_type": ("brewpub", "closed"),
+        "phone": ("111-111-1111", "222"),
+    }
+    events = list(delta.events())
+    assert [e["event"] for e in events] == ["added", "removed", "changed"]
+    assert events[2]["closed"] is True
+
+
+def test_identical_body_without_etag_is_not_reparsed(server, mocker):
+    server.etags = False
+    with BreweryAPI() as client:
+        watcher = Watcher(client, SearchQuery(city="Grandville"))
+        watcher.poll()
+        parse = mocker.patch("brewcli.watch.Brewery.from_dict")
+        delta = watcher.poll()
+
+    assert not delta
+    assert delta.not_modified == 1
+    parse.assert_not_called()
+
+
+def test_not_modified_without_a_previous_page_is_refetched(server, httpx_mock):
+    answered = []
+
+    def respond(request):
+        answered.append(request)
+        if len(answered) == 1:
+            return httpx.Response(304, headers={"ETag": '"stale"'})
+        return server.respond(request)
+
+    httpx_mock.reset()
+    httpx_mock.add_callback(respond, is_reusable=True)
+
+    with BreweryAPI() as client:
+        watcher = Watcher(client, SearchQuery(city="Grandville"))
+        delta = watcher.poll()
+
+    assert delta.total == 2
+    assert delta.requests == 2
+    assert "If-None-Match" not in answered[1].headers
+
+
+def test_repeated_not_modified_without_a_previous_page_raises(httpx_mock):
+    httpx_mock.add_response(status_code=304, is_reusable=True)
+
+    with BreweryAPI() as client, pytest.raises(ValueError):
+        Watcher(client, SearchQuery(city="Grandville")).poll()